@@ -0,0 +1,379 @@
+import logo
+
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from PIL import Image
+import struct
+import zlib
+import io
+import os
+
+
+class APNGWriter:
+    """
+    Streams RGBA frames into an animated PNG, one frame at a time
+
+    Each frame is filtered/compressed and written as soon as it is received, so only the
+    current frame is ever held in memory. APNG needs the number of frames up front (acTL chunk).
+
+    Args:
+    ========
+      path : str
+          file to write
+      width, height : int
+          size of the frames in pixels
+      num_frames : int
+          number of frames that will be written
+      fps : float
+          frames per second
+      loops : int
+          number of times to play the animation, 0 is forever
+    """
+    def __init__(self, path, width, height, num_frames, fps, loops=0):
+        self.fp = open(path, 'wb')
+        self.width = width
+        self.height = height
+        self.delay = (int(round(1000 / fps)), 1000) # numerator/denominator in seconds
+        self.seq = 0
+        self.count = 0
+
+        self.fp.write(b'\x89PNG\r\n\x1a\n')
+        # 8 bit RGBA, no interlacing
+        self._chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0))
+        self._chunk(b'acTL', struct.pack('>II', num_frames, loops))
+
+    def _chunk(self, tag, data):
+        self.fp.write(struct.pack('>I', len(data)))
+        self.fp.write(tag)
+        self.fp.write(data)
+        self.fp.write(struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff))
+
+    def write(self, frame):
+        """
+        Writes a single (height, width, 4) uint8 frame
+        """
+        # "sub" filter on every row (filter type 1), compresses a lot better than no filter
+        filtered = frame.reshape(self.height, -1).copy()
+        filtered[:, 4:] -= frame.reshape(self.height, -1)[:, :-4]
+        rows = np.empty((self.height, filtered.shape[1] + 1), dtype=np.uint8)
+        rows[:, 0] = 1
+        rows[:, 1:] = filtered
+        data = zlib.compress(rows.tobytes(), 6)
+
+        # frame control: no disposal (0), frames completely replace the canvas (source blend, 0)
+        self._chunk(b'fcTL', struct.pack('>IIIIIHHBB', self.seq, self.width, self.height, 0, 0,
+                                         self.delay[0], self.delay[1], 0, 0))
+        self.seq += 1
+        if self.count == 0:
+            self._chunk(b'IDAT', data)
+        else:
+            self._chunk(b'fdAT', struct.pack('>I', self.seq) + data)
+            self.seq += 1
+        self.count += 1
+
+    def close(self):
+        self._chunk(b'IEND', b'')
+        self.fp.close()
+
+
+class GIFWriter:
+    """
+    Streams RGBA frames into an animated GIF, one frame at a time
+
+    Each frame is quantized and LZW-encoded by Pillow on its own, then the encoded image block
+    is spliced into the output file with a local color table. Pixels that are less than half
+    opaque become transparent (GIF only supports 1-bit transparency).
+
+    Args:
+    ========
+      path : str
+          file to write
+      width, height : int
+          size of the frames in pixels
+      fps : float
+          frames per second
+      loops : int
+          number of times to play the animation, 0 is forever
+    """
+    def __init__(self, path, width, height, fps, loops=0):
+        self.fp = open(path, 'wb')
+        self.delay = int(round(100 / fps)) # hundredths of a second
+
+        # header, logical screen descriptor (no global color table)
+        self.fp.write(b'GIF89a' + struct.pack('<HHBBB', width, height, 0, 0, 0))
+        # NETSCAPE2.0 application extension for looping
+        self.fp.write(b'\x21\xff\x0bNETSCAPE2.0\x03\x01' + struct.pack('<H', loops) + b'\x00')
+
+    def write(self, frame):
+        """
+        Writes a single (height, width, 4) uint8 frame
+        """
+        transparent = frame[:, :, 3] < 128
+        im = Image.fromarray(np.ascontiguousarray(frame[:, :, :3])).quantize(255)
+        im.paste(255, mask=Image.fromarray(transparent.astype(np.uint8) * 255))
+        buf = io.BytesIO()
+        im.save(buf, format='GIF', transparency=255, optimize=False)
+        self._splice(buf.getvalue())
+
+    def _splice(self, data):
+        # parse the single frame gif written by Pillow
+        flags = data[10]
+        pos = 13
+        table = b''
+        if flags & 0x80:
+            table_size = 3 * 2**((flags & 0x07) + 1)
+            table = data[pos:pos+table_size]
+            pos += table_size
+        trans_index = 255
+        while data[pos] != 0x3b:
+            if data[pos] == 0x21:
+                # extension, keep track of the transparency index if it is a graphics control one
+                if data[pos+1] == 0xf9 and data[pos+3] & 0x01:
+                    trans_index = data[pos+6]
+                pos += 2
+                while data[pos] != 0:
+                    pos += data[pos] + 1
+                pos += 1
+            elif data[pos] == 0x2c:
+                descriptor = bytearray(data[pos:pos+10])
+                image_flags = descriptor[9]
+                pos += 10
+                if image_flags & 0x80:
+                    table_size = 3 * 2**((image_flags & 0x07) + 1)
+                    table = data[pos:pos+table_size]
+                    pos += table_size
+                start = pos
+                pos += 1 # LZW minimum code size
+                while data[pos] != 0:
+                    pos += data[pos] + 1
+                pos += 1
+                # graphic control: restore to background after, transparency flag on
+                self.fp.write(b'\x21\xf9\x04' + struct.pack('<BHB', (2 << 2) | 1, self.delay,
+                                                            trans_index) + b'\x00')
+                # local color table takes the place of the (single frame) global one,
+                # keep the interlace flag
+                size_bits = int(np.log2(len(table) // 3)) - 1
+                descriptor[9] = 0x80 | (image_flags & 0x40) | size_bits
+                self.fp.write(bytes(descriptor) + table + data[start:pos])
+            else:
+                break
+
+    def close(self):
+        self.fp.write(b'\x3b')
+        self.fp.close()
+
+
+class FrameWriter:
+    """
+    Streams RGBA frames into a directory of numbered PNG files
+
+    Args:
+    ========
+      path : str
+          directory to write frames to
+    """
+    def __init__(self, path):
+        if not os.path.exists(path):
+            os.makedirs(path)
+        self.path = path
+        self.count = 0
+
+    def write(self, frame):
+        """
+        Writes a single (height, width, 4) uint8 frame
+        """
+        Image.fromarray(frame).save(os.path.join(self.path, 'frame_%05d.png' % self.count))
+        self.count += 1
+
+    def close(self):
+        pass
+
+
+def split_layers(ax, animated):
+    """
+    Splits the artists of the axes into static layers below and above the animated artists
+
+    Any static artists that are drawn in between animated artists (in zorder) are redrawn
+    along with the animated artists every frame.
+
+    Args:
+    ========
+      ax : plt axes object
+          axes the logo is drawn on
+      animated : list of plt artist objects
+          artists that change from frame to frame
+
+    Returns:
+    ========
+      below, middle, above : lists of plt artist objects
+          artists drawn below, in between, and above the animated artists
+    """
+    # same ordering matplotlib uses when drawing the axes
+    artists = sorted([a for a in ax.get_children() if a.get_visible()], key=lambda a: a.get_zorder())
+    idx = [i for i, a in enumerate(artists) if any(a is b for b in animated)]
+    return artists[:idx[0]], artists[idx[0]:idx[-1]+1], artists[idx[-1]+1:]
+
+
+def alpha_over(fg, bg):
+    """
+    Composites the straight-alpha RGBA array fg over bg (both float, 0-1)
+    """
+    fa = fg[:, :, 3:]
+    ba = bg[:, :, 3:]
+    out_a = fa + ba * (1 - fa)
+    out = np.empty_like(bg)
+    out[:, :, :3] = (fg[:, :, :3]*fa + bg[:, :, :3]*ba*(1 - fa)) / np.maximum(out_a, 1e-12)
+    out[:, :, 3:] = out_a
+    return out
+
+
+def animate_logo(fname, colors, ratio='5:4', shape='default', dpi=100, marker='o',
+                 ftype='apng', mode='popcorn', fps=12, loops=0):
+    """
+    Creates and saves an animated logo
+
+    Static layers are rendered once and cached: everything below the animated layer as a
+    blitting background, everything above it as an RGBA overlay. Every frame only the animated
+    artists are drawn, and the frame is streamed straight to the output file.
+
+    Args:
+    ========
+      fname : str
+          filename to save the resulting animation as (a directory name if ftype='frames')
+      colors : dict of str
+          defines hex colors for logo features, see logo.logo
+      ratio : str, default='5:4'
+          sets the ratio of the logo, see logo.logo
+      shape : str, default='default'
+          sets the shape of the logo, see logo.logo
+      dpi : int, default=100
+          sets the dots-per-inch for the frames
+          default is 100, since animations get big fast
+      marker : str, default='o'
+          sets the shape of the popcorn function markers
+      ftype : str, default='apng'
+          sets the filetype for the animation
+          valid filetypes are 'apng', 'gif' and 'frames' (directory of png files)
+      mode : str, default='popcorn'
+          what gets animated
+          'popcorn' - the popcorn function dots appear one depth (denominator) at a time
+          'sky'     - the sky stripes cycle, requires a list of colors for the sky
+      fps : float, default=12
+          frames per second
+      loops : int, default=0
+          number of times to play the animation, 0 is forever (ignored for 'frames')
+    """
+    # -----------------------------------
+    # argument checking
+    # -----------------------------------
+    args = logo.check_args(ratio, shape, marker)
+    if args is None:
+        return
+    ratio, shape = args
+
+    if ftype not in ['apng', 'gif', 'frames']:
+        print('ERROR: only apng, gif, and frames filetypes are accepted')
+        return
+    if mode not in ['popcorn', 'sky']:
+        print('ERROR: mode is not valid!')
+        print('Please use mode=\'popcorn\' or mode=\'sky\'')
+        return
+    if mode == 'sky' and (type(colors['sky']) == str or len(colors['sky']) < 2):
+        print('ERROR: sky mode needs a list of (at least two) sky colors')
+        return
+
+    shift_up = logo.get_shift_up(ratio, shape)
+
+    # -----------------------------------
+    # begin plotting
+    # -----------------------------------
+    fig = plt.figure()
+    canvas = FigureCanvasAgg(fig) # need an Agg canvas for blitting
+    ax = fig.gca()
+
+    draw_region, footer_region = logo.background_shapes(ax, shape, ratio,
+                                                        colors['border'], colors['border_contrast'])
+
+    logo.draw_mountains(ax, ratio, shift_up, colors['mountains_edge'], colors['mountains_snow'],
+                        draw_region)
+
+    dots = logo.draw_popcorn(ax, ratio, shift_up, colors['popcorn'], marker, draw_region, dpi)
+
+    sky_layer = logo.draw_sky(ax, shift_up, colors['sky'], draw_region)
+
+    logo.add_text(ax, shape, ratio, shift_up,
+                  colors['popcorn'], colors['header_text'], colors['header_tag'],
+                  colors['footer_text'], colors['footer_lines'], draw_region, footer_region)
+
+    logo.set_limits(fig, ax, ratio)
+    fig.set_dpi(dpi)
+    fig.patch.set_alpha(0.0) # transparent, same as saving with transparent=True
+
+    animated = [dots] if mode == 'popcorn' else [sky_layer]
+    below, middle, above = split_layers(ax, animated)
+
+    # -----------------------------------
+    # cache the static layers
+    # -----------------------------------
+    for a in middle + above:
+        a.set_visible(False)
+    canvas.draw()
+    background = canvas.copy_from_bbox(fig.bbox)
+
+    for a in below:
+        a.set_visible(False)
+    for a in above:
+        a.set_visible(True)
+    canvas.draw()
+    overlay = np.asarray(canvas.buffer_rgba()).astype(np.float32) / 255
+
+    for a in middle:
+        a.set_visible(True)
+        a.set_animated(True)
+    for a in below:
+        a.set_visible(True)
+
+    # -----------------------------------
+    # frames
+    # -----------------------------------
+    if mode == 'popcorn':
+        # depth (denominator) of every dot, in the same order as they are drawn
+        offsets = dots.get_offsets()
+        x, y, depths, s = logo.popcorn_points(ratio, shift_up, marker, dpi)
+        frame_values = np.unique(depths)
+    else:
+        sky = list(colors['sky'])
+        frame_values = np.arange(len(sky))
+
+    # check if images directory exists
+    im_dir_exists = os.path.exists('images')
+    if not im_dir_exists:
+        os.mkdir('images')
+
+    height, width = overlay.shape[:2]
+    if ftype == 'apng':
+        writer = APNGWriter('images/'+fname, width, height, len(frame_values), fps, loops)
+    elif ftype == 'gif':
+        writer = GIFWriter('images/'+fname, width, height, fps, loops)
+    else:
+        writer = FrameWriter('images/'+fname)
+
+    for value in frame_values:
+        canvas.restore_region(background)
+        if mode == 'popcorn':
+            # dots only accumulate, so just draw the new ones on top of the last frame
+            dots.set_offsets(offsets[depths == value])
+        else:
+            # stripes move down one color per frame
+            sky_layer.set_facecolor(sky[value:] + sky[:value])
+        for a in middle:
+            ax.draw_artist(a)
+        if mode == 'popcorn':
+            background = canvas.copy_from_bbox(fig.bbox)
+
+        frame = alpha_over(overlay, np.asarray(canvas.buffer_rgba()).astype(np.float32) / 255)
+        writer.write(np.round(frame * 255).astype(np.uint8))
+
+    writer.close()
+    plt.close(fig)
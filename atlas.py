@@ -0,0 +1,165 @@
+import logo
+import colorways
+
+import numpy as np
+import matplotlib.pyplot as plt
+from PIL import Image
+import json
+import os
+
+
+def pack(sizes, max_size=4096, padding=2):
+    """
+    Packs rectangles into as few atlases as possible
+
+    Uses shelves (rows) filled tallest rectangles first, each rectangle goes on the first shelf
+    (of the first atlas) it fits on, or starts a new shelf/atlas. The logos are all about the same
+    height, so shelves waste very little space.
+
+    Args:
+    ========
+      sizes : list of (int, int)
+          (width, height) of each rectangle in pixels
+      max_size : int, default=4096
+          maximum width and height of an atlas, atlases are only as wide as they need to be to
+          be about square
+      padding : int, default=2
+          empty pixels between rectangles
+
+    Returns:
+    ========
+      placements : list of (int, int, int)
+          (atlas, x, y) of each rectangle, in the same order as sizes
+      atlas_sizes : list of (int, int)
+          (width, height) of each atlas
+      None if a rectangle doesn't fit in max_size
+    """
+    placements = [None] * len(sizes)
+    atlases = [] # shelves of each atlas, [y, height, width used]
+
+    # aim for square-ish atlases, shelves about as wide as all the rectangles are tall
+    area = sum((w + padding) * (h + padding) for w, h in sizes)
+    width = min(max_size, max([w for w, h in sizes] + [int(np.ceil(np.sqrt(area)))]))
+
+    for i in sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0])):
+        w, h = sizes[i][0] + padding, sizes[i][1] + padding
+        if w - padding > max_size or h - padding > max_size:
+            print('ERROR: %d x %d image does not fit in a %d x %d atlas'
+                  % (*sizes[i], max_size, max_size))
+            return
+
+        for a, shelves in enumerate(atlases):
+            shelf = next((s for s in shelves if h <= s[1] and s[2] + w <= width + padding), None)
+            if shelf is not None:
+                placements[i] = (a, shelf[2], shelf[0])
+                shelf[2] += w
+                break
+            top = shelves[-1][0] + shelves[-1][1]
+            if top + h <= max_size + padding:
+                shelves.append([top, h, w])
+                placements[i] = (a, 0, top)
+                break
+        else:
+            atlases.append([[0, h, w]])
+            placements[i] = (len(atlases) - 1, 0, 0)
+
+    atlas_sizes = [(max(s[2] for s in shelves) - padding, shelves[-1][0] + shelves[-1][1] - padding)
+                   for shelves in atlases]
+    return placements, atlas_sizes
+
+
+def sprite_name(colorway, ratio, shape):
+    """
+    Utility function for the name of a sprite, e.g. 'pride_5x4_oval'
+    """
+    return '%s_%s_%s' % (colorway, ratio.replace(':', 'x'), shape)
+
+
+def export_atlas(name, colors=None, variants=None, dpi=50, marker='o', trim=True, max_size=4096,
+                 padding=2):
+    """
+    Renders logo variants packed into atlases (sprite sheets), with a JSON and CSS index
+
+    Writes images/atlas/<name>-<n>.png for each atlas, images/atlas/<name>.json with the position
+    of every sprite, and images/atlas/<name>.css with a class per sprite, so a web page can load
+    one image instead of one per variant:
+
+        <link rel="stylesheet" href="logos.css">
+        <span class="logos logos-pride_5x4_oval"></span>
+
+    Logos are rendered straight into their atlas, so only the atlases are kept in memory.
+
+    Args:
+    ========
+      name : str
+          name of the atlas files
+      colors : dict of dict, optional
+          colorways to render, by name, defaults to colorways.colorways
+      variants : list of (str, str), optional
+          (ratio, shape) pairs to render for each colorway, defaults to logo.standard_variants()
+      dpi : int, default=50
+          dots-per-inch of the sprites, logos are 6 inches tall
+      marker : str, default='o'
+          popcorn marker, see logo.logo
+      trim : bool, default=True
+          crop the sprites to the outside border, see logo.logo
+      max_size : int, default=4096
+          maximum width and height of an atlas in pixels, more atlases are made if needed
+      padding : int, default=2
+          empty pixels between sprites
+
+    Returns:
+    ========
+      index : dict
+          contents of the JSON index, None if a variant is not valid or doesn't fit
+    """
+    if colors is None:
+        colors = colorways.colorways
+    if variants is None:
+        variants = logo.standard_variants()
+
+    sprites = []
+    for colorway in colors:
+        for ratio, shape in variants:
+            args = logo.check_args(ratio, shape, marker)
+            if args is None:
+                return
+            sprites.append((colorway,) + args)
+
+    # sizes are known before rendering, so pack first and render into place
+    sizes = [logo.canvas_size(ratio, dpi, trim)[::-1] for colorway, ratio, shape in sprites]
+    packed = pack(sizes, max_size, padding)
+    if packed is None:
+        return
+    placements, atlas_sizes = packed
+    atlases = [np.zeros((h, w, 4), dtype=np.uint8) for w, h in atlas_sizes]
+
+    index = {'atlases': [], 'sprites': {}}
+    for (colorway, ratio, shape), (w, h), (a, x, y) in zip(sprites, sizes, placements):
+        logo.render_rgba(colors[colorway], ratio, shape, dpi, marker, trim=trim,
+                         out=atlases[a][y:y+h, x:x+w])
+        plt.close('all')
+        index['sprites'][sprite_name(colorway, ratio, shape)] = {
+            'atlas': a, 'file': '%s-%d.png' % (name, a), 'x': x, 'y': y, 'width': w, 'height': h,
+            'colorway': colorway, 'ratio': ratio, 'shape': shape}
+
+    # check if images directory exists
+    if not os.path.exists('images/atlas'):
+        os.makedirs('images/atlas')
+
+    for a, atlas in enumerate(atlases):
+        fname = '%s-%d.png' % (name, a)
+        Image.fromarray(atlas, 'RGBA').save('images/atlas/'+fname, optimize=True)
+        index['atlases'].append({'file': fname, 'width': atlas.shape[1], 'height': atlas.shape[0]})
+
+    with open('images/atlas/%s.json' % name, 'w') as f:
+        json.dump(index, f, indent=1)
+
+    with open('images/atlas/%s.css' % name, 'w') as f:
+        f.write('.%s { display: inline-block; background-repeat: no-repeat; }\n' % name)
+        for sprite, s in index['sprites'].items():
+            f.write('.%s-%s { background-image: url(%s); background-position: -%dpx -%dpx; '
+                    'width: %dpx; height: %dpx; }\n'
+                    % (name, sprite, s['file'], s['x'], s['y'], s['width'], s['height']))
+
+    return index
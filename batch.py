@@ -0,0 +1,351 @@
+import logo
+import colorways
+import render_pool
+
+import numpy as np
+import matplotlib.pyplot as plt
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import argparse
+import ctypes
+import json
+import time
+import gc
+import os
+
+# ------------------------
+# memory model, peak memory of a job is about base + per_pixel * (pixels of the canvas)
+# ------------------------
+model_file = 'memory_model.json'
+# measured on linux/matplotlib 3.11 with calibrate(), used if there is no model_file
+default_model = {'worker_rss': 75 * 2**20, 'base': 0, 'per_pixel': 6.0}
+model_margin = 1.2 # predictions are padded by this much
+calibration_jobs = [('5:4', 'default', 150), ('5:4', 'default', 300), ('3:1', 'rectangle', 300),
+                    ('5:4', 'default', 600)]
+# ------------------------
+
+
+def proc_status(field):
+    """
+    Utility function for a memory field of /proc/self/status (e.g. 'VmRSS') in bytes, None if
+    there isn't one (not linux)
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+
+def reset_peak_rss():
+    """
+    Resets the peak memory (VmHWM) of this process to its current memory, so the peak of the next
+    job can be measured on its own (linux only)
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def release_memory():
+    """
+    Frees everything left over from a job and gives the memory back to the system, otherwise
+    the heap of a worker stays as big as its biggest job
+    """
+    plt.close('all')
+    gc.collect()
+    try:
+        ctypes.CDLL('libc.so.6').malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def worker_pool(processes):
+    """
+    Utility function for a pool of pre-warmed (see render_pool.warm_up) worker processes
+    """
+    return concurrent.futures.ProcessPoolExecutor(
+        processes, mp_context=multiprocessing.get_context('spawn'), initializer=render_pool.warm_up)
+
+
+def run_job(job):
+    """
+    Runs one job in a worker process, logo.logo if it has a 'fname', else logo.render_logo
+
+    Returns:
+    ========
+      peak, seconds : int, float
+          peak memory of the job in bytes (above what the worker was using before it), and how
+          long it took
+    """
+    reset_peak_rss()
+    rss = proc_status('VmRSS')
+    start = time.perf_counter()
+    if 'fname' in job:
+        logo.logo(**job)
+    else:
+        logo.render_logo(**job)
+    seconds = time.perf_counter() - start
+    peak = proc_status('VmHWM')
+    release_memory()
+    return (None if rss is None or peak is None else peak - rss), seconds
+
+
+def worker_rss():
+    """
+    Utility function for the memory of a warmed up worker with nothing running, in bytes
+    """
+    release_memory()
+    return proc_status('VmRSS')
+
+
+def job_pixels(job):
+    """
+    Utility function for the number of pixels in a job's canvas (None if its arguments are not
+    valid). Vector filetypes use a lot less memory than this suggests, so their predictions are
+    on the safe side.
+    """
+    args = logo.check_args(job.get('ratio', '5:4'), job.get('shape', 'default'),
+                           job.get('marker', 'o'), job.get('ftype', 'png'))
+    if args is None:
+        return
+    height, width = logo.canvas_size(args[0], job.get('dpi', 1200), job.get('trim', False))
+    return height * width
+
+
+def fit_model(pixels, peaks, rss):
+    """
+    Fits the memory model to measured jobs, peak = base + per_pixel * pixels (least squares)
+
+    Args:
+    ========
+      pixels, peaks : list of int
+          canvas pixels and measured peak memory (bytes) of each job, see run_job
+      rss : int
+          memory of an idle worker in bytes, see worker_rss
+
+    Returns:
+    ========
+      model : dict
+          worker_rss, base and per_pixel, see default_model
+    """
+    per_pixel, base = np.polyfit(np.asarray(pixels, dtype=float), np.asarray(peaks, dtype=float), 1)
+    return {'worker_rss': int(rss), 'base': int(max(base, 0)), 'per_pixel': float(max(per_pixel, 0))}
+
+
+def calibrate(fname=model_file, colors=None):
+    """
+    Measures the peak memory of a few renders (see calibration_jobs) and saves the fitted memory
+    model, renders run one at a time in a fresh worker so nothing else is in the measurements
+
+    Args:
+    ========
+      fname : str, default=model_file
+          file to save the model to
+      colors : dict of str, optional
+          colorway to render, defaults to colorways.pride (the most colors)
+
+    Returns:
+    ========
+      model : dict
+          see fit_model, None if peak memory can't be measured here (not linux)
+    """
+    colors = colorways.pride if colors is None else colors
+    jobs = [{'colors': colors, 'ratio': ratio, 'shape': shape, 'dpi': dpi}
+            for ratio, shape, dpi in calibration_jobs]
+    try:
+        with worker_pool(1) as pool:
+            rss = pool.submit(worker_rss).result()
+            peaks = [pool.submit(run_job, job).result()[0] for job in jobs]
+    except BrokenProcessPool:
+        print('ERROR: the calibration worker died (out of memory?), no model saved')
+        return
+
+    if rss is None or None in peaks:
+        print('ERROR: peak memory can only be measured on linux')
+        return
+    model = fit_model([job_pixels(job) for job in jobs], peaks, rss)
+    with open(fname, 'w') as f:
+        json.dump(model, f, indent=1)
+    return model
+
+
+def load_model(fname=model_file):
+    """
+    Utility function for the saved memory model (see calibrate), or default_model if there isn't one
+    """
+    if not os.path.exists(fname):
+        return dict(default_model)
+    with open(fname) as f:
+        return json.load(f)
+
+
+def predict_peak(model, pixels):
+    """
+    Utility function for the predicted peak memory (bytes) of a job with a canvas this many pixels
+    """
+    return int(model_margin * (model['base'] + model['per_pixel'] * pixels))
+
+
+def available_memory():
+    """
+    Utility function for the memory available to new processes in bytes (MemAvailable on linux,
+    free physical memory elsewhere)
+    """
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_AVPHYS_PAGES')
+
+
+def run_batch(jobs, budget=None, processes=None, model=None):
+    """
+    Runs a batch of logo jobs in parallel, keeping their predicted memory under a budget
+
+    Each job's peak memory is predicted from its canvas size (see predict_peak). A job only
+    starts when it fits in what's left of the budget, biggest jobs first, and smaller jobs fill
+    in around them, so a few 1200 dpi banners run one or two at a time while icons run on every
+    worker. A job too big for the budget on its own runs by itself.
+
+    If a worker dies (e.g. killed by the OOM killer), the pool is restarted and the jobs that
+    were running are run again one at a time, a job that kills its worker on its own fails.
+
+    Args:
+    ========
+      jobs : list of dict
+          logo.logo keyword arguments (or logo.render_logo ones, without 'fname', e.g. to
+          just measure)
+      budget : int, optional
+          bytes of memory the workers can use in total, defaults to 80% of available_memory()
+      processes : int, optional
+          number of worker processes, defaults to the number of CPUs
+      model : dict, optional
+          memory model, defaults to load_model()
+
+    Returns:
+    ========
+      results : list of dict
+          for each job (in order), predicted and measured peak memory (bytes) and seconds, or
+          error, None for jobs with arguments that are not valid
+    """
+    model = load_model() if model is None else model
+    budget = int(0.8 * available_memory()) if budget is None else budget
+    processes = processes or multiprocessing.cpu_count()
+    free = budget - processes * model['worker_rss'] # idle workers hold on to this much
+
+    results = [None] * len(jobs)
+    predicted = {}
+    for i, job in enumerate(jobs):
+        pixels = job_pixels(job)
+        if pixels is not None:
+            predicted[i] = predict_peak(model, pixels)
+    pending = sorted(predicted, key=lambda i: -predicted[i])
+
+    pool = worker_pool(processes)
+    running = {}
+    used = 0
+    lost = set() # jobs that were running (with others) when a worker died, they rerun on their own
+    try:
+        while pending or running:
+            while pending and len(running) < processes:
+                if any(i in lost for i in running.values()):
+                    break
+                i = next((i for i in pending if used + predicted[i] <= free
+                          and not (running and i in lost)), None)
+                if i is None:
+                    if running:
+                        break
+                    i = pending[0]
+                    print('WARNING: job %d (predicted %d MiB) is over the memory budget, running '
+                          'it on its own' % (i, predicted[i] // 2**20))
+                try:
+                    future = pool.submit(run_job, jobs[i])
+                except BrokenProcessPool:
+                    break # the jobs still running fail too, handled below
+                pending.remove(i)
+                running[future] = i
+                used += predicted[i]
+
+            if not running:
+                # broke before anything was submitted
+                pool.shutdown(wait=False)
+                pool = worker_pool(processes)
+                continue
+
+            done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            broken = any(isinstance(future.exception(), BrokenProcessPool) for future in done)
+            if broken:
+                # a worker died (killed by the OOM killer, crashed), every running job is lost
+                # with the pool, wait for all of them
+                done = list(running)
+                concurrent.futures.wait(done)
+            alone = len(running) == 1
+            for future in done:
+                i = running.pop(future)
+                used -= predicted[i]
+                results[i] = {'predicted': predicted[i]}
+                try:
+                    results[i]['measured'], results[i]['seconds'] = future.result()
+                except BrokenProcessPool as e:
+                    if alone:
+                        # nothing else running, so this job is what killed the worker
+                        print('ERROR: job %d failed, its worker died (out of memory?)' % i)
+                        results[i]['error'] = 'BrokenProcessPool: %s' % e
+                    else:
+                        lost.add(i)
+                        pending.append(i)
+                        results[i] = None
+                except Exception as e:
+                    print('ERROR: job %d failed, %s: %s' % (i, type(e).__name__, e))
+                    results[i]['error'] = '%s: %s' % (type(e).__name__, e)
+
+            if broken:
+                pending.sort(key=lambda i: -predicted[i])
+                pool.shutdown(wait=False)
+                pool = worker_pool(processes)
+    finally:
+        pool.shutdown()
+
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='render every named colorway/standard variant '
+                                                 'at each dpi, under a memory budget')
+    parser.add_argument('--calibrate', action='store_true',
+                        help='measure renders and save the memory model first')
+    parser.add_argument('--dpi', type=int, nargs='+', default=[300, 1200])
+    parser.add_argument('--budget-mb', type=int, default=None)
+    parser.add_argument('--processes', type=int, default=None)
+    args = parser.parse_args()
+
+    if args.calibrate:
+        model = calibrate()
+        if model is not None:
+            print('worker %d MiB, job %d MiB + %.1f bytes per pixel'
+                  % (model['worker_rss'] // 2**20, model['base'] // 2**20, model['per_pixel']))
+
+    if not os.path.exists('images/batch'):
+        os.makedirs('images/batch')
+    jobs = [{'fname': 'batch/%s_%s_%s_%d.png' % (colorway, ratio.replace(':', 'x'), shape, dpi),
+             'colors': colors, 'ratio': ratio, 'shape': shape, 'dpi': dpi}
+            for colorway, colors in colorways.colorways.items()
+            for ratio, shape in logo.standard_variants() for dpi in args.dpi]
+    start = time.perf_counter()
+    results = run_batch(jobs, None if args.budget_mb is None else args.budget_mb * 2**20,
+                        args.processes)
+    for job, result in zip(jobs, results):
+        if result is not None and 'error' not in result and result['measured'] is not None:
+            print('%-45s predicted %6d MiB  measured %6d MiB  %6.2fs'
+                  % (job['fname'], result['predicted'] // 2**20, result['measured'] // 2**20,
+                     result['seconds']))
+    print('%d jobs in %.1fs' % (len(jobs), time.perf_counter() - start))
@@ -0,0 +1,145 @@
+import logo
+import colorways
+
+import matplotlib
+import matplotlib.pyplot as plt
+import matplotlib.patches as mpatches
+from matplotlib.backends.backend_pdf import PdfPages
+import os
+
+
+def swatches(colors):
+    """
+    Utility function for the distinct colors of a colorway, in the order they first appear
+
+    Returns:
+    ========
+      swatches : list of str
+          hex colors
+    """
+    seen = []
+    for key, value in colors.items():
+        for color in ([value] if isinstance(value, str) else value):
+            if color.upper() not in seen:
+                seen.append(color.upper())
+    return seen
+
+
+def catalog_page(colorway, colors, ratio, shape, marker='o', label_height=0.75):
+    """
+    Draws one brand book page, the logo at full size (6 inches tall) with a label underneath
+
+    The label has the colorway name, ratio and shape, and a swatch of each color. The page is
+    vector output, so there is no dpi, the popcorn gets every dot to logo.baseline_depth.
+
+    Args:
+    ========
+      colorway : str
+          name of the colorway, for the label
+      colors : dict of str
+          colors of the logo, see logo.logo
+      ratio, shape : str
+          checked ratio and shape, see logo.check_args
+      marker : str, default='o'
+          popcorn marker
+      label_height : float, default=0.75
+          height of the label in inches
+
+    Returns:
+    ========
+      fig : plt figure object
+          the page
+    """
+    # vector output, so the logo is laid out exactly (no pixels to line up with)
+    fig = logo.draw_logo(colors, ratio, shape, None, marker, ftype='pdf')
+
+    # the PDF holds on to every image until it is closed, so images (a gradient sky) go in at
+    # their own size (stretched by the viewer) rather than resampled to the size of the page
+    for image in fig.axes[0].images:
+        image.set_interpolation('none')
+
+    # same axes size in inches, so nothing in the logo is scaled, with the label below
+    width, height = fig.get_size_inches()
+    page_height = height + label_height
+    fig.set_size_inches(width, page_height)
+    fig.axes[0].set_position([0, label_height / page_height, 1, height / page_height])
+
+    margin = 0.25
+    fig.text(margin / width, (label_height - 0.1) / page_height, colorway.replace('_', ' '),
+             fontproperties=logo.prop, fontsize=16, color='#636363', va='top')
+    fig.text(margin / width, 0.12 / page_height, '%s  %s' % (ratio, shape.replace('_', ' ')),
+             fontproperties=logo.prop, fontsize=10, color='#636363', va='bottom')
+
+    # swatches, right aligned (closer together if there are a lot), in inches from the bottom left
+    colors = swatches(colors)
+    size = 0.3
+    step = min(0.65, (width - 2 * margin - 1.25) / len(colors))
+    x = width - margin - step * len(colors) + (step - size)
+    for color in colors:
+        fig.patches.append(mpatches.Rectangle((x, 0.3), size, size, fc=color, ec='#636363', lw=0.5,
+                                              transform=fig.dpi_scale_trans, figure=fig))
+        fig.text((x + size / 2) / width, 0.12 / page_height, color, fontproperties=logo.prop,
+                 fontsize=6, color='#636363', ha='center', va='bottom')
+        x += step
+    return fig
+
+
+def brand_book(fname='brand_book.pdf', colors=None, variants=None, marker='o'):
+    """
+    Saves a PDF catalog with a labeled page for every ratio/shape of every colorway
+
+    Pages are drawn and written one at a time, and each figure is closed once its page is
+    written, so memory stays flat however many pages there are. Everything cached between renders
+    (geometry bundle, text layouts, glyph tables, sky images) is reused from page to page, and the
+    PDF embeds each font once, with only the glyphs used on any page. Popcorn is always drawn as
+    dots, every dot to logo.baseline_depth since the pages are vector output ('raster' popcorn
+    would be an image per page, which the PDF keeps until it is closed).
+
+    Args:
+    ========
+      fname : str, default='brand_book.pdf'
+          filename to save the catalog as, in the images directory
+      colors : dict of dict, optional
+          colorways to include, by name, defaults to colorways.colorways
+      variants : list of (str, str), optional
+          (ratio, shape) pairs to include for each colorway, defaults to logo.standard_variants()
+      marker : str, default='o'
+          popcorn marker, see logo.logo
+
+    Returns:
+    ========
+      pages : int
+          number of pages, None if a variant is not valid
+    """
+    if colors is None:
+        colors = colorways.colorways
+    if variants is None:
+        variants = logo.standard_variants()
+
+    pages = []
+    for colorway in colors:
+        for ratio, shape in variants:
+            args = logo.check_args(ratio, shape, marker)
+            if args is None:
+                return
+            pages.append((colorway,) + args)
+
+    # check if images directory exists
+    if not os.path.exists('images'):
+        os.mkdir('images')
+
+    metadata = {'Title': 'CU Denver CUDMASS logo brand book', 'Creator': logo.fixed_creator}
+    with PdfPages('images/'+fname, metadata=metadata) as pdf:
+        for colorway, ratio, shape in pages:
+            fig = catalog_page(colorway, colors[colorway], ratio, shape, marker)
+            pdf.savefig(fig, transparent=True)
+            plt.close(fig)
+
+    return len(pages)
+
+
+if __name__ == '__main__':
+    matplotlib.use('Agg')
+    pages = brand_book()
+    if pages is not None:
+        print('wrote %d pages to images/brand_book.pdf' % pages)
@@ -0,0 +1,335 @@
+import logo
+import colorways
+
+import numpy as np
+import matplotlib
+import matplotlib.colors as mcolors
+from PIL import Image
+import itertools
+import argparse
+import os
+
+# ------------------------
+# contrast scoring
+# ------------------------
+# (foreground, background, minimum contrast ratio) of colors drawn next to each other, minimums
+# from WCAG 2 (3.0 for large text and graphical objects, the logo text is all large at print size)
+contrast_pairs = [('header_text', 'header_tag', 3.0),
+                  ('footer_text', 'popcorn', 3.0),
+                  ('footer_lines', 'popcorn', 3.0),
+                  ('header_tag', 'sky', 3.0),
+                  ('mountains_edge', 'sky', 3.0),
+                  ('mountains_snow', 'mountains_edge', 3.0),
+                  ('popcorn', 'mountains_edge', 3.0),
+                  ('popcorn', 'sky', 3.0),
+                  ('border', 'border_contrast', 3.0)]
+contrast_cap = 7.0 # WCAG AAA for normal text, more contrast than this doesn't add to the score
+
+# colors of logo.logo (other than the sky, which can be a list), in the order of the masks
+roles = ['popcorn', 'mountains_edge', 'mountains_snow', 'border', 'border_contrast', 'header_tag',
+         'header_text', 'footer_lines', 'footer_text']
+role_masks = {} # weights of each color per (ratio, shape, dpi, marker, stripes, mode), see masks
+# ------------------------
+
+
+def luminance(rgb):
+    """
+    Utility function for the WCAG relative luminance of sRGB colors
+
+    Args:
+    ========
+      rgb : np.array
+          (..., 3) colors, 0 to 1
+
+    Returns:
+    ========
+      luminance : np.array
+          (...) relative luminance, 0 (black) to 1 (white)
+    """
+    linear = np.where(rgb <= 0.03928, rgb / 12.92, ((rgb + 0.055) / 1.055)**2.4)
+    return linear @ np.array([0.2126, 0.7152, 0.0722])
+
+
+def contrast_ratio(l1, l2):
+    """
+    Utility function for the WCAG contrast ratio of two relative luminances (either order)
+    """
+    return (np.maximum(l1, l2) + 0.05) / (np.minimum(l1, l2) + 0.05)
+
+
+def color_table(candidates):
+    """
+    Looks up the colors of every candidate colorway at once
+
+    Each distinct color string is only converted once, however many candidates use it.
+
+    Args:
+    ========
+      candidates : list of dict
+          colorways, see logo.logo
+
+    Returns:
+    ========
+      rgb : np.array
+          (n, len(roles), 3) colors of each role, 0 to 1
+      sky : np.array
+          (n, stripes, 3) sky colors, top to bottom, padded with nan for skies with fewer stripes
+      stripes : np.array(int)
+          (n) number of sky stripes of each candidate
+    """
+    skies = [[c['sky']] if isinstance(c['sky'], str) else list(c['sky']) for c in candidates]
+    stripes = np.array([len(s) for s in skies])
+    width = stripes.max()
+
+    names = [c[role] for c in candidates for role in roles]
+    names += [s[i] if i < len(s) else 'none' for s in skies for i in range(width)]
+    unique, index = np.unique(names, return_inverse=True)
+    table = mcolors.to_rgba_array(list(unique))
+    table[table[:, 3] == 0, :3] = np.nan # padding
+    colors = table[index.ravel(), :3]
+
+    n = len(candidates)
+    rgb = colors[:n * len(roles)].reshape(n, len(roles), 3)
+    sky = colors[n * len(roles):].reshape(n, width, 3)
+    return rgb, sky, stripes
+
+
+def score_colorways(candidates, pairs=None):
+    """
+    Scores how legible candidate colorways are, from the contrast of colors drawn next to each other
+
+    All the candidates are scored together with array operations, so thousands of them take a
+    fraction of a second. Pairs with the sky use its least contrasting stripe.
+
+    Args:
+    ========
+      candidates : list of dict
+          colorways, see logo.logo
+      pairs : list of (str, str, float), optional
+          (foreground, background, minimum contrast ratio), defaults to contrast_pairs
+
+    Returns:
+    ========
+      result : dict
+          contrast - (n, len(pairs)) contrast ratio of each pair, 1 to 21
+          failing  - (n) number of pairs under their minimum
+          score    - (n) mean log contrast of the pairs (capped at contrast_cap), 0 to 1
+    """
+    if pairs is None:
+        pairs = contrast_pairs
+    rgb, sky, stripes = color_table(candidates)
+    lum = luminance(rgb)
+    sky_lum = luminance(sky)
+
+    def role_luminance(role):
+        # (n, 1) for one color, (n, stripes) for the sky
+        if role == 'sky':
+            return sky_lum
+        return lum[:, roles.index(role), None]
+
+    contrast = np.stack([np.nanmin(contrast_ratio(role_luminance(fg), role_luminance(bg)), axis=1)
+                         for fg, bg, _ in pairs], axis=1)
+    minimum = np.array([m for _, _, m in pairs])
+    failing = (contrast < minimum).sum(axis=1)
+    score = np.log(np.minimum(contrast, contrast_cap)).mean(axis=1) / np.log(contrast_cap)
+    return {'contrast': contrast, 'failing': failing, 'score': score}
+
+
+def rank_colorways(candidates, pairs=None):
+    """
+    Orders candidate colorways best first, fewest pairs under their minimum then highest score
+
+    Returns:
+    ========
+      order : np.array(int)
+          indices into candidates, best first
+      result : dict
+          see score_colorways
+    """
+    result = score_colorways(candidates, pairs)
+    order = np.lexsort((-result['score'], result['failing']))
+    return order, result
+
+
+def vary(base, **options):
+    """
+    Makes a candidate colorway for every combination of options, e.g.
+    vary(colorways.default, sky=['#ADF7FF', '#FFFFFF'], popcorn=['#D4B773', '#FFD84B'])
+
+    Args:
+    ========
+      base : dict
+          colorway with the colors that aren't varied
+      options : list
+          colors to try for each (keyword) role, a list of colors for the sky is one option
+
+    Returns:
+    ========
+      candidates : list of dict
+          len(product of the options) colorways
+    """
+    keys = list(options)
+    return [dict(base, **dict(zip(keys, values)))
+            for values in itertools.product(*[options[k] for k in keys])]
+
+
+def masks(ratio='5:4', shape='default', dpi=50, marker='o', stripes=1, sky_mode='stripes'):
+    """
+    Makes (or gets from the cache) how much of each pixel is each color of a logo
+
+    Antialiased drawing of opaque colors mixes them linearly, so a pixel is a weighted sum of the
+    colors drawn there, with weights that only depend on the geometry. Each color is rendered on
+    its own channel (three at a time, everything else black) to measure its weights, then any
+    colorway is a matrix product (see preview).
+
+    Args:
+    ========
+      ratio, shape, dpi, marker : see logo.logo
+      stripes : int, default=1
+          number of sky colors, each gets its own weights
+      sky_mode : str, default='stripes'
+          see logo.logo
+
+    Returns:
+    ========
+      weights : np.array(uint8)
+          (height, width, len(roles) + stripes) amount of each color (roles, then sky stripes
+          top to bottom) in each pixel, out of 255
+      alpha : np.array(uint8)
+          (height, width) alpha of the logo
+      None if the arguments are not valid
+    """
+    args = logo.check_args(ratio, shape, marker)
+    if args is None:
+        return
+    key = args + (dpi, marker, stripes, sky_mode)
+    if key in role_masks:
+        return role_masks[key]
+
+    names = roles + ['sky%d' % i for i in range(stripes)]
+    weights = []
+    for i in range(0, len(names), 3):
+        colors = {name: '#000000' for name in names}
+        for name, color in zip(names[i:i+3], ['#FF0000', '#00FF00', '#0000FF']):
+            colors[name] = color
+        colors['sky'] = [colors['sky%d' % j] for j in range(stripes)]
+        rgba = logo.render_rgba(colors, *args, dpi, marker, sky_mode=sky_mode)
+        weights.append(rgba[:, :, :min(3, len(names) - i)])
+
+    role_masks[key] = (np.concatenate(weights, axis=2), rgba[:, :, 3].copy())
+    return role_masks[key]
+
+
+def preview(candidates, ratio='5:4', shape='default', dpi=50, marker='o', sky_mode='stripes'):
+    """
+    Renders low resolution previews of colorways from the cached masks (see masks), without
+    drawing anything
+
+    Args:
+    ========
+      candidates : list of dict
+          colorways, see logo.logo
+      ratio, shape, dpi, marker, sky_mode : see logo.logo
+
+    Returns:
+    ========
+      images : list of np.array(uint8)
+          (height, width, 4) image of each candidate, None if the arguments are not valid
+    """
+    if len(candidates) == 0:
+        return []
+    rgb, sky, stripes = color_table(candidates)
+    images = [None] * len(candidates)
+    for n in np.unique(stripes):
+        result = masks(ratio, shape, dpi, marker, int(n), sky_mode)
+        if result is None:
+            return
+        weights, alpha = result
+        group = np.flatnonzero(stripes == n)
+
+        # every candidate with this many stripes in one product, (pixels, colors) @ (colors, 3k)
+        palette = np.concatenate([rgb[group], sky[group, :n]], axis=1) # (k, colors, 3)
+        palette = palette.transpose(1, 0, 2).reshape(weights.shape[2], -1)
+        pixels = weights.reshape(-1, weights.shape[2]).astype(np.float32) @ (palette / 255)
+        pixels = np.clip(np.rint(pixels * 255), 0, 255).astype(np.uint8)
+        pixels = pixels.reshape(alpha.shape + (len(group), 3))
+        for j, i in enumerate(group):
+            images[i] = np.dstack([pixels[:, :, j], alpha])
+    return images
+
+
+def sweep(candidates, ratio='5:4', shape='default', top=12, dpi=50, marker='o',
+          sky_mode='stripes', directory='sweep', pairs=None):
+    """
+    Ranks candidate colorways by contrast and saves previews of the best ones
+
+    Only the top candidates get previews, from masks cached per ratio/shape, so sweeping
+    thousands of colorways takes a few seconds. Previews are saved as <rank>.png in
+    images/<directory>.
+
+    Args:
+    ========
+      candidates : list of dict
+          colorways, see logo.logo (and vary)
+      ratio, shape, dpi, marker, sky_mode : see logo.logo
+      top : int, default=12
+          number of previews to save
+      directory : str, default='sweep'
+          directory for the previews, in the images directory
+      pairs : list of (str, str, float), optional
+          see score_colorways
+
+    Returns:
+    ========
+      order : np.array(int)
+          indices into candidates, best first
+      result : dict
+          see score_colorways, None if the arguments are not valid
+    """
+    order, result = rank_colorways(candidates, pairs)
+    images = preview([candidates[i] for i in order[:top]], ratio, shape, dpi, marker, sky_mode)
+    if images is None:
+        return
+
+    if not os.path.exists('images/' + directory):
+        os.makedirs('images/' + directory)
+    for rank, image in enumerate(images):
+        Image.fromarray(image, 'RGBA').save('images/%s/%03d.png' % (directory, rank))
+
+    return order, result
+
+
+if __name__ == '__main__':
+    matplotlib.use('Agg')
+
+    parser = argparse.ArgumentParser(description='contrast of the named colorways, or a random '
+                                                 'sweep of their colors')
+    parser.add_argument('--random', type=int, default=0,
+                        help='number of random colorways (from the colors of the named ones) to sweep')
+    parser.add_argument('--top', type=int, default=12)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    names = list(colorways.colorways)
+    result = score_colorways([colorways.colorways[name] for name in names])
+    print('%-16s' % '' + ' '.join('%6s' % ('%d' % (i + 1)) for i in range(len(contrast_pairs)))
+          + '  failing  score')
+    for name, contrast, failing, score in zip(names, result['contrast'], result['failing'],
+                                              result['score']):
+        print('%-16s' % name + ' '.join('%6.2f' % c for c in contrast)
+              + '  %7d  %5.2f' % (failing, score))
+    for i, (fg, bg, minimum) in enumerate(contrast_pairs):
+        print('%d: %s on %s (at least %.1f)' % (i + 1, fg, bg, minimum))
+
+    if args.random:
+        palette = sorted({c.upper() for colors in colorways.colorways.values()
+                          for value in colors.values()
+                          for c in ([value] if isinstance(value, str) else value)})
+        skies = [colors['sky'] for colors in colorways.colorways.values()]
+        rng = np.random.default_rng(args.seed)
+        candidates = [dict({role: palette[i] for role, i in
+                            zip(roles, rng.integers(len(palette), size=len(roles)))},
+                           sky=skies[rng.integers(len(skies))]) for _ in range(args.random)]
+        order, result = sweep(candidates, top=args.top)
+        print('best %d of %d saved to images/sweep' % (min(args.top, len(candidates)),
+                                                       len(candidates)))
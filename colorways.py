@@ -0,0 +1,67 @@
+# ------------------------
+# named colorways, see logo.logo for what each color is for
+# ------------------------
+default = {'popcorn': '#D4B773', # CU gold
+           'mountains_edge': '#636363',
+           'mountains_snow': '#FFFFFF',
+           'border': '#636363',
+           'border_contrast': '#FFFFFF',
+           'header_tag': '#636363',
+           'header_text': '#FFFFFF',
+           'footer_lines': '#636363',
+           'footer_text': '#FFFFFF',
+           'sky': '#ADF7FF'}
+
+pride = {'popcorn': '#D4B773',
+         'mountains_edge': '#000000',
+         'mountains_snow': '#FFFFFF',
+         'border': '#000000',
+         'border_contrast': '#FFFFFF',
+         'header_tag': '#000000',
+         'header_text': '#FFFFFF',
+         'footer_lines': '#636363',
+         'footer_text': '#FFFFFF',
+         'sky': ['#D12229', '#F68A1E', '#FDE01A', '#007940', '#24408E', '#732982']}
+
+# chinese lunar new year
+lunar_new_year = {'popcorn': '#FFD84B',
+                  'mountains_edge': '#F5AC27',
+                  'mountains_snow': '#FFECA5',
+                  'border': '#A3262A',
+                  'border_contrast': '#FFD84B',
+                  'header_tag': '#A3262A',
+                  'header_text': '#FFD84B',
+                  'footer_lines': '#A3262A',
+                  'footer_text': '#CC232A',
+                  'sky': '#CC232A'}
+
+monocolor_gold = {'popcorn': '#D4B773',
+                  'mountains_edge': '#D4B773',
+                  'mountains_snow': '#FFFFFF',
+                  'border': '#D4B773',
+                  'border_contrast': '#FFFFFF',
+                  'header_tag': '#D4B773',
+                  'header_text': '#FFFFFF',
+                  'footer_lines': '#FFFFFF',
+                  'footer_text': '#FFFFFF',
+                  'sky': '#FFFFFF'}
+
+# for T-shirts (logo_mathstats, which also uses footer_small_text)
+t_shirt = {'popcorn': '#D4B773',
+           'mountains_edge': '#000000',
+           'mountains_snow': '#FFFFFF',
+           'border': '#000000',
+           'border_contrast': '#FFFFFF',
+           'header_tag': '#D4B773',
+           'header_text': '#000000',
+           'footer_lines': '#000000',
+           'footer_text': '#000000',
+           'footer_small_text': '#000000',
+           'sky': ['#FFFFFF']}
+
+colorways = {'default': default,
+             'pride': pride,
+             'lunar_new_year': lunar_new_year,
+             'monocolor_gold': monocolor_gold,
+             't_shirt': t_shirt}
+# ------------------------
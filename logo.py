@@ -1,13 +1,25 @@
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
+import matplotlib.colors as mcolors
+from matplotlib.markers import MarkerStyle
+from matplotlib.path import Path
+from matplotlib.collections import LineCollection, PolyCollection, PathCollection
 import re
 import os
+import io
+import math
+import fractions
+import contextlib
+import cProfile
+import pstats
+from matplotlib.ft2font import FT2Font, LoadFlags, Kerning
 
 # download "Oswald" font here https://fonts.google.com/specimen/Oswald?preview.text_type=custom
 # and put Oswald directory in same directory as this script for custom font
 import matplotlib.font_manager as fm
-prop = fm.FontProperties(fname='Oswald/Oswald-VariableFont_wght.ttf')
+font_file = 'Oswald/Oswald-VariableFont_wght.ttf'
+prop = fm.FontProperties(fname=font_file)
 
 # ------------------------
 # global variables
@@ -28,6 +40,84 @@ inn_border_width_x = 0.008
 inn_border_width_y = (y_len / x_len) * inn_border_width_x
 
 shrink = 0.85 # amount to shrink left mountain by
+
+# mountain shapes, a lot of "magic" numbers here, but all correspond to a popcorn function point.
+# Can be changed to change shape/shading of mountains. Each group is drawn as one collection:
+# (kind, zorder, color, left mountain, shapes), left mountain heights get shrunk.
+# Lines are drawn before polygons with the same zorder.
+mountain_groups = [
+    # right mountain
+    ('line', 4, 'edge', False, [[(1/2, 0), (2/3, 1/3)]]),
+    ('poly', 4, 'edge', False, [[(2/3, 1/3), (4/6, 1/6), (1, 0)],
+                                [(5/8, 1/8), (4/6, 1/6), (2/3, 1/3)],
+                                [(1/2, 0), (21/40, 1/40), (2/3, 1/3)]]),
+    ('poly', 3, 'snow', False, [[(1/2, 0), (2/3, 1/3), (1, 0)]]),
+    # left mountain
+    ('line', 2, 'edge', True, [[(0, 0), (1/3, 1/3)],
+                               [(1/3, 1/3), (3/5, 1/5)]]),
+    ('poly', 2, 'edge', True, [[(1/3, 1/3), (1/2, 0), (3/5, 1/5)],
+                               [(1/3, 1/3), (2/7, 1/7), (2/5, 1/5)],
+                               [(2/6, 1/6), (5/15, 1/15), (4/9, 1/9), (2/5, 1/5)],
+                               [(1/3, 1/3), (0/15, 0/15), (2/30, 1/30)]]),
+    ('poly', 1, 'snow', True, [[(0, 0), (1/3, 1/3), (1/2, 0)]]),
+]
+
+# vertex table of all the mountain shapes (in order), with how many vertices each shape has,
+# and the height scale of each vertex
+mountain_vertices = np.array([v for group in mountain_groups for shape in group[4] for v in shape])
+mountain_lengths = [len(shape) for group in mountain_groups for shape in group[4]]
+mountain_yscale = np.array([shrink if group[3] else 1.0
+                            for group in mountain_groups for shape in group[4] for v in shape])
+
+texts = {'header': 'CU Denver',
+         'footer1': 'Mathematical and Statistical Sciences',
+         'footer1a': 'Mathematical and Statistical', # footer split over two lines
+         'footer1b': 'Sciences',
+         'footer2': 'Department of',
+         'footer3': 'Est. 1987'}
+
+glyph_tables = {} # per font file glyph metrics, see glyph_table
+
+# hand tuned 3:2 text, footer sizes 40:19:17 (main footer, "Department of", "Est. 1987"), the
+# header tag is 0.125 of the height for a 50pt header, with the text centered 0.42 of the way up
+footer_proportions = (40, 19, 17)
+header_tag = (50, 0.125, 0.42)
+
+# padding for the height of the sky stripes by number of stripes, (max stripes, padding)
+sky_stripe_pads = [(3, 0.9), (5, 1.9), (np.inf, 2.5)]
+sky_images = {} # sky gradient image per (colors, shift_up, height), see sky_image
+sky_gradient_rows = 256 # rows of the sky gradient image, one per level of an 8 bit channel
+
+# popcorn detail, see popcorn_points
+baseline_depth = 110 # depth of the original (fixed depth) logo, for the default output
+baseline_output = ('5:4', 1200) # ratio, dpi the baseline depth is for, bigger outputs go deeper
+min_marker_px = 3 # popcorn dots are always at least this many output pixels across
+
+# hand tuned ratios, and the shapes that (with the ratio) cover every distinct logo for them
+standard_ratios = ['3:2', '5:4', '1:1', '3:1']
+standard_shapes = ['default', 'rectangle', 'oval', 'rounded_rectangle']
+
+# precomputed background shapes and text layouts, see build_geometry
+geometry_file = 'geometry.npz'
+geometry_bundle = None # loaded the first time it is needed, see bundled_geometry
+# functions whose results are bundled (and what they call), their source is part of the bundle key
+geometry_functions = ['get_limits', 'border_paths', 'between_path', 'get_shift_up', 'is_banner',
+                      'normalize_ratio', 'check_args', 'text_layout', 'fit_text_layout',
+                      'footer_positions', 'fit_size', 'text_extent', 'glyph_table']
+layout_keys = ['hshift', 'tag_y0', 'tag_width', 'tag_height', 'header_fsize', 'footer_fsize1',
+               'footer_fsize2', 'footer_fsize3', 'footer_y', 'footer_gap1', 'footer_gap2',
+               'footer_gap3']
+
+# fixed metadata for deterministic output, see save_figure
+fixed_creator = 'CU Denver CUDMASS logo'
+fixed_hashsalt = 'cudmass-logo'
+fixed_date_epoch = '0' # 1970-01-01
+# matplotlib versions (from, up to) whose eps backend has the private clip path hook that
+# deterministic_output patches, see stable_ps_clips
+ps_clip_hook_versions = ((3, 4), (4, 0))
+
+# subsets of the fonts embedded in svg output, see font_subset
+font_subsets = {} # (family, css src) per glyph set hash
 # ------------------------
 
 
@@ -44,6 +134,87 @@ def scalex(x,scale_factor):
     """
     return (x - (x_max - x_min) / 2) * scale_factor + (x_max - x_min) / 2
 
+
+def parse_ratio(ratio):
+    """
+    Utility function for reading an aspect ratio like '5:4' or '16:9'
+
+    Args:
+    ========
+      ratio : str
+          aspect ratio of the logo, width:height
+
+    Returns:
+    ========
+      w, h : float
+          width and height of the ratio, None if the ratio can't be read
+    """
+    match = re.fullmatch(r'\s*(\d+(?:\.\d*)?)\s*:\s*(\d+(?:\.\d*)?)\s*', str(ratio))
+    if match is None or float(match.group(1)) <= 0 or float(match.group(2)) <= 0:
+        return
+    return float(match.group(1)), float(match.group(2))
+
+
+def normalize_ratio(ratio):
+    """
+    Utility function for writing an aspect ratio in whole numbers in lowest terms, so e.g.
+    '10:8' and '1.25:1' get the same (hand tuned) layout as '5:4'
+
+    Args:
+    ========
+      ratio : str
+          aspect ratio of the logo, width:height
+
+    Returns:
+    ========
+      ratio : str
+          the same ratio as 'w:h', None if the ratio can't be read
+    """
+    if parse_ratio(ratio) is None:
+        return
+    w, h = [fractions.Fraction(x.strip()) for x in str(ratio).split(':')]
+    ratio = w / h
+    return '%d:%d' % (ratio.numerator, ratio.denominator)
+
+
+def is_banner(ratio):
+    """
+    Utility function, banner sized logos (3:1 or wider) have narrower mountains and are
+    always rectangles
+
+    Args:
+    ========
+      ratio : str
+          aspect ratio of the logo
+    """
+    w, h = parse_ratio(ratio)
+    return w / h >= 2.5
+
+
+def get_limits(ratio):
+    """
+    Utility function for the x and y limits of the plot, including borders
+
+    Args:
+    ========
+      ratio : str
+          aspect ratio of the logo
+
+    Returns:
+    ========
+      xlim, ylim : tuple of float
+          (low, high) limits in x and y
+    """
+    # stretch axes
+    w, h = parse_ratio(ratio)
+    scale_x_bw = h / w
+
+    sinn_border_width_x = inn_border_width_x*scale_x_bw
+    sborder_width_x = border_width_x*scale_x_bw
+
+    return ((x_min-sborder_width_x-sinn_border_width_x, x_max+sborder_width_x+sinn_border_width_x),
+            (y_min-border_width_y-inn_border_width_y, y_max+border_width_y+inn_border_width_y))
+
     
 def popcorn(depth):
     """
@@ -81,44 +252,325 @@ def popcorn(depth):
     return np.array(rationals), np.array(y)
 
 
-def add_text(ax, shape, ratio, shift_up, popcorn_color, header_color1, header_color2,
-             footer_color1, footer_color2, draw_region, footer_region):
+def popcorn_chunks(depth, chunk_size=2**20):
     """
-    Adds the text and text elements (boxes, lines)
+    Creates the same (x,y) points as popcorn, but streamed in chunks of whole rows so the
+    popcorn function can be made very deep without holding every point in memory
 
-    Note: This function is the worst - text boxes are not fun to work with in matplotlib because
-    they don't "snap to" the text inside them. Lots of magic numbers and eyeballing. Not very
-    modular and will need to be adjusted if any major changes (sizing, font sizing) are made.
+    Args:
+    ========
+      depth : int
+          depth of the popcorn function
+      chunk_size : int
+          (roughly) the number of points in each chunk, always at least one row
+
+    Yields:
+    ========
+      rationals : np.array(float)
+          numpy array containing the next rationals, in the same order as popcorn
+      y : np.array(float)
+          numpy array containing f(rationals)
+    """
+    depth = int(depth)
+    start = 2
+    while start <= depth:
+        # rows start, ..., stop-1, row i has i-1 points
+        stop = start + 1
+        count = start - 1
+        while stop <= depth and count + stop - 1 <= chunk_size:
+            count += stop - 1
+            stop += 1
+        i = np.repeat(np.arange(start, stop), np.arange(start - 1, stop - 1))
+        row_start = np.repeat(np.cumsum(np.arange(start - 1, stop - 1)) - np.arange(start - 1, stop - 1),
+                              np.arange(start - 1, stop - 1))
+        j = np.arange(len(i)) - row_start + 1
+        yield j / i, 1 / i
+        start = stop
+
+
+def glyph_table(fname=font_file):
+    """
+    Cached per-glyph metrics for a font file
+
+    The table is filled in lazily, each character (and kerning pair) is only ever loaded from
+    the font once, so measuring text after the first time is just a few dictionary lookups.
 
     Args:
     ========
-    ax : plt axes object
-        used to add shapes to plot
-    shape : str
-        shape of the logo
-    ratio : str
-        aspect ratio of the logo
-    shift_up : float
-        vertical shift of drawing
-    popcorn_color : str
-        color of the ground/popcorn dots
-    header_color1 : str
-        color of the header text
-    header_color2 : str
-        color of the header tag
-    footer_color1 : str
-        color of footer text
-    footer_color2 : str
-        color of the footer lines/alt text
-    draw_region : mpatches patch object
-        draw region (inside borders)
-    footer_region : mpatches patch object
-        region that footer text can use
+      fname : str
+          font file
+
+    Returns:
+    ========
+      table : dict
+          font    - FT2Font object, sized so 1 em = 72 pixels
+          glyphs  - char -> (glyph index, advance, ymin, ymax), all in em
+          kerning - (char, char) -> kerning in em
+    """
+    if fname not in glyph_tables:
+        font = FT2Font(fname)
+        font.set_size(72, 72)
+        glyph_tables[fname] = {'font': font, 'glyphs': {}, 'kerning': {}}
+    return glyph_tables[fname]
+
+
+def text_extent(text, fname=font_file):
+    """
+    Measures a single line of text from the cached glyph metrics
+
+    Args:
+    ========
+      text : str
+          text to measure
+      fname : str
+          font file
+
+    Returns:
+    ========
+      width, ymin, ymax : float
+          advance width and vertical ink extent of the text in em (multiply by the font size
+          to get points)
+    """
+    table = glyph_table(fname)
+    font = table['font']
+    glyphs = table['glyphs']
+    kerning = table['kerning']
+
+    width = 0.0
+    ymin = 0.0
+    ymax = 0.0
+    for count, char in enumerate(text):
+        if char not in glyphs:
+            glyph = font.load_char(ord(char), flags=LoadFlags.NO_HINTING)
+            # advance is 16.16 fixed point pixels, bbox is 26.6 fixed point pixels
+            glyphs[char] = (font.get_char_index(ord(char)), glyph.linearHoriAdvance / 65536 / 72,
+                            glyph.bbox[1] / 64 / 72, glyph.bbox[3] / 64 / 72)
+        index, advance, gymin, gymax = glyphs[char]
+        if count > 0:
+            pair = (text[count-1], char)
+            if pair not in kerning:
+                kerning[pair] = font.get_kerning(glyphs[pair[0]][0], index, Kerning.UNFITTED) / 64 / 72
+            width += kerning[pair]
+        width += advance
+        ymin = min(ymin, gymin)
+        ymax = max(ymax, gymax)
+
+    return width, ymin, ymax
+
+
+def fit_size(fits, lo, hi, tol=0.05):
+    """
+    Binary search for the largest font size between lo and hi that fits
+
+    Args:
+    ========
+      fits : function
+          takes a font size, returns True if text at that size fits
+      lo, hi : float
+          smallest and largest font sizes to consider
+      tol : float
+          font size tolerance of the search
+
+    Returns:
+    ========
+      size : float
+          largest size that fits, lo if nothing fits
+    """
+    if fits(hi):
+        return hi
+    while hi - lo > tol:
+        mid = (lo + hi) / 2
+        if fits(mid):
+            lo = mid
+        else:
+            hi = mid
+    return lo
+
+
+def footer_positions(ratio, shift_up, size=None):
+    """
+    Utility function for the vertical positions of the footer lines
+
+    The hand tuned positions are for the hand tuned main footer sizes (40pt on one line, 34pt on
+    two lines, 46pt for banners), other sizes keep the main footer where it is and scale the gaps
+    between the lines with the size.
+
+    Args:
+    ========
+      ratio : str
+          aspect ratio of the logo
+      shift_up : float
+          vertical shift of drawing
+      size : float, optional
+          font size of the main footer, None for the hand tuned positions
+
+    Returns:
+    ========
+      footer_y : float
+          center of "Department of" (axes coordinates)
+      gap1, gap2, gap3 : float
+          from "Department of" to the (first) main footer line, between the main footer lines
+          (0 for one line) and from the (last) main footer line to "Est. 1987"
+    """
+    if shift_up != 0.0:
+        scale = 1.0 if size is None else size / 34
+        gap1, gap2, gap3 = 0.075 * scale, 0.08 * scale, 0.075 * scale
+        main = 0.35 - 0.075 - 0.08 / 2
+    else:
+        # need to shift down a little for banner size
+        vshift = -0.01 if is_banner(ratio) else 0.0
+        scale = 1.0 if size is None else size / (46 if is_banner(ratio) else footer_proportions[0])
+        gap1, gap2, gap3 = (0.078 - vshift) * scale, 0.0, (0.075 - vshift) * scale
+        main = 0.29 + vshift - 0.078 + vshift
+    return main + gap1 + gap2 / 2, gap1, gap2, gap3
+
+
+def fit_text_layout(shape, ratio, shift_up, footer_region):
     """
+    Fits the header and footer text for any aspect ratio
+
+    Text sizes come from the cached glyph metrics (see text_extent), nothing is drawn. The header
+    is as big as the 3:2 header, unless it would run into the left border, and its tag shrinks
+    with it. The main footer is as big as will fit inside the footer region (with a margin),
+    found by binary search, the other footer lines and the gaps between them keep their 3:2
+    proportions to it (see footer_proportions and footer_positions).
+
+    Args:
+    ========
+      shape : str
+          shape of the logo
+      ratio : str
+          aspect ratio of the logo
+      shift_up : float
+          vertical shift of drawing
+      footer_region : mpatches patch object
+          region that footer text can use
+
+    Returns:
+    ========
+      layout : dict
+          see text_layout
+    """
+    w, h = parse_ratio(ratio)
+    fig_w = 6 * w / h # figure size in inches, see set_limits
+    fig_h = 6
+    xlim, ylim = get_limits(ratio)
+
+    margin = 0.1 # inches between text and footer region edge
+    pad = 0.25 # inches between header text and end of tag
+
     # -----------------------------------------
     # header
     # -----------------------------------------
-    header = 'CU Denver'
+    if shape == 'circle' or shape == 'oval':
+        hshift = 0.07
+    else:
+        hshift = 0.0
+
+    # top of the tag, smaller headers get a shorter tag hanging from the same place
+    if shift_up != 0.0:
+        tag_top = 0.875
+    else:
+        tag_top = 0.85
+
+    def header_tag_height(size):
+        return header_tag[1] * size / header_tag[0]
+
+    region = footer_region.get_patch_transform().transform_path(footer_region.get_path())
+
+    def inside(boxes):
+        # boxes are (x center, y center, half width, half height), centers in axes coordinates
+        # and sizes in inches, checks the box corners are all inside the footer region
+        corners = []
+        for x, y, half_w, half_h in boxes:
+            for dx in [-half_w, half_w]:
+                for dy in [-half_h, half_h]:
+                    corners.append([xlim[0] + (x + dx / fig_w) * (xlim[1] - xlim[0]),
+                                    ylim[0] + (y + dy / fig_h) * (ylim[1] - ylim[0])])
+        return region.contains_points(corners).all()
+
+    hwidth, hymin, hymax = text_extent(texts['header'])
+    def header_fits(size):
+        # keep clear of the left border, the tag is clipped so only the text itself matters
+        half_w = size * hwidth / 72 / 2
+        tag_height = header_tag_height(size)
+        return (1/3 + hshift - half_w / fig_w >= 0.14 and
+                inside([(1/3 + hshift, tag_top - (1 - header_tag[2]) * tag_height, half_w, 0)]))
+
+    # at most the same size as the 3:2 header
+    header_fsize = round(fit_size(header_fits, 10, header_tag[0]), 1)
+    tag_height = header_tag_height(header_fsize)
+    tag_width = 1/3 + hshift + header_fsize * hwidth / 72 / fig_w / 2 + pad / fig_w + hshift / 2
+
+    # -----------------------------------------
+    # footer
+    # -----------------------------------------
+    # lines are only 0.075 of the height apart at full size, so the biggest footers are the same
+    # as the hand tuned 3:2 (40pt) and banner (46pt, more space between lines) footers
+    full_size = 46 if is_banner(ratio) else footer_proportions[0]
+    if shift_up != 0.0:
+        main_lines = [texts['footer1a'], texts['footer1b']]
+    else:
+        main_lines = [texts['footer1']]
+    extents = [text_extent(text) for text in main_lines]
+
+    def footer_fits(size):
+        # vertical centers of the main footer lines, same as in add_text
+        footer_y, gap1, gap2, _ = footer_positions(ratio, shift_up, size)
+        centers = [footer_y - gap1 - i * gap2 for i in range(len(extents))]
+        # only the middle of the line height has to be inside, there is hardly any ink in the
+        # corners of the text box
+        return inside([(0.5, vdist, size * fwidth / 72 / 2 + margin,
+                        size * (fymax - fymin) / 72 / 4)
+                       for (fwidth, fymin, fymax), vdist in zip(extents, centers)])
+
+    footer_fsize1 = round(fit_size(footer_fits, 6, full_size), 1)
+    footer_y, gap1, gap2, gap3 = footer_positions(ratio, shift_up, footer_fsize1)
+
+    return {'hshift': hshift, 'tag_y0': tag_top - tag_height, 'tag_width': tag_width,
+            'tag_height': tag_height, 'header_fsize': header_fsize,
+            'footer_fsize1': footer_fsize1,
+            'footer_fsize2': round(footer_fsize1 / full_size * footer_proportions[1], 1),
+            'footer_fsize3': round(footer_fsize1 / full_size * footer_proportions[2], 1),
+            'footer_y': footer_y, 'footer_gap1': gap1, 'footer_gap2': gap2, 'footer_gap3': gap3}
+
+
+def text_layout(shape, ratio, shift_up, footer_region):
+    """
+    Sizes and positions of the header and footer text
+
+    The original ratios ('3:2', '5:4', '3:1', '1:1', in any form e.g. '1.5:1') use hand tuned
+    sizes, any other ratio is fitted with fit_text_layout.
+
+    Args:
+    ========
+      shape : str
+          shape of the logo
+      ratio : str
+          aspect ratio of the logo
+      shift_up : float
+          vertical shift of drawing
+      footer_region : mpatches patch object
+          region that footer text can use
+
+    Returns:
+    ========
+      layout : dict
+          hshift        - horizontal shift of the header text (axes coordinates)
+          tag_y0        - bottom of the header tag (axes coordinates)
+          tag_width     - width of the header tag (axes coordinates)
+          tag_height    - height of the header tag (axes coordinates)
+          header_fsize  - font size of the header
+          footer_fsize1 - font size of the main footer text
+          footer_fsize2 - font size of "Department of"
+          footer_fsize3 - font size of "Est. 1987"
+          footer_y      - center of "Department of" (axes coordinates)
+          footer_gap1, footer_gap2, footer_gap3 - gaps between the footer lines, see
+                          footer_positions
+    """
+    ratio = normalize_ratio(ratio)
+    if ratio not in ['3:2', '5:4', '3:1', '1:1']:
+        return fit_text_layout(shape, ratio, shift_up, footer_region)
 
     # for circular shapes, we shift the header text over a bit so it doesn't run into the border
     if shape == 'circle' or shape == 'oval':
@@ -153,26 +605,6 @@ def add_text(ax, shape, ratio, shift_up, popcorn_color, header_color1, header_co
             header_fsize = 44
         tag_width = 0.55 + hshift / 1.5
 
-    tag_height = 0.125
-    tag_x0 = 0.0
-
-    tag = ax.add_patch(plt.Rectangle((tag_x0,tag_y0), tag_width, tag_height,
-                       fill=True, color=header_color2, zorder=6, transform=ax.transAxes))
-    tag.set_clip_path(draw_region)
-
-    htext = plt.text(1/3+hshift, tag_y0+tag_height/2-0.01, header, fontproperties=prop,
-                     transform=ax.transAxes, size=header_fsize, zorder=8, color=header_color1,
-                     ha='center', va='center')
-
-    # -----------------------------------------
-    # footer
-    # -----------------------------------------
-    footer1 = 'Mathematical and Statistical Sciences'
-    footer1a = 'Mathematical and Statistical'
-    footer1b = 'Sciences'
-    footer2 = 'Department of'
-    footer3 = 'Est. 1987'
-
     if shape == 'circle' or shape == 'oval':
         ft_shift = 4
     else:
@@ -195,13 +627,95 @@ def add_text(ax, shape, ratio, shift_up, popcorn_color, header_color1, header_co
             footer_fsize1 = 40
     elif ratio == '3:1':
         footer_fsize1 = 46
-    footer_fsize2 = 19
-    footer_fsize3 = 17
-    
+
+    footer_y, gap1, gap2, gap3 = footer_positions(ratio, shift_up)
+    return {'hshift': hshift, 'tag_y0': tag_y0, 'tag_width': tag_width,
+            'tag_height': header_tag[1], 'header_fsize': header_fsize,
+            'footer_fsize1': footer_fsize1 - ft_shift,
+            'footer_fsize2': footer_proportions[1], 'footer_fsize3': footer_proportions[2],
+            'footer_y': footer_y, 'footer_gap1': gap1, 'footer_gap2': gap2, 'footer_gap3': gap3}
+
+
+def add_text(ax, shape, ratio, shift_up, popcorn_color, header_color1, header_color2,
+             footer_color1, footer_color2, draw_region, footer_region):
+    """
+    Adds the text and text elements (boxes, lines)
+
+    Note: This function is the worst - text boxes are not fun to work with in matplotlib because
+    they don't "snap to" the text inside them. Lots of magic numbers and eyeballing. Not very
+    modular and will need to be adjusted if any major changes (sizing, font sizing) are made.
+
+    Args:
+    ========
+    ax : plt axes object
+        used to add shapes to plot
+    shape : str
+        shape of the logo
+    ratio : str
+        aspect ratio of the logo
+    shift_up : float
+        vertical shift of drawing
+    popcorn_color : str
+        color of the ground/popcorn dots
+    header_color1 : str
+        color of the header text
+    header_color2 : str
+        color of the header tag
+    footer_color1 : str
+        color of footer text
+    footer_color2 : str
+        color of the footer lines/alt text
+    draw_region : mpatches patch object
+        draw region (inside borders)
+    footer_region : mpatches patch object
+        region that footer text can use
+    """
+    # -----------------------------------------
+    # header
+    # -----------------------------------------
+    header = texts['header']
+
+    bundled = bundled_geometry(shape, ratio)
+    if bundled is not None and bundled[1] == shift_up:
+        layout = bundled[2]
+    else:
+        layout = text_layout(shape, ratio, shift_up, footer_region)
+    hshift = layout['hshift']
+    tag_y0 = layout['tag_y0']
+    tag_width = layout['tag_width']
+    tag_height = layout['tag_height']
+    header_fsize = layout['header_fsize']
+
+    tag_x0 = 0.0
+
+    tag = ax.add_patch(plt.Rectangle((tag_x0,tag_y0), tag_width, tag_height,
+                       fill=True, color=header_color2, zorder=6, transform=ax.transAxes))
+    tag.set_clip_path(draw_region)
+
+    htext = plt.text(1/3+hshift, tag_y0+header_tag[2]*tag_height, header, fontproperties=prop,
+                     transform=ax.transAxes, size=header_fsize, zorder=8, color=header_color1,
+                     ha='center', va='center')
+
+    # -----------------------------------------
+    # footer
+    # -----------------------------------------
+    footer1 = texts['footer1']
+    footer1a = texts['footer1a']
+    footer1b = texts['footer1b']
+    footer2 = texts['footer2']
+    footer3 = texts['footer3']
+
+    footer_fsize1 = layout['footer_fsize1']
+    footer_fsize2 = layout['footer_fsize2']
+    footer_fsize3 = layout['footer_fsize3']
+    gap1 = layout['footer_gap1']
+    gap2 = layout['footer_gap2']
+    gap3 = layout['footer_gap3']
+
     # for the shifted-up versions, the footer is split into two lines
     if shift_up != 0.0:
         # "Department of" and line
-        vdist = 0.35
+        vdist = layout['footer_y']
         vdist_data = vdist*(y_len+border_width_y*2)+y_min-border_width_y
         plt.text(0.5, vdist, footer2, fontproperties=prop, size=footer_fsize2, zorder=8,
                  color=footer_color2, va='center', ha='center', transform=ax.transAxes,
@@ -209,14 +723,14 @@ def add_text(ax, shape, ratio, shift_up, popcorn_color, header_color1, header_co
         line = plt.plot([0.0,1.0], [vdist_data, vdist_data],
                         color=footer_color2, zorder=8, linewidth=2)
         line[0].set_clip_path(footer_region)
-        vdist = vdist - 0.075
-        plt.text(0.5, vdist, footer1a, fontproperties=prop, size=(footer_fsize1-ft_shift),
+        vdist = vdist - gap1
+        plt.text(0.5, vdist, footer1a, fontproperties=prop, size=footer_fsize1,
                  zorder=8, color=footer_color1, ha='center', va='center', transform=ax.transAxes)
-        vdist = vdist - 0.08
-        plt.text(0.5, vdist, footer1b, fontproperties=prop, size=(footer_fsize1-ft_shift),
+        vdist = vdist - gap2
+        plt.text(0.5, vdist, footer1b, fontproperties=prop, size=footer_fsize1,
                  zorder=8, color=footer_color1, ha='center', va='center', transform=ax.transAxes)
         # "Est" and line
-        vdist = vdist - 0.075
+        vdist = vdist - gap3
         vdist_data = vdist*(y_len+border_width_y*2)+y_min-border_width_y
         plt.text(0.5, vdist, footer3, fontproperties=prop, size=(footer_fsize3), zorder=8,
                  color=footer_color2, va='center', ha='center', transform=ax.transAxes,
@@ -225,10 +739,8 @@ def add_text(ax, shape, ratio, shift_up, popcorn_color, header_color1, header_co
                         color=footer_color2, zorder=8, linewidth=2)
         line[0].set_clip_path(footer_region)
     else:
-        # need to shift down a little for banner size
-        vshift = -0.01 if ratio == '3:1' else 0.0
-        # "Department of" and line
-        vdist = 0.29 + vshift
+        # "Department of" and line (banners are shifted down a little, see footer_positions)
+        vdist = layout['footer_y']
         vdist_data = vdist*(y_len+border_width_y*2)+y_min-border_width_y
         plt.text(0.5, vdist, footer2, fontproperties=prop, size=footer_fsize2, zorder=8,
                  color=footer_color2, va='center', ha='center', transform=ax.transAxes,
@@ -237,12 +749,12 @@ def add_text(ax, shape, ratio, shift_up, popcorn_color, header_color1, header_co
                         color=footer_color2, zorder=8, linewidth=2)
         line[0].set_clip_path(footer_region)
         # main part of footer
-        vdist = vdist - 0.078 + vshift
-        ftext = plt.text(0.5, vdist, footer1, fontproperties=prop, size=(footer_fsize1-ft_shift),
+        vdist = vdist - gap1
+        ftext = plt.text(0.5, vdist, footer1, fontproperties=prop, size=footer_fsize1,
                          zorder=8, color=footer_color1, ha='center', va='center',
                          transform=ax.transAxes)
         # "Est" and line
-        vdist = vdist - 0.075 + vshift
+        vdist = vdist - gap3
         vdist_data = vdist*(y_len+border_width_y*2)+y_min-border_width_y
         plt.text(0.5, vdist, footer3, fontproperties=prop, size=footer_fsize3, zorder=8,
                  color=footer_color2, va='center', ha='center', transform=ax.transAxes,
@@ -251,108 +763,488 @@ def add_text(ax, shape, ratio, shift_up, popcorn_color, header_color1, header_co
         line[0].set_clip_path(footer_region)
 
 
-def draw_sky(ax, shift_up, color, draw_region):
+def sky_edges(n, shift_up):
     """
-    Draws the sky
+    Utility function for the edges of the sky stripes
 
     Args:
     ========
-    ax : plt axes object
-        used to add shapes to plot
-    shift_up : float
-        vertical shift of drawing
-    color : str or list of strings
-        hex color(s) or other string color(s) defining the colors in the sky
-        if list of strings will be striped from first element at top to last element at bottom
-    draw_region : mpatches patch object
-        draw region (inside borders)
+      n : int
+          number of stripes
+      shift_up : float
+          vertical shift of drawing
+
+    Returns:
+    ========
+      edges : np.array
+          n+1 stripe edges in axes coordinates (0 bottom, 1 top), from the top down
     """
-    if type(color) == str:
-        sky = [color]
-    else:
-        sky = color
-
-    # some adjustments depending on the number of colors. B/c the sky doesn't end at exactly 0,
-    # looks better to adjust the heights of the stripes depending on the number.
-    if len(sky) == 1:
-        denom = len(sky)
-        sky = ax.add_patch(plt.Rectangle((0.0,0.0), 1.0, 1.0,
-                                         facecolor=sky[0], transform=ax.transAxes, zorder=0))
-        sky.set_clip_path(draw_region)
-    elif len(sky) < 4:
-        denom = len(sky) + 0.9 # adjust this number for number of stripes
-        height = (1 - shift_up) / denom
-        for count, color in enumerate(sky):
-            sky = ax.add_patch(plt.Rectangle((0.0, 1-(count+1)*height), 1.0, height,
-                                             facecolor=color, transform=ax.transAxes, zorder=0))
-            sky.set_clip_path(draw_region)
-    elif len(sky) < 6:
-        denom = len(sky) + 1.9 # adjust this number for number of stripes
-        height = (1 - shift_up) / denom
-        for count, color in enumerate(sky):
-            sky = ax.add_patch(plt.Rectangle((0.0, 1-(count+1)*height), 1.0, height,
-                                             facecolor=color, transform=ax.transAxes, zorder=0))
-            sky.set_clip_path(draw_region)
-    else:
-        denom = len(sky) + 2.5
-        height = (1 - shift_up) / denom # adjust this number for number of stripes
-        for count, color in enumerate(sky):
-            sky = ax.add_patch(plt.Rectangle((0.0, 1-(count+1)*height), 1.0, height,
-                                             facecolor=color, transform=ax.transAxes, zorder=0))
-            sky.set_clip_path(draw_region)
+    if n == 1:
+        return np.array([1.0, 0.0])
+
+    # B/c the sky doesn't end at exactly 0, looks better to adjust the heights of the stripes
+    # depending on the number
+    for max_stripes, pad in sky_stripe_pads:
+        if n <= max_stripes:
+            break
+    height = (1 - shift_up) / (n + pad)
+    return 1 - np.arange(n + 1) * height
 
 
-def draw_popcorn(ax, ratio, shift_up, color, marker, draw_region):
+def sky_image(sky, shift_up, height=sky_gradient_rows):
     """
-    Draws the dots for the popcorn function
+    Makes (or gets from the cache) the sky gradient as a small single column RGBA image
+
+    The gradient blends between the colors, which are at the middle of where their stripes would
+    be. The image only covers the sky (top of the logo to the bottom of the last stripe), so it is
+    opaque, and is stretched across the width and down the height of the sky when it is drawn.
 
     Args:
     ========
-    ax : plt axes object
-        used to add shapes to plot
-    ratio : str
-        aspect ratio of the logo
-    shift_up : float
-        vertical shift of drawing
-    color : str
-        hex color or other string color defining the color of the dots
-    marker : str
-        marker to use for popcorn, only tested for '*' and 'o'
+      sky : list of str
+          colors of the sky, top to bottom
+      shift_up : float
+          vertical shift of drawing
+      height : int, default=sky_gradient_rows
+          height of the image in pixels
+
+    Returns:
+    ========
+      rgba : np.array(uint8)
+          (height, 1, 4) image, top row first
+    """
+    key = (tuple(sky), shift_up, height)
+    if key in sky_images:
+        return sky_images[key]
+
+    edges = sky_edges(len(sky), shift_up)
+    colors = mcolors.to_rgba_array(sky)
+    y = edges[0] - (np.arange(height) + 0.5) / height * (edges[0] - edges[-1]) # row centers
+    stops = (edges[:-1] + edges[1:]) / 2
+
+    rgba = np.zeros((height, 1, 4))
+    for i in range(4):
+        rgba[:, 0, i] = np.interp(-y, -stops, colors[:, i])
+    rgba = np.round(rgba * 255).astype(np.uint8)
+
+    sky_images[key] = rgba
+    return rgba
+
+
+def draw_sky(ax, shift_up, color, draw_region, mode='stripes'):
+    """
+    Draws the sky, as one collection of stripes (or an image, for a gradient)
+
+    Args:
+    ========
+    ax : plt axes object
+        used to add shapes to plot
+    shift_up : float
+        vertical shift of drawing
+    color : str or list of strings
+        hex color(s) or other string color(s) defining the colors in the sky
+        if list of strings will be striped from first element at top to last element at bottom
     draw_region : mpatches patch object
         draw region (inside borders)
+    mode : str, default='stripes'
+        'stripes' for a stripe per color, or 'gradient' for a smooth vertical gradient
+
+    Returns:
+    ========
+      sky : matplotlib PolyCollection or AxesImage
+          stripes of the sky, top to bottom (use set_facecolor to change them), or the
+          gradient image
+    """
+    if type(color) == str:
+        color = [color]
+
+    edges = sky_edges(len(color), shift_up)
+    if mode == 'gradient' and len(color) > 1:
+        # a small image, drawn at its own size by vector backends ('none')
+        sky = ax.imshow(sky_image(color, shift_up), extent=(0, 1, edges[-1], 1),
+                        transform=ax.transAxes, origin='upper', interpolation='none',
+                        aspect='auto', zorder=0)
+    else:
+        stripes = [[(0, top), (1, top), (1, bottom), (0, bottom)]
+                   for top, bottom in zip(edges[:-1], edges[1:])]
+        sky = PolyCollection(stripes, closed=True, facecolors=color, edgecolors='none',
+                             transform=ax.transAxes, zorder=0)
+        ax.add_collection(sky, autolim=False)
+    sky.set_clip_path(draw_region)
+
+    return sky
+
+
+def pixel_scale(ratio, dpi):
+    """
+    Utility function for the number of output pixels per unit in x and y
+
+    Args:
+    ========
+      ratio : str
+          aspect ratio of the logo
+      dpi : int
+          dots-per-inch of the output
+    """
+    # figure is always 6 inches tall, see set_limits
+    w, h = parse_ratio(ratio)
+    xlim, ylim = get_limits(ratio)
+    return 6 * w / h * dpi / (xlim[1] - xlim[0]), 6 * dpi / (ylim[1] - ylim[0])
+
+
+def marker_size(marker, dpi):
+    """
+    Utility function for the popcorn marker size (points^2), from how many pixels across the
+    dots come out at, they are made bigger if they would be less than min_marker_px across
+
+    Args:
+    ========
+      marker : str
+          marker to use for popcorn
+      dpi : int or None
+          dots-per-inch of the output, None for vector output (no pixels)
     """
     s = 60 if marker == '*' else 50 # stars look better bigger
+    if dpi is None:
+        return s
+    px = np.sqrt(s) / 72 * dpi # diameter in output pixels
+    return s if px >= min_marker_px else (min_marker_px * 72 / dpi)**2
 
-    if ratio == '3:1':
-        scale_factor = 0.75 # resize mountains so they are not too wide and flat
-        # looks better to have a line of dots instead of a straight line at sky edge
-        x = np.linspace(0, 1, 250)
-        dots = ax.scatter(x, np.zeros(len(x))+0.01, color=color, s=s, zorder=5, marker=marker)
-        dots.set_clip_path(draw_region)
-    else:
-        scale_factor = 1.0
 
-    x, y = popcorn(110)
+def auto_depth(ratio, marker, dpi, min_px=0.5):
+    """
+    Depth of the popcorn function for the output size, see popcorn_points
+
+    Args:
+    ========
+      ratio : str
+          aspect ratio of the logo
+      marker : str
+          marker to use for popcorn
+      dpi : int or None
+          dots-per-inch of the output, None for vector output (baseline_depth)
+      min_px : float
+          smallest visible detail, in output pixels
+
+    Returns:
+    ========
+      depth : int
+          baseline_depth, scaled up with the size of outputs bigger than baseline_output, as far
+          as the deeper rows still poke out of the ground (a marker size's worth), and fewer if
+          the deeper rows can't be seen at this size
+    """
+    if dpi is None:
+        return baseline_depth
+
+    px_x, px_y = pixel_scale(ratio, dpi)
+    xlim, ylim = get_limits(ratio)
+    radius = np.sqrt(marker_size(marker, dpi)) / 2 * dpi / 72 / px_y
+    ground = 0.01 # ground covers this much above the bottom of the dots, see draw_popcorn
+
+    # deepest row that pokes out of the ground, the right mountain isn't shrunk so it's
+    # the one that pokes out the most
+    lowest = ground - radius + min_px / px_y
+    depth = int(1 / lowest) if lowest > 0 else np.inf
+    # for tiny outputs every row pokes out, but there's no point having more dots than
+    # a few per pixel
+    depth = min(depth, int(np.sqrt(8 * px_x * (xlim[1] - xlim[0]) * px_y * (ylim[1] - ylim[0]))))
+
+    # the baseline is tuned for the default output, bigger ones (higher dpi or wider) get more
+    # rows in proportion to their size in pixels
+    height, width = canvas_size(ratio, dpi)
+    base_height, base_width = canvas_size(*baseline_output)
+    scale = max(np.sqrt(height * width / (base_height * base_width)), 1.0)
+    return max(min(depth, int(baseline_depth * scale)), 2)
+
+
+def popcorn_points(ratio, shift_up, marker='o', dpi=1200, depth='auto', min_px=0.5):
+    """
+    Creates the popcorn function dots, with a level of detail that depends on the output size
+
+    The deeper rows of dots sit mostly inside the ground, only poking out a little bit. With
+    depth='auto' the depth comes from auto_depth: baseline_depth for the default output, deeper
+    for bigger outputs as long as the rows still poke out of the ground. Dots that don't poke
+    out at least min_px pixels are dropped, and dots within min_px pixels of a dot that is already
+    drawn are merged into it, so the number of dots scales with what can actually be seen.
+    Vector output (dpi=None) has no pixels, so it gets every dot to baseline_depth.
+
+    Args:
+    ========
+      ratio : str
+          aspect ratio of the logo
+      shift_up : float
+          vertical shift of drawing
+      marker : str
+          marker to use for popcorn, only tested for '*' and 'o'
+      dpi : int or None
+          dots-per-inch of the output, None for vector output
+      depth : int or 'auto'
+          depth of the popcorn function, 'auto' picks the depth from the output size
+      min_px : float
+          smallest visible detail, in output pixels
+
+    Returns:
+    ========
+      x, y : np.array(float)
+          positions of the dots, in plot coordinates
+      q : np.array(int)
+          depth (denominator) of each dot
+      s : float
+          marker size (points^2)
+    """
+    s = marker_size(marker, dpi)
+    scale_factor = 0.75 if is_banner(ratio) else 1.0
+
+    if depth == 'auto':
+        depth = auto_depth(ratio, marker, dpi, min_px)
+
+    x, y = popcorn(depth)
+    q = np.round(1 / y).astype(int)
     y[(x <= (x_max - x_min) / 2)] = y[(x <= (x_max - x_min) / 2)] * shrink
 
     # note: we don't plot the top middle dot since it doesn't become a part of either mountain
-    dots = ax.scatter(scalex(x[1:],scale_factor), y[1:]+shift_up,
-                      color=color, s=s, zorder=5, marker=marker)
+    x = scalex(x[1:], scale_factor)
+    y = y[1:] + shift_up
+    q = q[1:]
+    if dpi is None:
+        return x, y, q, s
+
+    px_x, px_y = pixel_scale(ratio, dpi)
+    radius = np.sqrt(s) / 2 * dpi / 72 / px_y
+    ground = 0.01 # ground covers this much above the bottom of the dots, see draw_popcorn
+
+    # drop dots that are (nearly) covered up by the ground
+    visible = (y - shift_up + radius - ground) * px_y >= min_px
+    x, y, q = x[visible], y[visible], q[visible]
+
+    # merge dots that land in the same min_px sized cell, keeping the first (highest) one
+    cells = np.stack([np.floor(x * px_x / min_px), np.floor(y * px_y / min_px)], axis=1)
+    _, first = np.unique(cells, axis=0, return_index=True)
+    first = np.sort(first)
+
+    return x[first], y[first], q[first], s
+
+
+def marker_kernel(marker, s, dpi, supersample=4):
+    """
+    Rasterizes a single popcorn marker into an anti-aliased coverage kernel
+
+    Args:
+    ========
+      marker : str
+          marker to use for popcorn
+      s : float
+          marker size (points^2), same as for scatter
+      dpi : int
+          dots-per-inch of the output
+      supersample : int
+          samples per pixel in x and y
+
+    Returns:
+    ========
+      kernel : np.array(float32)
+          coverage (0-1) of each pixel, marker centered on the middle pixel
+    """
+    style = MarkerStyle(marker)
+    size = np.sqrt(s) * dpi / 72 # pixels
+    path = style.get_path().transformed(style.get_transform().scale(size))
+    half = int(np.ceil(np.abs(path.vertices).max())) + 1
+
+    # sample points inside each pixel, pixel centers are at whole numbers
+    offsets = (np.arange(supersample) + 0.5) / supersample - 0.5
+    coords = (np.arange(-half, half + 1)[:, None] + offsets[None, :]).ravel()
+    xx, yy = np.meshgrid(coords, coords)
+    inside = path.contains_points(np.stack([xx.ravel(), yy.ravel()], axis=1))
+    inside = inside.reshape(len(coords), len(coords))[::-1] # rows go down in the image
+    n = 2 * half + 1
+    return inside.reshape(n, supersample, n, supersample).mean(axis=(1, 3)).astype(np.float32)
+
+
+def convolve_tiled(grid, kernel, tile=1024):
+    """
+    Convolves a big (mostly empty) grid with a small kernel, one tile at a time with FFTs
+
+    Empty tiles are skipped, and only one tile's FFT is in memory at a time.
+
+    Args:
+    ========
+      grid : np.array
+          2D array to convolve
+      kernel : np.array
+          2D kernel, with odd dimensions and centered on the middle pixel
+      tile : int
+          size of the tiles
+
+    Returns:
+    ========
+      out : np.array(float32)
+          the convolution, same shape as grid
+    """
+    out = np.zeros(grid.shape, dtype=np.float32)
+    kh, kw = kernel.shape
+    shape = (tile + kh - 1, tile + kw - 1)
+    kernel_fft = np.fft.rfft2(kernel, shape)
+    for ty in range(0, grid.shape[0], tile):
+        for tx in range(0, grid.shape[1], tile):
+            sub = grid[ty:ty+tile, tx:tx+tile]
+            if not sub.any():
+                continue
+            conv = np.fft.irfft2(np.fft.rfft2(sub, shape) * kernel_fft, shape)
+            conv = conv[:sub.shape[0] + kh - 1, :sub.shape[1] + kw - 1]
+            # full convolution starts half a kernel up and left of the tile
+            y0 = ty - kh // 2
+            x0 = tx - kw // 2
+            cy0 = max(0, -y0)
+            cx0 = max(0, -x0)
+            y1 = min(grid.shape[0], y0 + conv.shape[0])
+            x1 = min(grid.shape[1], x0 + conv.shape[1])
+            out[y0+cy0:y1, x0+cx0:x1] += conv[cy0:y1-y0, cx0:x1-x0]
+    return out
+
+
+def draw_popcorn_raster(ax, ratio, shift_up, color, marker, draw_region, dpi=1200, depth='auto',
+                        chunk_size=2**20):
+    """
+    Draws the dots for the popcorn function as a single image, for very deep popcorn functions
+
+    Points are streamed in chunks (see popcorn_chunks) and binned straight into an output pixel
+    sized occupancy grid, which is then convolved with the rasterized marker. Memory depends on
+    the output size and chunk size, not on the depth, so the depth can be in the thousands.
+
+    Args:
+    ========
+    ax : plt axes object
+        used to add shapes to plot
+    ratio : str
+        aspect ratio of the logo
+    shift_up : float
+        vertical shift of drawing
+    color : str
+        hex color or other string color defining the color of the dots
+    marker : str
+        marker to use for popcorn, only tested for '*' and 'o'
+    draw_region : mpatches patch object
+        draw region (inside borders)
+    dpi : int
+        dots-per-inch of the output, the image is made at exactly this resolution
+    depth : int or 'auto'
+        depth of the popcorn function, 'auto' picks the depth from the output size
+    chunk_size : int
+        number of points binned at a time
+
+    Returns:
+    ========
+      dots : plt AxesImage object
+          image of the popcorn function dots
+    """
+    if depth == 'auto':
+        depth = auto_depth(ratio, marker, dpi)
+    scale_factor = 0.75 if is_banner(ratio) else 1.0
+
+    s = marker_size(marker, dpi)
+    kernel = marker_kernel(marker, s, dpi)
+    px_x, px_y = pixel_scale(ratio, dpi)
+    xlim, ylim = get_limits(ratio)
+    radius = (kernel.shape[0] // 2) / px_y
+    ground = 0.01 + shift_up # top of the ground, see draw_popcorn
+
+    # only the band between the ground and the top dot needs to be an image, the ground
+    # covers everything below it
+    band = (ground - radius, 0.5 + shift_up + radius)
+    width = int(round((xlim[1] - xlim[0]) * px_x))
+    height = int(np.ceil((band[1] - band[0]) * px_y))
+    band = (band[1] - height / px_y, band[1])
+
+    grid = np.zeros((height, width), dtype=np.float32)
+    first = True
+    for x, y in popcorn_chunks(depth, chunk_size):
+        y[(x <= (x_max - x_min) / 2)] = y[(x <= (x_max - x_min) / 2)] * shrink
+        if first:
+            # note: we don't plot the top middle dot since it doesn't become a part of either mountain
+            x, y = x[1:], y[1:]
+            first = False
+        x = scalex(x, scale_factor)
+        y = y + shift_up
+        keep = y >= band[0]
+        cols = np.floor((x[keep] - xlim[0]) * px_x).astype(np.int64)
+        rows = np.floor((band[1] - y[keep]) * px_y).astype(np.int64)
+        grid[np.clip(rows, 0, height - 1), np.clip(cols, 0, width - 1)] = 1
+
+    coverage = np.clip(convolve_tiled(grid, kernel), 0, 1)
+    del grid
+
+    rgba = np.empty((height, width, 4), dtype=np.uint8)
+    rgba[:, :, :3] = np.round(np.array(mcolors.to_rgb(color)) * 255).astype(np.uint8)
+    rgba[:, :, 3] = np.round(coverage * 255 * mcolors.to_rgba(color)[3]).astype(np.uint8)
+    del coverage
+
+    dots = ax.imshow(rgba, extent=(xlim[0], xlim[1], band[0], band[1]), origin='upper',
+                     interpolation='nearest', aspect='auto', zorder=5)
     dots.set_clip_path(draw_region)
 
+    return dots
+
+
+def draw_popcorn(ax, ratio, shift_up, color, marker, draw_region, dpi=1200, depth='auto',
+                 mode='scatter'):
+    """
+    Draws the dots for the popcorn function
+
+    Args:
+    ========
+    ax : plt axes object
+        used to add shapes to plot
+    ratio : str
+        aspect ratio of the logo
+    shift_up : float
+        vertical shift of drawing
+    color : str
+        hex color or other string color defining the color of the dots
+    marker : str
+        marker to use for popcorn, only tested for '*' and 'o'
+    draw_region : mpatches patch object
+        draw region (inside borders)
+    dpi : int or None
+        dots-per-inch of the output, sets the level of detail (see popcorn_points), None for
+        vector output ('scatter' only)
+    depth : int or 'auto'
+        depth of the popcorn function, 'auto' picks the depth from the output size
+    mode : str
+        'scatter' draws every dot, 'raster' draws the dots as a single image (for very deep
+        popcorn functions, see draw_popcorn_raster)
+
+    Returns:
+    ========
+      dots : plt PathCollection or AxesImage object
+          the popcorn function dots (not including the banner line of dots)
+    """
+    s = marker_size(marker, dpi)
+
+    if is_banner(ratio):
+        # looks better to have a line of dots instead of a straight line at sky edge
+        xx = np.linspace(0, 1, 250)
+        line = ax.scatter(xx, np.zeros(len(xx))+0.01, color=color, s=s, zorder=5, marker=marker)
+        line.set_clip_path(draw_region)
+
+    if mode == 'raster':
+        dots = draw_popcorn_raster(ax, ratio, shift_up, color, marker, draw_region, dpi, depth)
+    else:
+        x, y, q, s = popcorn_points(ratio, shift_up, marker, dpi, depth)
+        dots = ax.scatter(x, y, color=color, s=s, zorder=5, marker=marker)
+        dots.set_clip_path(draw_region)
+
     # fill area below, add extra bit (0.01) to the height to cover gap between dots and ground
     dots_patch = ax.add_patch(mpatches.Rectangle((x_min,y_min), x_max-x_min,
                                                  np.abs(y_min)+0.01+shift_up,
                                                  fill=True, color=color, linewidth=2, zorder=5))
     dots_patch.set_clip_path(draw_region)
 
+    return dots
+
 
 def draw_mountains(ax, ratio, shift_up, color_1, color_2, draw_region):
     """
-    Draws the mountains
-
-    Note: a lot of "magic" numbers here, but all correspond to a popcorn function point.
-    Can be changed to change shape/shading of mountains
+    Draws the mountains, one collection per group in mountain_groups
 
     Args:
     ========
@@ -368,99 +1260,82 @@ def draw_mountains(ax, ratio, shift_up, color_1, color_2, draw_region):
         hex color or other string color defining the inner/snow color of mountains
     draw_region : mpatches patch object
         draw region (inside borders)
+
+    Returns:
+    ========
+      collections : list of matplotlib collections
+          line and polygon collections, in the order of mountain_groups
     """
-    if ratio == '3:1':
+    if is_banner(ratio):
         scale_factor = 0.75
     else:
         scale_factor = 1.0
 
-    # right mountain
-    mp = plt.plot([scalex(0.5,scale_factor),scalex(2/3,scale_factor)], [0+shift_up,1/3+shift_up],
-                  color=color_1, zorder=4, linewidth=3)
-    mp[0].set_clip_path(draw_region)
-    mountain = ax.add_patch(plt.Polygon([[scalex(2/3,scale_factor),1/3+shift_up],
-                                         [scalex(4/6,scale_factor),1/6+shift_up],
-                                         [scalex(1,scale_factor),0+shift_up]
-                                        ], closed=True, fill=True, color=color_1, zorder=4))
-    mountain.set_clip_path(draw_region)
-    mountain = ax.add_patch(plt.Polygon([[scalex(5/8,scale_factor),1/8+shift_up],
-                                         [scalex(4/6,scale_factor),1/6+shift_up],
-                                         [scalex(2/3,scale_factor),1/3+shift_up]
-                                        ], closed=True, fill=True, color=color_1, zorder=4))
-    mountain.set_clip_path(draw_region)
-    mountain = ax.add_patch(plt.Polygon([[scalex(1/2,scale_factor),0+shift_up],
-                                         [scalex(21/40,scale_factor),1/40+shift_up],
-                                         [scalex(2/3,scale_factor),1/3+shift_up]
-                                        ], closed=True, fill=True, color=color_1, zorder=4))
-    mountain.set_clip_path(draw_region)
-    mountain = ax.add_patch(plt.Polygon([[scalex(1/2,scale_factor),0+shift_up],
-                                         [scalex(2/3,scale_factor),1/3+shift_up],
-                                         [scalex(1,scale_factor),0+shift_up]
-                                        ], closed=True, fill=True, color=color_2, zorder=3))
-    mountain.set_clip_path(draw_region)
+    # scale and shift all the vertices at once, then split them back up into shapes
+    xy = np.column_stack([scalex(mountain_vertices[:, 0], scale_factor),
+                          mountain_vertices[:, 1] * mountain_yscale + shift_up])
+    shapes = np.split(xy, np.cumsum(mountain_lengths)[:-1])
+
+    colors = {'edge': color_1, 'snow': color_2}
+    collections = []
+    for kind, zorder, color, _, group in mountain_groups:
+        verts, shapes = shapes[:len(group)], shapes[len(group):]
+        if kind == 'line':
+            collection = LineCollection(verts, colors=colors[color], linewidths=3,
+                                        capstyle='projecting', zorder=zorder)
+        else:
+            collection = PolyCollection(verts, closed=True, facecolors=colors[color],
+                                        edgecolors=colors[color], linewidths=1.0,
+                                        joinstyle='miter', zorder=zorder)
+        ax.add_collection(collection)
+        collection.set_clip_path(draw_region)
+        collections.append(collection)
 
-    # left mountain
-    mp = plt.plot([scalex(0,scale_factor),scalex(1/3,scale_factor)],
-                  [0+shift_up,1/3*shrink+shift_up],
-                  color=color_1, zorder=2, linewidth=3)
-    mp[0].set_clip_path(draw_region)
-    mp = plt.plot([scalex(1/3,scale_factor),scalex(3/5,scale_factor)],
-                  [1/3*shrink+shift_up,1/5*shrink+shift_up],
-                  color=color_1, zorder=2, linewidth=3)
-    mp[0].set_clip_path(draw_region)
-    mountain = ax.add_patch(plt.Polygon([[scalex(1/3,scale_factor),1/3*shrink+shift_up],
-                                         [scalex(1/2,scale_factor),0+shift_up],
-                                         [scalex(3/5,scale_factor),1/5*shrink+shift_up]
-                                        ], closed=True, fill=True, color=color_1, zorder=2))
-    mountain.set_clip_path(draw_region)
-    mountain = ax.add_patch(plt.Polygon([[scalex(1/3,scale_factor),1/3*shrink+shift_up],
-                                         [scalex(2/7,scale_factor),1/7*shrink+shift_up],
-                                         [scalex(2/5,scale_factor),1/5*shrink+shift_up]
-                                        ], closed=True, fill=True, color=color_1, zorder=2))
-    mountain.set_clip_path(draw_region)
-    mountain = ax.add_patch(plt.Polygon([[scalex(2/6,scale_factor),1/6*shrink+shift_up],
-                                         [scalex(5/15,scale_factor),1/15*shrink+shift_up],
-                                         [scalex(4/9,scale_factor),1/9*shrink+shift_up],
-                                         [scalex(2/5,scale_factor),1/5*shrink+shift_up]
-                                        ], closed=True, fill=True, color=color_1, zorder=2))
-    mountain.set_clip_path(draw_region)
-    mountain = ax.add_patch(plt.Polygon([[scalex(1/3,scale_factor),1/3*shrink+shift_up],
-                                         [scalex(0/15,scale_factor),0/15*shrink+shift_up],
-                                         [scalex(2/30,scale_factor),1/30*shrink+shift_up]
-                                        ], closed=True, fill=True, color=color_1, zorder=2))
-    mountain.set_clip_path(draw_region)
-    mountain = ax.add_patch(plt.Polygon([[scalex(0,scale_factor),0+shift_up],
-                                         [scalex(1/3,scale_factor),1/3*shrink+shift_up],
-                                         [scalex(1/2,scale_factor),0+shift_up]
-                                        ], closed=True, fill=True, color=color_2, zorder=1))
-    mountain.set_clip_path(draw_region)
+    return collections
 
 
-def background_shapes(ax, shape, ratio, color_border1, color_border2):
-    """Creates the background shapes
-    The background shapes define the borders of the logo
+def patch_path(patch):
+    """
+    Utility function for the outline of a patch in data coordinates
+    """
+    return patch.get_patch_transform().transform_path(patch.get_path())
+
+
+def between_path(xx, y1, y2):
+    """
+    Utility function for the outline of the area between two curves, like plt.fill_between
+    """
+    vertices = np.concatenate([np.column_stack([xx, y1]), np.column_stack([xx[::-1], y2[::-1]]),
+                               [[xx[0], y1[0]]]])
+    codes = np.full(len(vertices), Path.LINETO, dtype=Path.code_type)
+    codes[0] = Path.MOVETO
+    codes[-1] = Path.CLOSEPOLY
+    return Path(vertices, codes)
+
+
+def border_paths(shape, ratio):
+    """
+    Computes the outlines of the background shapes (see background_shapes)
 
     Args:
     ========
-    ax : plt axes object
-        used to add shapes to plot
-    shape : str
-        defines the shape of the logo
-    ratio : str
-        aspect ratio of the logo
-    color_border1 : str
-        hex color or other string color defining the border color
-    color_border2 : str
-        hex color or other string color defining the contrasting border color
+      shape : str
+          shape of the logo
+      ratio : str
+          aspect ratio of the logo
+
+    Returns:
+    ========
+      paths : dict of Path
+          outlines in data coordinates
+          footer  - region that footer text can use, cuts the footer off at horizontal edges
+          draw    - region inside the border
+          border1 - first inner border
+          border2 - second (contrasting color) border
+          border3 - final outside border
     """
-    if ratio == '3:2':
-        scale_x_bw = 2 / 3
-    elif ratio == '5:4':
-        scale_x_bw = 4 / 5
-    elif ratio == '3:1':
-        scale_x_bw = 1 / 3
-    else:
-        scale_x_bw = 1 # 1:1 case
+    w, h = parse_ratio(ratio)
+    scale_x_bw = h / w
 
     width_x = (border_width_x - inn_border_width_x) / 2
     width_y = (border_width_y - inn_border_width_y) / 2
@@ -470,302 +1345,1037 @@ def background_shapes(ax, shape, ratio, color_border1, color_border2):
     sborder_width_x = border_width_x*scale_x_bw
 
     if shape == 'circle' or shape == 'oval':
-        # defines an extra patch to cut the footer off at horizontal edges
-        footer_region = ax.add_patch(mpatches.Ellipse((x_mid, y_mid),
-                                                      x_len-4*swidth_x, y_len-2*width_y,
-                                                      fill=False, color='#FFFFFF', alpha=0.0))
-        # defines the region inside the border
-        draw_region = ax.add_patch(mpatches.Ellipse((x_mid, y_mid),
-                                                    x_len, y_len,
-                                                    fill=False, linewidth=2,
-                                                    color=color_border1, zorder=10))
-        # first inner border
-        border1_region = ax.add_patch(mpatches.Ellipse((x_mid, y_mid),
-                                                       x_len+2*swidth_x, y_len+2*width_y,
-                                                       fill=True, color=color_border1, zorder=0))
-        # second (contrasting color) border
-        border2_region = ax.add_patch(mpatches.Ellipse((x_mid, y_mid),
+        return {'footer': patch_path(mpatches.Ellipse((x_mid, y_mid),
+                                                      x_len-4*swidth_x, y_len-2*width_y)),
+                'draw': patch_path(mpatches.Ellipse((x_mid, y_mid), x_len, y_len)),
+                'border1': patch_path(mpatches.Ellipse((x_mid, y_mid),
+                                                       x_len+2*swidth_x, y_len+2*width_y)),
+                'border2': patch_path(mpatches.Ellipse((x_mid, y_mid),
                                                        x_len+2*swidth_x+2*sinn_border_width_x,
-                                                       y_len+2*width_y+2*inn_border_width_y,
-                                                       fill=True, color=color_border2, zorder=-1))
-        # final outside border
-        border3_region = ax.add_patch(mpatches.Ellipse((x_mid, y_mid),
+                                                       y_len+2*width_y+2*inn_border_width_y)),
+                'border3': patch_path(mpatches.Ellipse((x_mid, y_mid),
                                                        x_len+2*sborder_width_x,
-                                                       y_len+2*border_width_y,
-                                                       fill=True, color=color_border1, zorder=-2))
+                                                       y_len+2*border_width_y))}
     elif shape == 'rectangle' or shape == 'square':
-        
-        # defines an extra patch to cut the footer off at horizontal edges
         fx_low = x_min+2*swidth_x
         fx_len = x_len-4*swidth_x
-        if ratio == '3:1':
+        if is_banner(ratio):
             fx_len = scalex((fx_low+fx_len), 0.85)
             fx_low = scalex(fx_low, 0.85)
-            #fx_len = (((fx_low+fx_len)-0.5)*0.85 + 0.5)
-            #fx_low = (fx_low-0.5)*0.85 + 0.5
             fx_len = fx_len - fx_low
-        else:
-            fx_low = x_min+2*swidth_x
-            fx_len = x_len-4*swidth_x
-            
-        footer_region = ax.add_patch(mpatches.Rectangle((fx_low, y_min+width_y),
-                                                        fx_len, y_len-2*width_y,
-                                                        fill=False, color='#FFFFFF', alpha=0.0))
-        # defines the region inside the border
-        draw_region = ax.add_patch(mpatches.Rectangle((x_min, y_min),
-                                                      x_len, y_len,
-                                                      color=color_border1, fill=False,
-                                                      zorder=10, linewidth=2))
-        # first inner border
-        border1_region = ax.add_patch(mpatches.Rectangle((x_min-swidth_x, y_min-width_y),
-                                                         x_len+2*swidth_x,
-                                                         y_len+2*width_y,
-                                                         fill=True, color=color_border1, zorder=0))
-        # second (contrasting color) border
-        border2_region = ax.add_patch(mpatches.Rectangle((x_min-swidth_x-sinn_border_width_x,
+
+        return {'footer': patch_path(mpatches.Rectangle((fx_low, y_min+width_y),
+                                                        fx_len, y_len-2*width_y)),
+                'draw': patch_path(mpatches.Rectangle((x_min, y_min), x_len, y_len)),
+                'border1': patch_path(mpatches.Rectangle((x_min-swidth_x, y_min-width_y),
+                                                         x_len+2*swidth_x, y_len+2*width_y)),
+                'border2': patch_path(mpatches.Rectangle((x_min-swidth_x-sinn_border_width_x,
                                                           y_min-width_y-inn_border_width_y),
                                                          x_len+2*swidth_x+2*sinn_border_width_x,
-                                                         y_len+2*width_y+2*inn_border_width_y,
-                                                         fill=True, color=color_border2,
-                                                         zorder=-1))
-        # final outside border
-        border3_region = ax.add_patch(mpatches.Rectangle((x_min-sborder_width_x,
+                                                         y_len+2*width_y+2*inn_border_width_y)),
+                'border3': patch_path(mpatches.Rectangle((x_min-sborder_width_x,
                                                           y_min-border_width_y),
                                                          x_len+2*sborder_width_x,
-                                                         y_len+2*border_width_y,
-                                                         fill=True, color=color_border1,
-                                                         zorder=-2))
+                                                         y_len+2*border_width_y))}
     elif shape == 'rounded_rectangle' or shape == 'rounded_square':
-
         p = 0.09 # padding for rounding
-        
-        # defines an extra patch to cut the footer off at horizontal edges
-        footer_region = ax.add_patch(mpatches.FancyBboxPatch((x_min+2*swidth_x+p, y_min+width_y+p),
-                                                             x_len-4*swidth_x-2*p, y_len-2*width_y-2*p,
-                                                             boxstyle=mpatches.BoxStyle("Round", pad=p),
-                                                             fill=False, color='#FFFFFF', alpha=0.0))
-        # defines the region inside the border
-        draw_region = ax.add_patch(mpatches.FancyBboxPatch((x_min+p, y_min+p),
+        round_box = mpatches.BoxStyle("Round", pad=p)
+
+        return {'footer': patch_path(mpatches.FancyBboxPatch((x_min+2*swidth_x+p, y_min+width_y+p),
+                                                             x_len-4*swidth_x-2*p,
+                                                             y_len-2*width_y-2*p,
+                                                             boxstyle=round_box)),
+                'draw': patch_path(mpatches.FancyBboxPatch((x_min+p, y_min+p),
                                                            x_len-2*p, y_len-2*p,
-                                                           boxstyle=mpatches.BoxStyle("Round", pad=p),
-                                                           color=color_border1, fill=False,
-                                                           zorder=10, linewidth=2))
-        # first inner border
-        border1_region = ax.add_patch(mpatches.FancyBboxPatch((x_min-swidth_x+p, y_min-width_y+p),
+                                                           boxstyle=round_box)),
+                'border1': patch_path(mpatches.FancyBboxPatch((x_min-swidth_x+p, y_min-width_y+p),
                                                               x_len+2*swidth_x-2*p,
                                                               y_len+2*width_y-2*p,
-                                                              boxstyle=mpatches.BoxStyle("Round", pad=p),
-                                                              fill=True, color=color_border1, zorder=0))
-        # second (contrasting color) border
-        border2_region = ax.add_patch(mpatches.FancyBboxPatch((x_min-swidth_x-sinn_border_width_x+p,
+                                                              boxstyle=round_box)),
+                'border2': patch_path(mpatches.FancyBboxPatch((x_min-swidth_x-sinn_border_width_x+p,
                                                                y_min-width_y-inn_border_width_y+p),
                                                               x_len+2*swidth_x+2*sinn_border_width_x-2*p,
                                                               y_len+2*width_y+2*inn_border_width_y-2*p,
-                                                              boxstyle=mpatches.BoxStyle("Round", pad=p),
-                                                              fill=True, color=color_border2,
-                                                              zorder=-1))
-        # final outside border
-        border3_region = ax.add_patch(mpatches.FancyBboxPatch((x_min-sborder_width_x+p,
+                                                              boxstyle=round_box)),
+                'border3': patch_path(mpatches.FancyBboxPatch((x_min-sborder_width_x+p,
                                                                y_min-border_width_y+p),
                                                               x_len+2*sborder_width_x-2*p,
                                                               y_len+2*border_width_y-2*p,
-                                                              boxstyle=mpatches.BoxStyle("Round", pad=p),
-                                                              fill=True, color=color_border1,
-                                                              zorder=-2, ec='none'))
+                                                              boxstyle=round_box))}
     else:
-        # slope of the parabola defining the upper/lower edges changes with aspect ratio
-        if ratio == '3:2':
-            par_slope = 0.3
-        elif ratio == '5:4':
-            par_slope = 0.2
-        else:
-            par_slope = 0.15
-        # defines an extra patch to cut the footer off at horizontal edges
-        xx = np.linspace(x_min+2*swidth_x, x_max-2*swidth_x, 1000)
-        footer_patch = plt.fill_between(xx,
-                                        par_slope*(xx-0.5)**2+y_min+width_y,
-                                        -par_slope*(xx-0.5)**2+y_max-width_y,
-                                        color='#FFFFFF', alpha=0.0)
-        path_footer, = footer_patch.get_paths()
-        footer_region = mpatches.PathPatch(path_footer, fc='none', ec='none')
-        ax.add_patch(footer_region)
-        # defines the region inside the border
-        xx = np.linspace(x_min, x_max, 1000)
-        draw_patch = plt.fill_between(xx,
-                                      par_slope*(xx-0.5)**2+y_min,
-                                      -par_slope*(xx-0.5)**2+y_max,
-                                      color=color_border1, alpha=0.0)
-        path_draw, = draw_patch.get_paths()
-        draw_region = mpatches.PathPatch(path_draw, fc='none', ec=color_border1, linewidth=2, zorder=10)
-        ax.add_patch(draw_region)
-        # first inner border
-        xx = np.linspace(x_min-swidth_x, x_max+swidth_x, 1000)
-        border1_region = plt.fill_between(xx,
-                                          par_slope*(xx-0.5)**2+y_min-width_y,
-                                          -par_slope*(xx-0.5)**2+y_max+width_y,
-                                          color=color_border1, zorder=0)
-        # second (contrasting color) border
-        xx = np.linspace(x_min-swidth_x-sinn_border_width_x,
-                         x_max+swidth_x+sinn_border_width_x,
-                         1000)
-        border2_region = plt.fill_between(xx,
-                                          par_slope*(xx-0.5)**2+y_min-width_y-inn_border_width_y,
-                                          -par_slope*(xx-0.5)**2+y_max+width_y+inn_border_width_y,
-                                          color=color_border2, zorder=-1)
-        # final outside border
-        xx = np.linspace(x_min-sborder_width_x, x_max+sborder_width_x, 1000)
-        border3_region = plt.fill_between(xx,
-                                          par_slope*(xx-0.5)**2+y_min-border_width_y,
-                                          -par_slope*(xx-0.5)**2+y_max+border_width_y,
-                                          color=color_border1, zorder=-2)
+        # slope of the parabola defining the upper/lower edges changes with aspect ratio,
+        # 0.15 for 1:1, 0.2 for 5:4, 0.3 for 3:2 and interpolated in between
+        par_slope = np.interp(w / h, [1, 5/4, 3/2], [0.15, 0.2, 0.3])
 
-    return draw_region, footer_region
+        def parabolas(x_pad, y_pad):
+            xx = np.linspace(x_min-x_pad, x_max+x_pad, 1000)
+            return between_path(xx, par_slope*(xx-0.5)**2+y_min-y_pad,
+                                -par_slope*(xx-0.5)**2+y_max+y_pad)
 
+        return {'footer': parabolas(-2*swidth_x, -width_y),
+                'draw': parabolas(0, 0),
+                'border1': parabolas(swidth_x, width_y),
+                'border2': parabolas(swidth_x+sinn_border_width_x, width_y+inn_border_width_y),
+                'border3': parabolas(sborder_width_x, border_width_y)}
 
-def logo(fname, colors, ratio='5:4', shape='default', dpi=1200, marker='o', ftype='png'):
+
+def geometry_key():
     """
-    Creates and saves the logo
+    Utility function for a hash of everything the bundled geometry depends on (the module
+    constants, texts, font and the source of the functions that compute it, see
+    geometry_functions), so a stale bundle is never used
+
+    Returns:
+    ========
+      key : str
+          hex digest
+    """
+    import hashlib
+    import inspect
+    constants = [x_min, x_max, y_min, y_max, border_width_x, inn_border_width_x, shrink,
+                 sorted(texts.items()), layout_keys, footer_proportions, header_tag, font_file,
+                 os.path.getsize(font_file)]
+    sources = [inspect.getsource(globals()[name]) for name in geometry_functions]
+    return hashlib.sha256(repr(constants + sources).encode('utf8')).hexdigest()[:16]
+
+
+def build_geometry(fname=geometry_file, variants=None):
+    """
+    Precomputes the background shape outlines and text layout of every variant into a bundle,
+    which background_shapes and add_text then read instead of recomputing them
 
     Args:
     ========
       fname : str
-          filename to save the resulting logo as
-      colors : dict of str
-          defines hex colors for logo features
-          popcorn        - dots that make up the popcorn function
-          mountains_edge - edges/triangles of the mountains
-          mountains_snow - "snowy" part of the mountains
-          edge           - border of the logo
-          header_tag     - "tag" behind the "CU Denver" header
-          header_text    - text of the header
-          footer_lines   - lines and text surrounding the "Department of..." footer
-          footer_text    - "Department of..." footer text
-          sky            - sky, can be a single color or a list of colors for stripes.
-                           >7 stripes may require adjusting the code so all stripes can be seen
-      ratio : str, default='3:2'
-          sets the ratio of the logo, valid ratios are '3:2', '5:4', '1:1'
-      shape : str, default='default'
-          sets the shape of the logo
-          default is straight vertical edges, parabolic upper/lower
-          other valid shapes are: rectangle, square (1:1 rectangle), oval, circle (1:1 oval)
-      dpi : int, default=1200
-          sets the dots-per-inch for image
-          default is 1200, high res
-      marker : str, default='o'
-          sets the shape of the popcorn function markers
-          default is 'o', circles
-          other valid markers are '*', others are untested
-      ftype : str, default='png'
-          sets the filetype for the image
-          default is png
-          other valid filetypes are 'svg' and 'eps'
+          bundle file (.npz)
+      variants : list of (str, str), optional
+          (ratio, shape) pairs to precompute, defaults to standard_variants()
     """
-    # -----------------------------------
-    # argument checking
-    # -----------------------------------
-    if shape not in ['square', 'circle', 'default', 'rectangle',
-                     'oval', 'rounded_rectangle', 'rounded_square']:
-        print('ERROR: shape is not valid!')
-        print('Please use shape=\'square\', \'rectangle\', \'circle\', \'oval\', \'rounded_rectangle\', \'rounded_square\' or \'default\'')
-        return
-    if ratio not in ['3:2', '5:4', '1:1', '3:1']:
-        print('ERROR: ratio is not valid!')
-        print('Please use ratio=\'3:2\', ratio=\'5:4\', ratio=\'3:1\', or ratio=\'1:1\'')
-        return
-    if ratio == '3:1' and shape != 'rectangle':
-        print('ERROR: shape and ratio combo is not valid!')
-        print('3:1 ratio is banner size and cannot be used with shapes other than \'rectangle\'')
-        return
+    global geometry_bundle
 
-    # only 'png', 'eps', and 'svg' will work for file types
-    if ftype not in ['eps', 'png', 'svg']:
-        print('ERROR: only eps, png, and svg filetypes are accepted')
-        return
+    if variants is None:
+        variants = standard_variants()
 
-    # square is a 1:1 rectangle, circle is a 1:1 oval, just force it
-    if shape == 'square' or shape == 'circle' or shape == 'rounded_square':
-        ratio = '1:1'
-    if shape == 'oval' and ratio == '1:1':
-        shape = 'circle'
-    if shape == 'rectangle' and ratio == '1:1':
-        shape = 'square'
+    arrays = {'key': np.array(geometry_key())}
+    for ratio, shape in variants:
+        ratio, shape = check_args(ratio, shape)
+        prefix = '%s|%s|' % (shape, ratio)
+        paths = border_paths(shape, ratio)
+        for name, path in paths.items():
+            arrays[prefix+name+'|vertices'] = path.vertices
+            arrays[prefix+name+'|codes'] = path.codes
 
-    # only '*' and 'o' are tested as marker shapes
-    if marker != '*' and marker != 'o':
-        print('WARNING: markers other than \'*\' and \'o\' are untested and may require code adjustment')
+        shift_up = get_shift_up(ratio, shape)
+        layout = text_layout(shape, ratio, shift_up, mpatches.PathPatch(paths['footer']))
+        arrays[prefix+'layout'] = np.array([shift_up] + [layout[k] for k in layout_keys])
 
-    # only 'png', 'eps', and 'svg' will work for file types
-    if fname.split('.')[1] != ftype:
-        print('WARNING: generally the filetype should be the same as the file extension')
+    np.savez(fname, **arrays)
+    geometry_bundle = None # reload
 
-    # the whole logo gets shifted up for a 1:1 ratio, or a 5:4 oval
-    if ratio == '1:1' or (ratio == '5:4' and shape == 'oval') or (ratio == '3:1' and shape == 'oval'):
-        shift_up = 0.04
-    else:
-        shift_up = 0.0
 
-    # -----------------------------------
-    # begin plotting
-    # -----------------------------------
-    plt.figure()
-    ax = plt.gca() # set up axis
-    fig = plt.gcf() # set up fig
+def bundled_geometry(shape, ratio, fname=geometry_file):
+    """
+    Gets the precomputed outlines and text layout of a variant from the bundle (see
+    build_geometry), loading it the first time
+
+    Returns:
+    ========
+      paths : dict of Path
+          see border_paths
+      shift_up : float
+          vertical shift the text layout is for
+      layout : dict
+          see text_layout
+      None if the variant isn't in the bundle, or there is no (up to date) bundle
+    """
+    global geometry_bundle
+
+    if geometry_bundle is None:
+        geometry_bundle = {}
+        if os.path.exists(fname):
+            with np.load(fname) as bundle:
+                if str(bundle['key']) == geometry_key():
+                    geometry_bundle = {k: bundle[k] for k in bundle.files}
+
+    prefix = '%s|%s|' % (shape, ratio)
+    if prefix+'layout' not in geometry_bundle:
+        return
+
+    paths = {name: Path(geometry_bundle[prefix+name+'|vertices'],
+                        geometry_bundle[prefix+name+'|codes'])
+             for name in ['footer', 'draw', 'border1', 'border2', 'border3']}
+    values = geometry_bundle[prefix+'layout']
+    layout = {k: float(v) for k, v in zip(layout_keys, values[1:])}
+    return paths, float(values[0]), layout
+
+
+def background_shapes(ax, shape, ratio, color_border1, color_border2):
+    """Creates the background shapes
+    The background shapes define the borders of the logo
+
+    Args:
+    ========
+    ax : plt axes object
+        used to add shapes to plot
+    shape : str
+        defines the shape of the logo
+    ratio : str
+        aspect ratio of the logo
+    color_border1 : str
+        hex color or other string color defining the border color
+    color_border2 : str
+        hex color or other string color defining the contrasting border color
+    """
+    bundled = bundled_geometry(shape, ratio)
+    paths = border_paths(shape, ratio) if bundled is None else bundled[0]
+
+    # defines an extra patch to cut the footer off at horizontal edges
+    footer_region = ax.add_patch(mpatches.PathPatch(paths['footer'], fc='none', ec='none'))
+    # defines the region inside the border
+    draw_region = ax.add_patch(mpatches.PathPatch(paths['draw'], fc='none', ec=color_border1,
+                                                  linewidth=2, zorder=10))
+    # first inner border, second (contrasting color) border and final outside border
+    for name, color, zorder in [('border1', color_border1, 0), ('border2', color_border2, -1),
+                                ('border3', color_border1, -2)]:
+        if shape == 'default':
+            # parabolic edges, drawn the same as plt.fill_between
+            ax.add_collection(PathCollection([paths[name]], facecolors=color, edgecolors=color,
+                                             linewidths=1.0, zorder=zorder))
+            continue
+        border = ax.add_patch(mpatches.PathPatch(paths[name], color=color, zorder=zorder))
+        if name == 'border3' and (shape == 'rounded_rectangle' or shape == 'rounded_square'):
+            border.set_edgecolor('none')
+
+    return draw_region, footer_region
+
+
+def check_args(ratio, shape, marker='o', ftype='png'):
+    """
+    Checks the shape/ratio/marker/filetype arguments, printing an error if they are not valid
+
+    Args:
+    ========
+      ratio : str
+          aspect ratio of the logo
+      shape : str
+          shape of the logo
+      marker : str
+          marker to use for popcorn
+      ftype : str
+          filetype for the image
+
+    Returns:
+    ========
+      ratio, shape : tuple of str
+          the ratio and shape, forced to be consistent (e.g. a 1:1 oval is a circle)
+          None if the arguments are not valid
+    """
+    if shape not in ['square', 'circle', 'default', 'rectangle',
+                     'oval', 'rounded_rectangle', 'rounded_square']:
+        print('ERROR: shape is not valid!')
+        print('Please use shape=\'square\', \'rectangle\', \'circle\', \'oval\', \'rounded_rectangle\', \'rounded_square\' or \'default\'')
+        return
+    if parse_ratio(ratio) is None:
+        print('ERROR: ratio is not valid!')
+        print('Please use a width:height ratio, e.g. ratio=\'3:2\', \'5:4\', \'3:1\', \'1:1\' or \'16:9\'')
+        return
+    ratio = normalize_ratio(ratio)
+    if is_banner(ratio) and shape != 'rectangle':
+        print('ERROR: shape and ratio combo is not valid!')
+        print('3:1 (and wider) ratios are banner size and cannot be used with shapes other than \'rectangle\'')
+        return
+
+    # only 'png', 'eps', and 'svg' will work for file types
+    if ftype not in ['eps', 'png', 'svg']:
+        print('ERROR: only eps, png, and svg filetypes are accepted')
+        return
+
+    # square is a 1:1 rectangle, circle is a 1:1 oval, just force it
+    if shape == 'square' or shape == 'circle' or shape == 'rounded_square':
+        ratio = '1:1'
+    if shape == 'oval' and ratio == '1:1':
+        shape = 'circle'
+    if shape == 'rectangle' and ratio == '1:1':
+        shape = 'square'
+
+    # only '*' and 'o' are tested as marker shapes
+    if marker != '*' and marker != 'o':
+        print('WARNING: markers other than \'*\' and \'o\' are untested and may require code adjustment')
+
+    return ratio, shape
+
+
+def standard_variants():
+    """
+    Utility function for every distinct logo of the hand tuned ratios (e.g. for exporting them all)
+
+    Returns:
+    ========
+      variants : list of (str, str)
+          (ratio, shape) pairs, as check_args would return them, banners are rectangles only
+    """
+    variants = []
+    for ratio in standard_ratios:
+        for shape in standard_shapes:
+            if is_banner(ratio) and shape != 'rectangle':
+                continue
+            variants.append(check_args(ratio, shape))
+    return variants
+
+
+def get_shift_up(ratio, shape):
+    """
+    Vertical shift of the drawing, the whole logo gets shifted up for a 1:1 (or taller) ratio,
+    or a 5:4 (or narrower) oval
 
-    draw_region, footer_region = background_shapes(ax, shape, ratio,
-                                                   colors['border'], colors['border_contrast'])
+    Args:
+    ========
+      ratio : str
+          aspect ratio of the logo
+      shape : str
+          shape of the logo
+    """
+    w, h = parse_ratio(ratio)
+    if w / h <= 1 or (shape == 'oval' and w / h <= 5/4):
+        return 0.04
+    return 0.0
+
+
+def trim_margins(ratio, dpi):
+    """
+    Utility function for how much of the (transparent) margin around the outside border can be
+    cropped off, worked out from the border geometry so nothing has to be drawn (or scanned) to
+    find it
+
+    The outside border reaches x_min-border_width_x (scaled) to x_max+border_width_x, and
+    y_min-border_width_y to y_max+border_width_y for every shape, plus half its 1 point edge line.
+
+    Args:
+    ========
+      ratio : str
+          aspect ratio of the logo
+      dpi : int or None
+          dots-per-inch of the output, margins are whole pixels so the crop doesn't move anything
+          (and leave a pixel for anti-aliasing). None for exact margins, e.g. for svg and eps
+
+    Returns:
+    ========
+      margin_x, margin_y : float
+          margin on each side (left/right and bottom/top) in inches
+    """
+    w, h = parse_ratio(ratio)
+    xlim, ylim = get_limits(ratio)
+    edge = 0.5 / 72
+
+    margin_x = (x_min - border_width_x * h / w - xlim[0]) * 6 * w / h / (xlim[1] - xlim[0]) - edge
+    margin_y = (y_min - border_width_y - ylim[0]) * 6 / (ylim[1] - ylim[0]) - edge
+
+    if dpi is None:
+        return margin_x, margin_y
+
+    # a pixel to spare for anti-aliasing and pixel snapping
+    return (max(math.floor(margin_x * dpi - 1), 0) / dpi,
+            max(math.floor(margin_y * dpi - 1), 0) / dpi)
+
+
+def trimmed_pixels(ratio, dpi):
+    """
+    Utility function for the size of the trimmed image in whole pixels, the untrimmed image (6
+    inches tall) less the whole pixel margins of trim_margins on each side
 
-    draw_mountains(ax, ratio, shift_up, colors['mountains_edge'], colors['mountains_snow'], draw_region)
+    Worked out in whole pixels, so it is exactly the size Agg makes the (trimmed) canvas, see
+    figure_size.
 
-    draw_popcorn(ax, ratio, shift_up, colors['popcorn'], marker, draw_region)
+    Returns:
+    ========
+      height, width : int
+          size of the trimmed image
+    """
+    w, h = parse_ratio(ratio)
+    margin_x, margin_y = trim_margins(ratio, dpi)
+    return (round(6 * dpi) - 2 * round(margin_y * dpi),
+            round(6 * w / h * dpi) - 2 * round(margin_x * dpi))
+
+
+def figure_size(ratio, dpi=1200, trim=False):
+    """
+    Utility function for the size of the figure, 6 inches tall (before trimming)
+
+    Args:
+    ========
+      ratio : str
+          aspect ratio of the logo
+      dpi : int or None, default=1200
+          dots-per-inch of the output, None for vector output (see trim_margins)
+      trim : bool, default=False
+          if True, without the margin around the outside border (see trim_margins)
+
+    Returns:
+    ========
+      width, height : float
+          size of the figure in inches
+    """
+    w, h = parse_ratio(ratio)
+    if not trim:
+        return 6 * w / h, 6
+
+    if dpi is None:
+        margin_x, margin_y = trim_margins(ratio, dpi)
+        return 6 * w / h - 2 * margin_x, 6 - 2 * margin_y
+
+    # Agg rounds the canvas size down (and flips y with the rounded height), so half a pixel
+    # extra always gives exactly trimmed_pixels, without moving anything on the canvas
+    height, width = trimmed_pixels(ratio, dpi)
+    return (width + 0.5) / dpi, (height + 0.5) / dpi
 
-    draw_sky(ax, shift_up, colors['sky'], draw_region)
 
-    add_text(ax, shape, ratio, shift_up,
-             colors['popcorn'], colors['header_text'], colors['header_tag'],
-             colors['footer_text'], colors['footer_lines'], draw_region, footer_region)
+def set_limits(fig, ax, ratio, trim=False, dpi=1200):
+    """
+    Sets the axis limits (including borders) and figure size for the ratio, and removes axes
 
+    Args:
+    ========
+      fig : plt figure object
+          figure the logo is drawn on
+      ax : plt axes object
+          axes the logo is drawn on
+      ratio : str
+          aspect ratio of the logo
+      trim : bool, default=False
+          if True, the figure is cropped to the outside border (see trim_margins), everything
+          is drawn exactly the same, just with the margin cut off
+      dpi : int or None, default=1200
+          dots-per-inch of the output, only used to trim, None for vector output
+    """
     # remove axes
     ax.axis('off')
 
-    # stretch axes
-    if ratio == '3:2':
-        scale_x_bw = 2 / 3
-    elif ratio == '5:4':
-        scale_x_bw = 4 / 5
-    elif ratio == '3:1':
-        scale_x_bw = 1 / 3
-    else:
-        scale_x_bw = 1
-
     # set x and y limits, including borders
-    width_x = (border_width_x - inn_border_width_x) / 2
-    width_y = (border_width_y - inn_border_width_y) / 2
-
-    swidth_x = width_x*scale_x_bw
-    sinn_border_width_x = inn_border_width_x*scale_x_bw
-    sborder_width_x = border_width_x*scale_x_bw
-    
-    plt.xlim(x_min-sborder_width_x-sinn_border_width_x, x_max+sborder_width_x+sinn_border_width_x)
-    plt.ylim(y_min-border_width_y-inn_border_width_y, y_max+border_width_y+inn_border_width_y)
+    xlim, ylim = get_limits(ratio)
+    ax.set_xlim(*xlim)
+    ax.set_ylim(*ylim)
 
-    # set size
-    if ratio == '3:2':
-        fig.set_size_inches(9, 6, forward=True)
-    elif ratio == '5:4':
-        fig.set_size_inches(7.5, 6, forward=True)
-    elif ratio == '1:1':
-        fig.set_size_inches(6, 6, forward=True)
-    elif ratio == '3:1':
-        fig.set_size_inches(18, 6, forward=True)
+    # set size, always 6 inches tall
+    w, h = parse_ratio(ratio)
+    fig.set_size_inches(*figure_size(ratio, dpi, trim), forward=True)
 
     # remove whitespace aroung figure before saving
-    plt.subplots_adjust(top=1, bottom=0, left=0, right=1, 
+    fig.subplots_adjust(top=1, bottom=0, left=0, right=1,
                         wspace=0, hspace=0)
 
+    if trim:
+        # same axes as untrimmed, hanging off the edges of the smaller figure
+        width, height = figure_size(ratio, dpi, trim)
+        margin_x, margin_y = trim_margins(ratio, dpi)
+        ax.set_position([-margin_x / width, -margin_y / height,
+                         6 * w / h / width, 6 / height])
+
+
+def draw_logo(colors, ratio, shape, dpi=1200, marker='o', depth='auto', popcorn_mode='scatter',
+              sky_mode='stripes', trim=False, ftype='png', profiler=None):
+    """
+    Draws the logo on a new figure (the arguments should already be checked with check_args)
+
+    Args:
+    ========
+      see logo
+      profiler : StageProfiler, optional
+          profiles each drawing stage
+
+    Returns:
+    ========
+      fig : plt figure object
+          figure with the logo drawn on it, ready to save at the given dpi
+    """
+    shift_up = get_shift_up(ratio, shape)
+
+    # -----------------------------------
+    # begin plotting
+    # -----------------------------------
+    plt.figure()
+    ax = plt.gca() # set up axis
+    fig = plt.gcf() # set up fig
+
+    with profile_stage(profiler, 'background_shapes'):
+        draw_region, footer_region = background_shapes(ax, shape, ratio,
+                                                       colors['border'], colors['border_contrast'])
+
+    with profile_stage(profiler, 'draw_mountains'):
+        draw_mountains(ax, ratio, shift_up, colors['mountains_edge'], colors['mountains_snow'],
+                       draw_region)
+
+    # vector output has no pixels, so its level of detail doesn't depend on the (nominal) dpi
+    popcorn_dpi = dpi if ftype == 'png' or popcorn_mode == 'raster' else None
+    with profile_stage(profiler, 'draw_popcorn'):
+        draw_popcorn(ax, ratio, shift_up, colors['popcorn'], marker, draw_region, popcorn_dpi,
+                     depth, popcorn_mode)
+
+    with profile_stage(profiler, 'draw_sky'):
+        draw_sky(ax, shift_up, colors['sky'], draw_region, sky_mode)
+
+    with profile_stage(profiler, 'add_text'):
+        add_text(ax, shape, ratio, shift_up,
+                 colors['popcorn'], colors['header_text'], colors['header_tag'],
+                 colors['footer_text'], colors['footer_lines'], draw_region, footer_region)
+
+    # vector output doesn't have pixels to line the crop up with
+    set_limits(fig, ax, ratio, trim, dpi if ftype == 'png' else None)
+
+    return fig
+
+
+def fixed_metadata(ftype):
+    """
+    Utility function for file metadata that doesn't change between renders (or matplotlib
+    versions), no dates and a fixed creator
+
+    Args:
+    ========
+      ftype : str
+          filetype of the image
+
+    Returns:
+    ========
+      metadata : dict
+          savefig metadata for the filetype
+    """
+    if ftype == 'png':
+        return {'Software': fixed_creator}
+    if ftype == 'svg':
+        return {'Creator': fixed_creator, 'Date': None}
+    return {'Creator': fixed_creator} # eps
+
+
+def stable_ps_clips():
+    """
+    Utility function, True if the eps backend has the (private) clip path hook that
+    deterministic_output patches, with the same meaning it has in the tested matplotlib versions
+    (see ps_clip_hook_versions)
+    """
+    import matplotlib
+    from matplotlib.backends.backend_ps import RendererPS
+
+    version = tuple(int(v) for v in re.findall(r'\d+', matplotlib.__version__)[:2])
+    return (hasattr(RendererPS, '_get_clip_cmd') and
+            ps_clip_hook_versions[0] <= version < ps_clip_hook_versions[1])
+
+
+@contextlib.contextmanager
+def deterministic_output():
+    """
+    Context manager that makes matplotlib write the same bytes for the same figure every time
+
+    Fixes the salt for svg ids, and the creation date for eps (which only comes from the
+    SOURCE_DATE_EPOCH environment variable). The eps backend reuses clip paths by the id() of
+    their transform, which is a new (short lived) object for every artist, so whether a clip path
+    is reused depends on where python happens to put that object. Holding on to the transforms
+    until the figure is saved means ids never get reused, so every clip path is written the same
+    way every time. There's no public hook for this, so it's only done for matplotlib versions
+    with the private one (see stable_ps_clips), other versions get a warning and eps files that
+    can differ.
+    """
+    from matplotlib.backends.backend_ps import RendererPS
+
+    patch = stable_ps_clips()
+    if patch:
+        get_clip_cmd = RendererPS._get_clip_cmd
+        clip_paths = []
+
+        def stable_clip_cmd(renderer, gc):
+            clip_path = gc.get_clip_path()
+            clip_paths.append(clip_path)
+            gc.get_clip_path = lambda: clip_path # same transform object for the original
+            return get_clip_cmd(renderer, gc)
+    else:
+        print('WARNING: untested matplotlib version, deterministic eps files can differ')
+
+    date_epoch = os.environ.get('SOURCE_DATE_EPOCH')
+    os.environ['SOURCE_DATE_EPOCH'] = fixed_date_epoch
+    if patch:
+        RendererPS._get_clip_cmd = stable_clip_cmd
+    try:
+        with plt.rc_context({'svg.hashsalt': fixed_hashsalt}):
+            yield
+    finally:
+        if patch:
+            RendererPS._get_clip_cmd = get_clip_cmd
+        if date_epoch is None:
+            del os.environ['SOURCE_DATE_EPOCH']
+        else:
+            os.environ['SOURCE_DATE_EPOCH'] = date_epoch
+
+
+def font_subset(fname, chars):
+    """
+    Cached subset of a font with only the given characters, for embedding in svg output
+
+    Variable fonts (like Oswald) are pinned to their default instance, which is the one
+    matplotlib draws, so none of the variation data is embedded. Subsets are cached by a hash of
+    the font file and the set of characters, so every logo with the same text reuses the same
+    subset.
+
+    Args:
+    ========
+      fname : str
+          font file
+      chars : str
+          characters the subset needs to draw
+
+    Returns:
+    ========
+      family, src : str
+          font family name of the subset (unique to the subset, so an installed version of the
+          font is never used instead), and the css src of the subset as a data url
+    """
+    from fontTools import subset
+    from fontTools.ttLib import TTFont
+    import base64
+    import hashlib
+
+    key = hashlib.sha256(('%s|%d|%s' % (fname, os.path.getsize(fname),
+                                        ''.join(sorted(set(chars))))).encode()).hexdigest()
+    if key not in font_subsets:
+        font = TTFont(fname)
+        if 'fvar' in font:
+            from fontTools.varLib import instancer
+            font = instancer.instantiateVariableFont(
+                font, {axis.axisTag: axis.defaultValue for axis in font['fvar'].axes})
+
+        options = subset.Options(hinting=False, desubroutinize=True, name_IDs=[1, 2])
+        try:
+            import brotli # woff2 is smaller, but needs brotli
+            options.flavor, fmt = 'woff2', 'woff2'
+        except ImportError:
+            options.flavor, fmt = 'woff', 'woff'
+        subsetter = subset.Subsetter(options)
+        subsetter.populate(text=chars)
+        subsetter.subset(font)
+        buf = io.BytesIO()
+        font.flavor = options.flavor
+        font.save(buf)
+
+        family = '%s %s' % (font['name'].getBestFamilyName(), key[:8])
+        src = "url(data:font/%s;base64,%s) format('%s')" % (
+            fmt, base64.b64encode(buf.getvalue()).decode(), fmt)
+        font_subsets[key] = (family, src)
+    return font_subsets[key]
+
+
+@contextlib.contextmanager
+def embedded_fonts(fig):
+    """
+    Context manager for saving svg text as text, drawn with subsets of its fonts embedded in the
+    file
+
+    The svg backend normally draws every glyph as a path. Inside this, texts are written as
+    <text> elements instead, with their font family switched to an embedded subset of their font
+    (see font_subset) that has only the characters the figure uses. The text keeps its font file,
+    so nothing moves.
+
+    Args:
+    ========
+      fig : plt figure object
+          figure about to be saved
+
+    Returns:
+    ========
+      css : bytes
+          @font-face rules for the subsets, to add to the svg stylesheet
+    """
+    from matplotlib.text import Text
+
+    texts = {} # font file: texts
+    for text in fig.findobj(Text):
+        if text.get_visible() and text.get_text():
+            fname = text.get_fontproperties().get_file() or fm.findfont(text.get_fontproperties())
+            texts.setdefault(fname, []).append(text)
+
+    css = []
+    props = []
+    for fname, font_texts in texts.items():
+        family, src = font_subset(fname, ''.join(t.get_text() for t in font_texts))
+        css.append("@font-face{font-family:'%s';src:%s}" % (family, src))
+        for text in font_texts:
+            props.append((text, text.get_fontproperties()))
+            new_prop = text.get_fontproperties().copy()
+            new_prop.set_family(family)
+            text.set_fontproperties(new_prop)
+
+    try:
+        with plt.rc_context({'svg.fonttype': 'none'}):
+            yield ''.join(css).encode()
+    finally:
+        for text, old_prop in props:
+            text.set_fontproperties(old_prop)
+
+
+def save_figure(fig, fname, ftype, dpi, deterministic=False, embed_fonts=False):
+    """
+    Saves the logo figure, transparent and without padding
+
+    Args:
+    ========
+      fig : plt figure object
+          figure the logo is drawn on
+      fname : str or file-like object
+          where to save the image
+      ftype : str
+          filetype of the image
+      dpi : int
+          dots-per-inch of the image
+      deterministic : bool, default=False
+          if True, the same logo is always saved as the same bytes (no dates, versions or
+          random ids), see deterministic_output
+      embed_fonts : bool, default=False
+          if True, svg text is saved as text with a subset of its font embedded, instead of as
+          paths, see embedded_fonts (eps always embeds only the glyphs it uses)
+    """
+    with contextlib.ExitStack() as stack:
+        kwargs = {}
+        if deterministic:
+            stack.enter_context(deterministic_output())
+            kwargs['metadata'] = fixed_metadata(ftype)
+
+        if not (embed_fonts and ftype == 'svg'):
+            fig.savefig(fname, transparent=True, pad_inches=0, format=ftype, dpi=dpi, **kwargs)
+            return
+
+        css = stack.enter_context(embedded_fonts(fig))
+        buf = io.BytesIO()
+        fig.savefig(buf, transparent=True, pad_inches=0, format=ftype, dpi=dpi, **kwargs)
+
+    data = buf.getvalue().replace(b'<style type="text/css">', b'<style type="text/css">' + css, 1)
+    if hasattr(fname, 'write'):
+        fname.write(data)
+    else:
+        with open(fname, 'wb') as f:
+            f.write(data)
+
+
+class StageProfiler:
+    """
+    Profiles each stage of drawing and saving a logo separately (see logo, profile=True)
+
+    Each stage gets its own cProfile profile. save writes a pstats file per stage, and one
+    collapsed stack file (one 'frame;frame;... microseconds' line per stack, the format flamegraph
+    tools read) with the stage as the bottom frame, so a flamegraph is grouped by stage.
+    """
+    def __init__(self):
+        self.profiles = {}
+
+    def stage(self, name):
+        """
+        Context manager that profiles its body as part of the stage name, see ProfiledStage
+        """
+        return ProfiledStage(self.profiles.setdefault(name, cProfile.Profile()))
+
+    def collapsed(self, name, min_us=1.0):
+        """
+        Stacks of a stage, reconstructed from the cProfile call graph
+
+        cProfile only records caller/callee pairs, so the time of a function called from more
+        than one place is split between the stacks it could be in, by how much of its time each
+        caller accounts for. Recursive calls are folded into the first call.
+
+        Args:
+        ========
+          name : str
+              stage
+          min_us : float, default=1.0
+              stacks with less time than this (in microseconds) are dropped
+
+        Returns:
+        ========
+          stacks : dict
+              'frame;frame;...': microseconds of time spent in the last frame itself
+        """
+        stats = pstats.Stats(self.profiles[name]).stats
+        callees = {}
+        for func, (cc, nc, tt, ct, callers) in stats.items():
+            for caller, edge in callers.items():
+                callees.setdefault(caller, []).append((func, edge[3]))
+
+        def label(func):
+            fname, line, function = func
+            if fname == '~':
+                return function.replace(';', ',') # built in
+            return ('%s:%s' % (os.path.basename(fname), function)).replace(';', ',')
+
+        stacks = {}
+        def walk(func, share, path, frames):
+            tt, ct = stats[func][2], stats[func][3]
+            fraction = share / ct if ct > 0 else 0.0
+            frames = frames + [label(func)]
+            stack = ';'.join(frames)
+            stacks[stack] = stacks.get(stack, 0.0) + tt * fraction * 1e6
+            for callee, edge_ct in callees.get(func, []):
+                if callee not in path and edge_ct * fraction * 1e6 >= min_us:
+                    walk(callee, edge_ct * fraction, path | {callee}, frames)
+
+        # the only frame of the profiler itself that gets recorded is the end of the stage
+        code = ProfiledStage.__exit__.__code__
+        exit_frame = (code.co_filename, code.co_firstlineno, code.co_name)
+        for func, (cc, nc, tt, ct, callers) in stats.items():
+            if not callers and func != exit_frame:
+                walk(func, ct, {func}, [name])
+        return {stack: us for stack, us in stacks.items() if us >= min_us}
+
+    def save(self, name, directory='images/profile'):
+        """
+        Saves <directory>/<name>.<stage>.pstats for each stage and <directory>/<name>.collapsed,
+        and prints the time of each stage
+
+        Args:
+        ========
+          name : str
+              name of the files, e.g. the logo's filename without the extension
+          directory : str, default='images/profile'
+              directory for the files
+        """
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        with open('%s/%s.collapsed' % (directory, name), 'w') as f:
+            for stage, profile in self.profiles.items():
+                stats = pstats.Stats(profile)
+                stats.dump_stats('%s/%s.%s.pstats' % (directory, name, stage))
+                print('%-18s %8.3fs' % (stage, stats.total_tt))
+                for stack, us in self.collapsed(stage).items():
+                    f.write('%s %d\n' % (stack, round(us)))
+
+
+class ProfiledStage:
+    """
+    Context manager that turns a profile on for its body
+
+    Not a contextlib.contextmanager, whose (generator and __exit__) frames would show up at the
+    bottom of the profiled stacks. Profiling starts as __enter__ returns and stops in __exit__,
+    so the body's own frames are the roots of the profile, apart from __exit__ itself (which
+    StageProfiler.collapsed leaves out).
+
+    Args:
+    ========
+      profile : cProfile.Profile
+          profile of the stage
+    """
+    def __init__(self, profile):
+        self.profile = profile
+
+    def __enter__(self):
+        self.profile.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.profile.disable()
+
+
+def profile_stage(profiler, name):
+    """
+    Utility function for a context manager that profiles a stage, if there is a profiler
+    """
+    return contextlib.nullcontext() if profiler is None else profiler.stage(name)
+
+
+def profile_name(profile, default):
+    """
+    Utility function for the name of the profile files, profile if it is a string, else default
+    """
+    return profile if isinstance(profile, str) else default
+
+
+def logo(fname, colors, ratio='5:4', shape='default', dpi=1200, marker='o', ftype='png',
+         depth='auto', popcorn_mode='scatter', sky_mode='stripes', trim=False,
+         deterministic=False, embed_fonts=False, profile=False):
+    """
+    Creates and saves the logo
+
+    Args:
+    ========
+      fname : str
+          filename to save the resulting logo as
+      colors : dict of str
+          defines hex colors for logo features
+          popcorn        - dots that make up the popcorn function
+          mountains_edge - edges/triangles of the mountains
+          mountains_snow - "snowy" part of the mountains
+          edge           - border of the logo
+          header_tag     - "tag" behind the "CU Denver" header
+          header_text    - text of the header
+          footer_lines   - lines and text surrounding the "Department of..." footer
+          footer_text    - "Department of..." footer text
+          sky            - sky, can be a single color or a list of colors for stripes.
+                           >7 stripes may require adjusting the code so all stripes can be seen
+      ratio : str, default='3:2'
+          sets the ratio of the logo, any width:height ratio e.g. '3:2', '5:4', '1:1', '16:9'
+          '3:2', '5:4', '3:1' and '1:1' have hand tuned text, other ratios are fitted
+          3:1 and wider ratios are banners, and can only be rectangles
+      shape : str, default='default'
+          sets the shape of the logo
+          default is straight vertical edges, parabolic upper/lower
+          other valid shapes are: rectangle, square (1:1 rectangle), oval, circle (1:1 oval)
+      dpi : int, default=1200
+          sets the dots-per-inch for image
+          default is 1200, high res
+      marker : str, default='o'
+          sets the shape of the popcorn function markers
+          default is 'o', circles
+          other valid markers are '*', others are untested
+      ftype : str, default='png'
+          sets the filetype for the image
+          default is png
+          other valid filetypes are 'svg' and 'eps'
+      depth : int or 'auto', default='auto'
+          sets the depth of the popcorn function
+          default is 'auto', picks the depth (and drops/merges dots too small to see) from
+          the output size, baseline_depth (110) at the default size, see auto_depth
+      popcorn_mode : str, default='scatter'
+          sets how the popcorn function dots are drawn
+          default is 'scatter', every dot is drawn
+          'raster' bins the dots into a single image, use for very deep (1000+) depths
+      sky_mode : str, default='stripes'
+          sets how a list of sky colors is drawn
+          default is 'stripes', a stripe per color
+          'gradient' is a smooth vertical gradient through the colors
+      trim : bool, default=False
+          if True, the image is cropped to the outside border, with no transparent margin.
+          The crop is worked out from the border geometry, so it doesn't need an extra draw
+          like bbox_inches='tight'
+      deterministic : bool, default=False
+          if True, the same arguments always give the same file (byte for byte), without
+          dates, matplotlib versions or random svg ids, e.g. so rebuilt logos don't look changed
+      embed_fonts : bool, default=False
+          svg only, if True the text is saved as text (selectable, and a bit smaller) with a
+          subset of Oswald embedded that has just the characters the logo uses, instead of as
+          paths, so it looks the same whether or not the viewer has Oswald installed
+      profile : bool or str, default=False
+          if True, each stage (background_shapes, draw_mountains, draw_popcorn, draw_sky,
+          add_text and savefig, which is where matplotlib does most of the work) is profiled,
+          and the pstats and collapsed stack (flamegraph) files are saved in images/profile,
+          named after fname (or the string given), see StageProfiler
+    """
+    # -----------------------------------
+    # argument checking
+    # -----------------------------------
+    args = check_args(ratio, shape, marker, ftype)
+    if args is None:
+        return
+    ratio, shape = args
+
+    # only 'png', 'eps', and 'svg' will work for file types
+    if fname.split('.')[1] != ftype:
+        print('WARNING: generally the filetype should be the same as the file extension')
+
+    profiler = StageProfiler() if profile else None
+    fig = draw_logo(colors, ratio, shape, dpi, marker, depth, popcorn_mode, sky_mode, trim, ftype,
+                    profiler)
+
     # check if images directory exists
     im_dir_exists = os.path.exists('images')
     if not im_dir_exists:
         os.mkdir('images')
 
     # save
-    fig.savefig('images/'+fname, transparent=True, pad_inches=0, format=ftype, dpi=dpi)
+    with profile_stage(profiler, 'savefig'):
+        save_figure(fig, 'images/'+fname, ftype, dpi, deterministic, embed_fonts)
+
+    if profiler is not None:
+        profiler.save(profile_name(profile, os.path.splitext(os.path.basename(fname))[0]))
+
+
+def render_logo(colors, ratio='5:4', shape='default', dpi=1200, marker='o', ftype='png',
+                depth='auto', popcorn_mode='scatter', sky_mode='stripes', trim=False,
+                deterministic=False, embed_fonts=False, profile=False):
+    """
+    Creates the logo in memory instead of saving it to the images directory
+
+    Args:
+    ========
+      see logo (profile files are named e.g. 'render_5x4_oval_1200', if not given)
+
+    Returns:
+    ========
+      data : bytes
+          contents of the image file, None if the arguments are not valid
+    """
+    args = check_args(ratio, shape, marker, ftype)
+    if args is None:
+        return
+    ratio, shape = args
+
+    profiler = StageProfiler() if profile else None
+    fig = draw_logo(colors, ratio, shape, dpi, marker, depth, popcorn_mode, sky_mode, trim, ftype,
+                    profiler)
+    buf = io.BytesIO()
+    with profile_stage(profiler, 'savefig'):
+        save_figure(fig, buf, ftype, dpi, deterministic, embed_fonts)
+    plt.close(fig)
+
+    if profiler is not None:
+        profiler.save(profile_name(profile, 'render_%s_%s_%d' % (ratio.replace(':', 'x'), shape,
+                                                                 dpi)))
+
+    return buf.getvalue()
+
+
+def canvas_size(ratio, dpi, trim=False):
+    """
+    Utility function for the size of the rendered image in pixels
+
+    Args:
+    ========
+      ratio : str
+          aspect ratio of the logo
+      dpi : int
+          dots-per-inch of the output
+      trim : bool, default=False
+          if True, size of the trimmed image (see trim_margins)
+
+    Returns:
+    ========
+      height, width : int
+          size of the image, same as the Agg canvas (figure size in inches * dpi, rounded down)
+    """
+    if trim:
+        return trimmed_pixels(ratio, dpi)
+    width, height = figure_size(ratio, dpi, trim)
+    return int(height * dpi), int(width * dpi)
+
+
+def render_rgba(colors, ratio='5:4', shape='default', dpi=1200, marker='o', depth='auto',
+                popcorn_mode='scatter', sky_mode='stripes', trim=False, out=None):
+    """
+    Creates the logo as an RGBA pixel array instead of an image file
+
+    Args:
+    ========
+      see logo
+      out : np.array(uint8), optional
+          (height, width, 4) array to put the image in (see canvas_size), for example one backed
+          by shared memory, instead of making a new array
+
+    Returns:
+    ========
+      rgba : np.array(uint8)
+          (height, width, 4) image with a transparent background, None if the arguments are
+          not valid
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    args = check_args(ratio, shape, marker)
+    if args is None:
+        return
+    ratio, shape = args
+
+    fig = draw_logo(colors, ratio, shape, dpi, marker, depth, popcorn_mode, sky_mode, trim)
+    canvas = FigureCanvasAgg(fig)
+    fig.set_dpi(dpi)
+    fig.patch.set_alpha(0.0) # transparent, same as saving with transparent=True
+    canvas.draw()
+    rgba = np.asarray(canvas.buffer_rgba())
+    if out is None:
+        out = rgba.copy()
+    else:
+        out[...] = rgba
+    plt.close(fig)
+
+    return out
@@ -226,8 +226,98 @@ def add_text(ax, shape, ratio, shift_up, popcorn_color, header_color1, header_co
         #line[0].set_clip_path(footer_region)
 
 
+def draw_logo_mathstats(colors, ratio, shape, dpi=1200, marker='o', ftype='png', profiler=None):
+    """
+    Draws the logo on a new figure (the arguments should already be checked, see logo_mathstats)
+
+    Args:
+    ========
+      see logo_mathstats
+      profiler : logo.StageProfiler, optional
+          profiles each drawing stage
+
+    Returns:
+    ========
+      fig : plt figure object
+          figure with the logo drawn on it, ready to save at the given dpi
+    """
+    # the whole logo gets shifted up for a 1:1 ratio, or a 5:4 oval
+    if ratio == '1:1' or (ratio == '5:4' and shape == 'oval') or (ratio == '3:1' and shape == 'oval'):
+        shift_up = 0.04
+    else:
+        shift_up = 0.0
+
+    # -----------------------------------
+    # begin plotting
+    # -----------------------------------
+    plt.figure()
+    ax = plt.gca() # set up axis
+    fig = plt.gcf() # set up fig
+
+    with logo.profile_stage(profiler, 'background_shapes'):
+        draw_region, footer_region = logo.background_shapes(ax, shape, ratio,
+                                                       colors['border'], colors['border_contrast'])
+
+    with logo.profile_stage(profiler, 'draw_mountains'):
+        logo.draw_mountains(ax, ratio, shift_up, colors['mountains_edge'], colors['mountains_snow'], draw_region)
+
+    # vector output has no pixels, so its level of detail doesn't depend on the (nominal) dpi
+    popcorn_dpi = dpi if ftype == 'png' else None
+    with logo.profile_stage(profiler, 'draw_popcorn'):
+        logo.draw_popcorn(ax, ratio, shift_up, colors['popcorn'], marker, draw_region, popcorn_dpi)
+
+    with logo.profile_stage(profiler, 'draw_sky'):
+        logo.draw_sky(ax, shift_up, colors['sky'], draw_region)
+
+    with logo.profile_stage(profiler, 'add_text'):
+        add_text(ax, shape, ratio, shift_up,
+                 colors['popcorn'], colors['header_text'], colors['header_tag'],
+                 colors['footer_text'], colors['footer_lines'], colors['footer_small_text'], draw_region, footer_region)
+
+    # remove axes
+    ax.axis('off')
+
+    # stretch axes
+    if ratio == '3:2':
+        scale_x_bw = 2 / 3
+    elif ratio == '5:4':
+        scale_x_bw = 4 / 5
+    elif ratio == '3:1':
+        scale_x_bw = 1 / 3
+    else:
+        scale_x_bw = 1
+
+    # set x and y limits, including borders
+    width_x = (logo.border_width_x - logo.inn_border_width_x) / 2
+    width_y = (logo.border_width_y - logo.inn_border_width_y) / 2
+
+    swidth_x = width_x*scale_x_bw
+    sinn_border_width_x = logo.inn_border_width_x*scale_x_bw
+    sborder_width_x = logo.border_width_x*scale_x_bw
+    
+    plt.xlim(logo.x_min-sborder_width_x-sinn_border_width_x, logo.x_max+sborder_width_x+sinn_border_width_x)
+    plt.ylim(logo.y_min-logo.border_width_y-logo.inn_border_width_y, logo.y_max+logo.border_width_y+logo.inn_border_width_y)
+
+    # set size
+    if ratio == '3:2':
+        fig.set_size_inches(9, 6, forward=True)
+    elif ratio == '5:4':
+        fig.set_size_inches(7.5, 6, forward=True)
+    elif ratio == '1:1':
+        fig.set_size_inches(6, 6, forward=True)
+    elif ratio == '3:1':
+        fig.set_size_inches(18, 6, forward=True)
+
+    # remove whitespace aroung figure before saving
+    plt.subplots_adjust(top=1, bottom=0, left=0, right=1, 
+                        wspace=0, hspace=0)
+
+    return fig
+
+
 def logo_mathstats(fname, colors, ratio='5:4', shape='default',
-                       dpi=1200, marker='o', ftype='png'):
+                       dpi=1200, marker='o', ftype='png', deterministic=False,
+                       embed_fonts=False, profile=False):
     """
     Creates and saves the logo
 
@@ -264,6 +354,13 @@ def logo_mathstats(fname, colors, ratio='5:4', shape='default',
           sets the filetype for the image
           default is png
           other valid filetypes are 'svg' and 'eps'
+      deterministic : bool, default=False
+          if True, the same arguments always give the same file (byte for byte), see logo.logo
+      embed_fonts : bool, default=False
+          svg only, if True the text is saved as text with subsets of the fonts embedded, see
+          logo.logo
+      profile : bool or str, default=False
+          if True, each stage is profiled and the files are saved in images/profile, see logo.logo
     """
     # -----------------------------------
     # argument checking
@@ -299,69 +396,8 @@ def logo_mathstats(fname, colors, ratio='5:4', shape='default',
     if fname.split('.')[1] != ftype:
         print('WARNING: generally the filetype should be the same as the file extension')
 
-    # the whole logo gets shifted up for a 1:1 ratio, or a 5:4 oval
-    if ratio == '1:1' or (ratio == '5:4' and shape == 'oval') or (ratio == '3:1' and shape == 'oval'):
-        shift_up = 0.04
-    else:
-        shift_up = 0.0
-
-    # -----------------------------------
-    # begin plotting
-    # -----------------------------------
-    plt.figure()
-    ax = plt.gca() # set up axis
-    fig = plt.gcf() # set up fig
-
-    draw_region, footer_region = logo.background_shapes(ax, shape, ratio,
-                                                   colors['border'], colors['border_contrast'])
-
-    logo.draw_mountains(ax, ratio, shift_up, colors['mountains_edge'], colors['mountains_snow'], draw_region)
-
-    logo.draw_popcorn(ax, ratio, shift_up, colors['popcorn'], marker, draw_region)
-
-    logo.draw_sky(ax, shift_up, colors['sky'], draw_region)
-
-    add_text(ax, shape, ratio, shift_up,
-             colors['popcorn'], colors['header_text'], colors['header_tag'],
-             colors['footer_text'], colors['footer_lines'], colors['footer_small_text'], draw_region, footer_region)
-
-    # remove axes
-    ax.axis('off')
-
-    # stretch axes
-    if ratio == '3:2':
-        scale_x_bw = 2 / 3
-    elif ratio == '5:4':
-        scale_x_bw = 4 / 5
-    elif ratio == '3:1':
-        scale_x_bw = 1 / 3
-    else:
-        scale_x_bw = 1
-
-    # set x and y limits, including borders
-    width_x = (logo.border_width_x - logo.inn_border_width_x) / 2
-    width_y = (logo.border_width_y - logo.inn_border_width_y) / 2
-
-    swidth_x = width_x*scale_x_bw
-    sinn_border_width_x = logo.inn_border_width_x*scale_x_bw
-    sborder_width_x = logo.border_width_x*scale_x_bw
-    
-    plt.xlim(logo.x_min-sborder_width_x-sinn_border_width_x, logo.x_max+sborder_width_x+sinn_border_width_x)
-    plt.ylim(logo.y_min-logo.border_width_y-logo.inn_border_width_y, logo.y_max+logo.border_width_y+logo.inn_border_width_y)
-
-    # set size
-    if ratio == '3:2':
-        fig.set_size_inches(9, 6, forward=True)
-    elif ratio == '5:4':
-        fig.set_size_inches(7.5, 6, forward=True)
-    elif ratio == '1:1':
-        fig.set_size_inches(6, 6, forward=True)
-    elif ratio == '3:1':
-        fig.set_size_inches(18, 6, forward=True)
-
-    # remove whitespace aroung figure before saving
-    plt.subplots_adjust(top=1, bottom=0, left=0, right=1, 
-                        wspace=0, hspace=0)
+    profiler = logo.StageProfiler() if profile else None
+    fig = draw_logo_mathstats(colors, ratio, shape, dpi, marker, ftype, profiler)
 
     # check if images directory exists
     im_dir_exists = os.path.exists('images')
@@ -372,4 +408,9 @@ def logo_mathstats(fname, colors, ratio='5:4', shape='default',
         os.mkdir('images/mathstats')
 
     # save
-    fig.savefig('images/mathstats/'+fname, transparent=True, pad_inches=0, format=ftype, dpi=dpi)
+    with logo.profile_stage(profiler, 'savefig'):
+        logo.save_figure(fig, 'images/mathstats/'+fname, ftype, dpi, deterministic,
+                         embed_fonts)
+
+    if profiler is not None:
+        profiler.save(logo.profile_name(profile, os.path.splitext(os.path.basename(fname))[0]))
@@ -0,0 +1,259 @@
+import logo
+import colorways
+import render_pool
+
+import asyncio
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from collections import OrderedDict
+import threading
+import hashlib
+import argparse
+
+content_types = {'png': 'image/png', 'svg': 'image/svg+xml', 'eps': 'application/postscript'}
+
+# ------------------------
+# request limits, see serve
+# ------------------------
+max_aspect = 8 # widest (or tallest) ratio that can be requested, 8:1 or 1:8
+max_pixels = 300 * 10**6 # biggest png canvas (width * height) that can be requested, ~2 GB to render
+# ------------------------
+
+
+def etag(data):
+    """
+    Utility function for the (strong) ETag of an image, renders are deterministic so it only
+    changes when the image does
+    """
+    return '"%s"' % hashlib.sha256(data).hexdigest()[:32]
+
+
+class LogoService:
+    """
+    Renders logos on demand, with an LRU cache of results and coalescing of identical requests
+
+    Renders run in a render_pool.RenderPool (warmed up worker processes, renders that take too
+    long are killed and their worker replaced), on an event loop in its own thread. Identical
+    requests that arrive while a render is running wait for that render instead of starting their
+    own, and finished renders are kept in memory (up to cache_bytes) for the next request. Renders
+    are deterministic (see logo.save_figure), so the same request always gets the same bytes and
+    ETag.
+
+    Args:
+    ========
+      processes : int
+          number of worker processes
+      cache_bytes : int
+          maximum total size of cached images
+      max_pending : int
+          maximum number of different renders running or waiting, further ones are refused
+      timeout : float
+          seconds a render can take (including waiting for a worker) before it fails
+    """
+    def __init__(self, processes=None, cache_bytes=256 * 2**20, max_pending=64, timeout=120):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.pool = render_pool.RenderPool(processes, max_queue=max_pending, timeout=timeout)
+        asyncio.run_coroutine_threadsafe(self.pool.start(), self.loop).result()
+        self.cache_bytes = cache_bytes
+        self.cache = OrderedDict() # key: (data, etag), least recently used first
+        self.cached_bytes = 0
+        self.pending = {} # key: future of renders in progress
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.lock = threading.RLock() # _done runs in get() if the render is already done
+
+    def get(self, key):
+        """
+        Gets a logo, from the cache or by rendering it
+
+        Args:
+        ========
+          key : tuple
+              (colorway, ratio, shape, dpi, marker, ftype, trim), already checked
+
+        Returns:
+        ========
+          data, etag : bytes, str
+              contents of the image file and its ETag, None if there are too many pending renders.
+              Raises render_pool.RenderError if the render fails and TimeoutError if it takes too
+              long
+        """
+        with self.lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                return self.cache[key]
+            future = self.pending.get(key)
+            if future is None:
+                if not self.slots.acquire(blocking=False):
+                    return
+                colorway, ratio, shape, dpi, marker, ftype, trim = key
+                future = asyncio.run_coroutine_threadsafe(
+                    self.pool.render(colorways.colorways[colorway], ratio, shape, dpi, marker,
+                                     ftype, trim=trim, deterministic=True, block=False), self.loop)
+                # pending first, the callback runs right away if the render already finished
+                self.pending[key] = future
+                future.add_done_callback(lambda f: self._done(key, f))
+
+        data = future.result()
+        if data is None:
+            raise render_pool.RenderError('arguments are not valid')
+        return data, etag(data)
+
+    def _done(self, key, future):
+        with self.lock:
+            del self.pending[key]
+            self.slots.release()
+            if (future.cancelled() or future.exception() is not None or future.result() is None
+                    or len(future.result()) > self.cache_bytes):
+                return
+            data = future.result()
+            self.cache[key] = (data, etag(data))
+            self.cached_bytes += len(data)
+            while self.cached_bytes > self.cache_bytes:
+                old, (old_data, old_etag) = self.cache.popitem(last=False)
+                self.cached_bytes -= len(old_data)
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self.pool.close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+class LogoHandler(BaseHTTPRequestHandler):
+    """
+    Handles GET /logo?ratio=5:4&shape=oval&colorway=pride&dpi=300 (also marker, ftype and trim)
+    """
+    protocol_version = 'HTTP/1.1' # for chunked responses and keep-alive
+    chunk_size = 2**16
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != '/logo':
+            return self.send_error(404, 'Not Found', 'only /logo is served')
+
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        colorway = query.get('colorway', 'default')
+        ratio = query.get('ratio', '5:4')
+        shape = query.get('shape', 'default')
+        marker = query.get('marker', 'o')
+        ftype = query.get('ftype', 'png')
+        trim = query.get('trim', '0') in ['1', 'true']
+        try:
+            dpi = int(query.get('dpi', '300'))
+        except ValueError:
+            return self.send_error(400, 'Bad Request', 'dpi must be a whole number')
+
+        if colorway not in colorways.colorways:
+            return self.send_error(400, 'Bad Request', 'colorway must be one of ' +
+                                   ', '.join(colorways.colorways))
+        if not 1 <= dpi <= self.server.max_dpi:
+            return self.send_error(400, 'Bad Request', 'dpi must be 1 to %d' % self.server.max_dpi)
+        if marker not in ['o', '*']:
+            return self.send_error(400, 'Bad Request', "marker must be 'o' or '*'")
+        args = logo.check_args(ratio, shape, marker, ftype)
+        if args is None:
+            return self.send_error(400, 'Bad Request', 'ratio, shape or ftype is not valid')
+        w, h = logo.parse_ratio(args[0])
+        if not 1 / self.server.max_aspect <= w / h <= self.server.max_aspect:
+            return self.send_error(400, 'Bad Request', 'ratio must be between 1:%g and %g:1'
+                                   % (self.server.max_aspect, self.server.max_aspect))
+        # vector files don't have a canvas, their size doesn't depend on the dpi
+        height, width = logo.canvas_size(args[0], dpi, trim)
+        if ftype == 'png' and height * width > self.server.max_pixels:
+            return self.send_error(413, 'Payload Too Large', '%dx%d pixels, at most %d pixels '
+                                   'can be rendered, use a lower dpi'
+                                   % (width, height, self.server.max_pixels))
+
+        try:
+            result = self.server.service.get((colorway,) + args + (dpi, marker, ftype, trim))
+        except TimeoutError:
+            return self.send_error(504, 'Gateway Timeout', 'render took too long')
+        except Exception as e:
+            return self.send_error(500, 'Internal Server Error', '%s: %s' % (type(e).__name__, e))
+        if result is None:
+            return self.send_error(503, 'Service Unavailable', 'too many renders in progress')
+        data, tag = result
+
+        if tag in [t.strip() for t in self.headers.get('If-None-Match', '').split(',')]:
+            self.send_response(304)
+            self.send_header('ETag', tag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', content_types[ftype])
+        self.send_header('ETag', tag)
+        self.send_header('Cache-Control', 'public, max-age=86400')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for i in range(0, len(data), self.chunk_size):
+            chunk = data[i:i+self.chunk_size]
+            self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+        self.wfile.write(b'0\r\n\r\n')
+
+
+def make_server(port=8000, processes=None, cache_bytes=256 * 2**20, max_dpi=2400,
+                max_pixels=max_pixels, max_aspect=max_aspect, timeout=120):
+    """
+    Makes the logo server (and starts its render workers), see serve for the arguments
+
+    Returns:
+    ========
+      server : ThreadingHTTPServer
+          the server, call serve_forever to run it, and server_close and service.close when done
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), LogoHandler)
+    server.daemon_threads = True
+    server.service = LogoService(processes, cache_bytes, timeout=timeout)
+    server.max_dpi = max_dpi
+    server.max_pixels = max_pixels
+    server.max_aspect = max_aspect
+    return server
+
+
+def serve(port=8000, processes=None, cache_bytes=256 * 2**20, max_dpi=2400,
+          max_pixels=max_pixels, max_aspect=max_aspect, timeout=120):
+    """
+    Runs the logo server on http://127.0.0.1:<port>/logo until interrupted
+
+    Only listens on 127.0.0.1, so it can't be reached from other machines.
+
+    Args:
+    ========
+      port : int, default=8000
+          port to listen on
+      processes : int, optional
+          number of render worker processes, defaults to the number of CPUs
+      cache_bytes : int, default=256 MiB
+          maximum total size of cached images
+      max_dpi : int, default=2400
+          largest dpi that can be requested
+      max_pixels : int, default=max_pixels
+          biggest png (width * height) that can be requested, bigger ones get 413
+      max_aspect : float, default=max_aspect
+          widest (and tallest, 1:max_aspect) ratio that can be requested, others get 400
+      timeout : float, default=120
+          seconds a render can take before it's killed (504)
+    """
+    server = make_server(port, processes, cache_bytes, max_dpi, max_pixels, max_aspect, timeout)
+    print('serving logos on http://127.0.0.1:%d/logo' % server.server_address[1])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='local logo render server')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--cache-mb', type=int, default=256)
+    parser.add_argument('--timeout', type=float, default=120)
+    args = parser.parse_args()
+    serve(args.port, args.processes, args.cache_mb * 2**20, timeout=args.timeout)
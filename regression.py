@@ -0,0 +1,361 @@
+import logo
+import logo_mathstats
+import colorways
+
+import numpy as np
+import matplotlib
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from PIL import Image
+import hashlib
+import argparse
+import json
+import os
+
+# ------------------------
+# shipped logos, name: (module, colorway, ratio, shape), see examples_simple.ipynb,
+# generate_logo.py and T-Shirts.2.ipynb
+# ------------------------
+variants = {'dept_logo': ('logo', 'default', '5:4', 'default'),
+            'dept_logo_pride': ('logo', 'pride', '5:4', 'circle'),
+            'dept_logo_lunar-new-year': ('logo', 'lunar_new_year', '3:1', 'rectangle'),
+            'dept_logo_monocolor-gold-v2': ('logo', 'monocolor_gold', '3:2', 'rounded_rectangle')}
+for shape, fshape in [('rounded_rectangle', 'roundrect'), ('oval', 'oval'),
+                      ('rectangle', 'rect'), ('default', 'default')]:
+    for ratio in ['3:2', '5:4', '1:1']:
+        name = 'dept_logo_t-shirt_%s_%s' % (ratio.replace(':', 't'), fshape)
+        variants[name] = ('logo_mathstats', 't_shirt', ratio, shape)
+
+index_file = 'regression_index.json'
+# ------------------------
+
+
+def render_variant(name, dpi=50):
+    """
+    Renders one of the shipped logos as an RGBA array
+
+    Args:
+    ========
+      name : str
+          name of the variant, see variants
+      dpi : int, default=50
+          dots-per-inch of the render
+
+    Returns:
+    ========
+      rgba : np.array(uint8)
+          (height, width, 4) image, None if the variant can't be rendered here (missing fonts)
+    """
+    module, colorway, ratio, shape = variants[name]
+    colors = colorways.colorways[colorway]
+
+    if module == 'logo':
+        return logo.render_rgba(colors, ratio, shape, dpi)
+
+    for font in [logo_mathstats.prop, logo_mathstats.prop2]:
+        if not os.path.exists(font.get_file()):
+            print('WARNING: %s not found, skipping %s' % (font.get_file(), name))
+            return
+
+    ratio, shape = logo.check_args(ratio, shape)
+    fig = logo_mathstats.draw_logo_mathstats(colors, ratio, shape, dpi)
+    canvas = FigureCanvasAgg(fig)
+    fig.set_dpi(dpi)
+    fig.patch.set_alpha(0.0) # transparent, same as saving with transparent=True
+    canvas.draw()
+    rgba = np.asarray(canvas.buffer_rgba()).copy()
+    plt.close(fig)
+    return rgba
+
+
+def to_gray(rgba, size):
+    """
+    Utility function for a small grayscale version of an image, composited over mid gray so
+    transparent areas count
+
+    Args:
+    ========
+      rgba : np.array(uint8)
+          (height, width, 4) image
+      size : tuple of int
+          (width, height) to resize to
+
+    Returns:
+    ========
+      gray : np.array
+          (height, width) grayscale image, 0 to 255
+    """
+    im = Image.fromarray(rgba, 'RGBA')
+    background = Image.new('RGBA', im.size, (128, 128, 128, 255))
+    gray = Image.alpha_composite(background, im).convert('L').resize(size, Image.LANCZOS)
+    return np.asarray(gray, dtype=float)
+
+
+def bits_to_hex(bits):
+    """
+    Utility function for writing an array of bits as a hex string
+    """
+    return '%0*x' % (bits.size // 4, int(''.join('1' if b else '0' for b in bits.flat), 2))
+
+
+def phash(rgba):
+    """
+    64 bit perceptual hash, signs of the lowest frequencies of the (32x32) image's cosine transform
+    compared to their median
+    """
+    n = 32
+    k = np.arange(n)
+    dct = np.cos(np.pi / n * (k[None, :] + 0.5) * k[:, None])
+    coeffs = (dct @ to_gray(rgba, (n, n)) @ dct.T)[:8, :8]
+    return bits_to_hex(coeffs > np.median(coeffs.flat[1:]))
+
+
+def dhash(rgba):
+    """
+    64 bit difference hash, whether each pixel of the (9x8) image is brighter than its neighbor
+    """
+    gray = to_gray(rgba, (9, 8))
+    return bits_to_hex(gray[:, 1:] > gray[:, :-1])
+
+
+def digest(rgba, size=16):
+    """
+    Digest of the downsampled image, changes with any visible change (unlike the perceptual hashes)
+    """
+    small = np.asarray(Image.fromarray(rgba, 'RGBA').resize((size, size), Image.BOX))
+    return hashlib.sha256((small >> 3).tobytes()).hexdigest()[:16]
+
+
+def hamming(hash1, hash2):
+    """
+    Utility function for the number of bits that differ between two hex hashes
+    """
+    return bin(int(hash1, 16) ^ int(hash2, 16)).count('1')
+
+
+def index_entry(name, rgba):
+    """
+    Utility function for the index entry of a variant from an image of it
+    """
+    module, colorway, ratio, shape = variants[name]
+    return {'module': module, 'colorway': colorway, 'ratio': ratio, 'shape': shape,
+            'size': list(rgba.shape[:2]), 'phash': phash(rgba), 'dhash': dhash(rgba),
+            'digest': digest(rgba)}
+
+
+def similar(entry1, entry2, threshold=4):
+    """
+    Utility function, True if two index entries are the same size and their perceptual hashes
+    are at most threshold bits apart
+    """
+    return (entry1['size'] == entry2['size'] and
+            hamming(entry1['phash'], entry2['phash']) <= threshold and
+            hamming(entry1['dhash'], entry2['dhash']) <= threshold)
+
+
+def fingerprint(name, dpi=50):
+    """
+    Renders a variant and computes its hashes
+
+    Returns:
+    ========
+      entry : dict
+          index entry for the variant, None if it can't be rendered here
+    """
+    rgba = render_variant(name, dpi)
+    if rgba is None:
+        return
+    return index_entry(name, rgba)
+
+
+def shipped_image(name, dpi=50):
+    """
+    Reads the committed image of a variant (images/<name>.png or .eps), resized to the size it
+    renders at
+
+    Args:
+    ========
+      name : str
+          name of the variant, see variants
+      dpi : int, default=50
+          dots-per-inch it is resized to
+
+    Returns:
+    ========
+      rgba : np.array(uint8)
+          (height, width, 4) image, None if there isn't one or it can't be read here (eps needs
+          ghostscript)
+    """
+    module, colorway, ratio, shape = variants[name]
+    ratio, shape = logo.check_args(ratio, shape)
+    height, width = logo.canvas_size(ratio, dpi)
+
+    for ext in ['png', 'eps']:
+        path = 'images/%s.%s' % (name, ext)
+        if os.path.exists(path):
+            break
+    else:
+        print('WARNING: no committed image for %s, skipping it' % name)
+        return
+
+    try:
+        im = Image.open(path)
+        if ext == 'eps':
+            # render at (about) the right size, with a transparent background like the pngs
+            im.load(scale=max(1, round(width / im.size[0])), transparency=True)
+        im = im.convert('RGBA').resize((width, height), Image.LANCZOS)
+    except OSError as e:
+        print('WARNING: can\'t read %s (%s), skipping %s' % (path, e, name))
+        return
+    return np.asarray(im).copy()
+
+
+def update_index(dpi=50, fname=index_file, seed=False):
+    """
+    Renders every variant (or reads its committed image, with seed=True) and writes the index of
+    their hashes
+
+    Variants that can't be rendered (or read) here keep their old entry, if there is one. The
+    ones that don't are listed under 'skipped' in the index and printed.
+
+    Args:
+    ========
+      dpi : int, default=50
+          dots-per-inch of the renders
+      fname : str
+          index file
+      seed : bool, default=False
+          hash the committed images in images/ (the logos as shipped) instead of renders of the
+          current code, for starting a new index. Their entries are marked 'seeded', a resized
+          image never has the same digest as a render, so check only compares their perceptual
+          hashes
+
+    Returns:
+    ========
+      index : dict
+          contents of the index
+    """
+    old = None if seed else load_index(fname)
+    index = {'dpi': dpi, 'variants': {}, 'skipped': []}
+    for name in variants:
+        if seed:
+            rgba = shipped_image(name, dpi)
+            entry = None if rgba is None else dict(index_entry(name, rgba), seeded=True)
+        else:
+            entry = fingerprint(name, dpi)
+        if entry is None and old is not None and old['dpi'] == dpi and name in old['variants']:
+            print('WARNING: kept the old entry of %s' % name)
+            entry = old['variants'][name]
+        if entry is None:
+            index['skipped'].append(name)
+        else:
+            index['variants'][name] = entry
+
+    if index['skipped']:
+        print('WARNING: %d variants not indexed: %s' % (len(index['skipped']),
+                                                       ', '.join(index['skipped'])))
+    with open(fname, 'w') as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+        f.write('\n')
+    return index
+
+
+def load_index(fname=index_file):
+    """
+    Utility function for reading the index, None if there isn't one
+    """
+    if not os.path.exists(fname):
+        return
+    with open(fname) as f:
+        return json.load(f)
+
+
+def check(threshold=4, fname=index_file):
+    """
+    Renders every variant (at the dpi of the index) and compares it with the index
+
+    Args:
+    ========
+      threshold : int, default=4
+          perceptual hashes more than this many bits apart count as 'changed'
+      fname : str
+          index file
+
+    Returns:
+    ========
+      results : dict
+          status of each variant by name
+          'ok'      - same digest (perceptually the same, for seeded entries)
+          'moved'   - different digest, but perceptually about the same (e.g. anti-aliasing)
+          'changed' - perceptual hashes moved, worth a full resolution look
+          'new'     - not in the index
+          'skipped' - can't be rendered here, or skipped in the index
+    """
+    index = load_index(fname)
+    if index is None:
+        print('ERROR: no %s, make one with python regression.py --update' % fname)
+        return
+
+    results = {}
+    for name in variants:
+        if name in index.get('skipped', []):
+            results[name] = 'skipped'
+            continue
+        entry = fingerprint(name, index['dpi'])
+        old = index['variants'].get(name)
+        if entry is None:
+            results[name] = 'skipped'
+        elif old is None:
+            results[name] = 'new'
+        elif old.get('seeded'):
+            # hashed from the committed image, only the perceptual hashes mean anything
+            results[name] = 'ok' if similar(entry, old, threshold) else 'changed'
+        elif entry['digest'] == old['digest'] and entry['size'] == old['size']:
+            results[name] = 'ok'
+        elif similar(entry, old, threshold):
+            results[name] = 'moved'
+        else:
+            results[name] = 'changed'
+    return results
+
+
+def render_full(name, dpi=1200):
+    """
+    Saves a full resolution render of a variant to images/regression for a closer look
+    """
+    rgba = render_variant(name, dpi)
+    if rgba is None:
+        return
+    if not os.path.exists('images/regression'):
+        os.makedirs('images/regression')
+    Image.fromarray(rgba, 'RGBA').save('images/regression/%s.png' % name)
+
+
+if __name__ == '__main__':
+    matplotlib.use('Agg')
+
+    parser = argparse.ArgumentParser(description='check the shipped logos against the hash index')
+    parser.add_argument('--update', action='store_true', help='rewrite the index instead')
+    parser.add_argument('--seed', action='store_true',
+                        help='rewrite the index from the committed images in images/ instead')
+    parser.add_argument('--dpi', type=int, default=50, help='dpi of the index renders (--update)')
+    parser.add_argument('--threshold', type=int, default=4,
+                        help='bits the perceptual hashes can move before a variant counts as changed')
+    parser.add_argument('--full-dpi', type=int, default=None,
+                        help='save renders of moved/changed variants at this dpi to images/regression')
+    args = parser.parse_args()
+
+    if args.update or args.seed:
+        index = update_index(args.dpi, seed=args.seed)
+        print('indexed %d variants at %d dpi, skipped %d'
+              % (len(index['variants']), args.dpi, len(index['skipped'])))
+    else:
+        results = check(args.threshold)
+        if results is not None:
+            for name, status in results.items():
+                print('%-8s %s' % (status, name))
+                if status in ['moved', 'changed'] and args.full_dpi:
+                    render_full(name, args.full_dpi)
+            skipped = [name for name, status in results.items() if status == 'skipped']
+            if skipped:
+                print('WARNING: %d of %d variants not checked' % (len(skipped), len(results)))
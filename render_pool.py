@@ -0,0 +1,359 @@
+import asyncio
+import concurrent.futures
+import multiprocessing
+from multiprocessing import shared_memory
+import io
+
+import numpy as np
+
+import logo
+import colorways
+
+
+# colors used to warm up the workers
+warmup_colors = colorways.default
+
+
+class RenderError(Exception):
+    """
+    Raised when a render fails inside a worker process
+    """
+
+
+def warm_up():
+    """
+    Loads everything a render needs, so the first real render in a worker is as fast as the rest
+
+    Imports matplotlib with the Agg backend, loads the geometry bundle (see logo.build_geometry),
+    the Oswald (and Bungee Inline, if present) fonts and their glyph tables, and renders a tiny
+    logo so the geometry, text layout and font caches are all filled in.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import os
+    import logo_mathstats
+
+    logo.bundled_geometry('default', '5:4') # loads the geometry bundle, if there is one
+    logo.glyph_table(logo.font_file)
+    for font in [logo_mathstats.prop, logo_mathstats.prop2]:
+        if os.path.exists(font.get_file()):
+            logo.glyph_table(font.get_file())
+
+    for ratio in ['3:2', '5:4', '3:1', '1:1']:
+        shape = 'rectangle' if logo.is_banner(ratio) else 'default'
+        logo.render_logo(warmup_colors, ratio=ratio, shape=shape, dpi=10)
+
+
+def render_shared(shm_name, shm_shape, **kwargs):
+    """
+    Renders the logo into a shared memory block owned by the parent process
+
+    Agg renders into its own buffer, which is copied once into the shared memory (no pickling,
+    and nothing is sent back through the pipe but the result flag).
+
+    Args:
+    ========
+      shm_name : str
+          name of the shared memory block
+      shm_shape : tuple of int
+          (height, width, 4) shape of the image
+      kwargs :
+          logo.render_rgba arguments
+
+    Returns:
+    ========
+      ok : bool
+          True if the image was rendered, None if the arguments are not valid
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        out = np.ndarray(shm_shape, dtype=np.uint8, buffer=shm.buf)
+        ok = logo.render_rgba(out=out, **kwargs) is not None
+        del out
+    finally:
+        shm.close()
+    return ok or None
+
+
+def worker(conn):
+    """
+    Render worker process loop, receives logo.render_logo keyword arguments (or render_shared
+    ones, if there is a 'shm_name') and sends back ('ok', result) or ('error', message).
+    Stops when it receives None.
+
+    Args:
+    ========
+      conn : multiprocessing Connection
+          worker end of the pipe to the pool
+    """
+    warm_up()
+    conn.send(('ready', None))
+    while True:
+        job = conn.recv()
+        if job is None:
+            break
+        try:
+            if 'shm_name' in job:
+                conn.send(('ok', render_shared(**job)))
+            else:
+                conn.send(('ok', logo.render_logo(**job)))
+        except Exception as e:
+            conn.send(('error', '%s: %s' % (type(e).__name__, e)))
+
+
+class SharedCanvas:
+    """
+    A rendered RGBA image that lives in shared memory
+
+    The worker process copies the rendered image once into memory owned by this process, so it
+    is never pickled on its way back. array is a view of the shared memory, valid until close()
+    (which frees the memory).
+
+    Args:
+    ========
+      shm : SharedMemory
+          shared memory block holding the image
+      shape : tuple of int
+          (height, width, 4) shape of the image
+    """
+    def __init__(self, shm, shape):
+        self.shm = shm
+        self.shape = shape
+        self.array = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def encode(self, ftype='png'):
+        """
+        Encodes the image (straight from shared memory) as 'png' (or any other Pillow format)
+
+        Returns:
+        ========
+          data : bytes
+              contents of the image file
+        """
+        from PIL import Image
+        buf = io.BytesIO()
+        Image.frombuffer('RGBA', (self.shape[1], self.shape[0]), self.shm.buf, 'raw', 'RGBA', 0, 1).save(
+            buf, format=ftype)
+        return buf.getvalue()
+
+    def close(self):
+        """
+        Frees the shared memory, array can't be used after this
+        """
+        if self.shm is not None:
+            self.array = None
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+
+class RenderPool:
+    """
+    Asyncio render API backed by a pool of pre-warmed worker processes
+
+    Renders run in separate processes so they never block the event loop. Requests wait in a
+    bounded queue (backpressure), can time out, and can be cancelled: a cancelled or timed out
+    render that is already running kills its worker, which is replaced by a fresh (warmed up) one.
+
+        async with RenderPool(processes=4) as pool:
+            png = await pool.render(colors, ratio='5:4', shape='oval', dpi=300, timeout=60)
+
+    Workers are started with 'spawn', so scripts using the pool need the usual
+    if __name__ == '__main__': guard.
+
+    Args:
+    ========
+      processes : int
+          number of worker processes, defaults to the number of CPUs
+      max_queue : int
+          number of renders that can be waiting for a worker, further renders wait to be queued
+          (or raise asyncio.QueueFull with block=False)
+      timeout : float
+          default timeout for a render in seconds (including time spent queued), None is forever
+    """
+    def __init__(self, processes=None, max_queue=32, timeout=None):
+        self.processes = processes or multiprocessing.cpu_count()
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.context = multiprocessing.get_context('spawn')
+        self.queue = None
+        self.workers = []
+        self.dispatchers = []
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def start(self):
+        """
+        Starts the worker processes, returns once they are all warmed up
+        """
+        self.queue = asyncio.Queue(self.max_queue)
+        # threads that wait on the worker pipes, one per worker
+        self.threads = concurrent.futures.ThreadPoolExecutor(self.processes)
+        self.workers = await asyncio.gather(*[self._spawn() for i in range(self.processes)])
+        self.dispatchers = [asyncio.create_task(self._dispatch(i)) for i in range(self.processes)]
+
+    async def _spawn(self):
+        conn, child_conn = self.context.Pipe()
+        process = self.context.Process(target=worker, args=(child_conn,), daemon=True)
+        process.start()
+        child_conn.close()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.threads, conn.recv) # ('ready', None)
+        return process, conn
+
+    async def _respawn(self, index, recv=None):
+        # kills worker index (if it's still alive) and replaces it with a fresh one
+        process, conn = self.workers[index]
+        process.kill()
+        if recv is not None:
+            await asyncio.gather(recv, return_exceptions=True)
+        conn.close()
+        process.join()
+        self.workers[index] = await self._spawn()
+
+    async def _dispatch(self, index):
+        loop = asyncio.get_running_loop()
+        while True:
+            job, future = await self.queue.get()
+            if future.done(): # cancelled or timed out while queued
+                continue
+            process, conn = self.workers[index]
+            try:
+                conn.send(job)
+            except (BrokenPipeError, OSError) as e:
+                # worker died while idle
+                future.set_exception(RenderError('worker exited (%s: %s)' % (type(e).__name__, e)))
+                await self._respawn(index)
+                continue
+            recv = loop.run_in_executor(self.threads, conn.recv)
+            await asyncio.wait([recv, future], return_when=asyncio.FIRST_COMPLETED)
+            if future.done():
+                # caller gave up, the only way to stop a render is to kill the worker
+                await self._respawn(index, recv)
+                continue
+            try:
+                status, result = recv.result()
+            except (EOFError, OSError) as e:
+                # worker died mid render (crashed, out of memory, killed), BrokenPipeError is an
+                # OSError
+                await loop.run_in_executor(self.threads, process.join, 5)
+                future.set_exception(RenderError('worker exited with code %s during the render '
+                                                 '(%s)' % (process.exitcode, type(e).__name__)))
+                await self._respawn(index)
+                continue
+            if status == 'ok':
+                future.set_result(result)
+            else:
+                future.set_exception(RenderError(result))
+
+    async def render(self, colors, ratio='5:4', shape='default', dpi=1200, marker='o', ftype='png',
+                     depth='auto', popcorn_mode='scatter', sky_mode='stripes', trim=False,
+                     deterministic=False, profile=False, timeout=None, block=True):
+        """
+        Renders the logo in a worker process, see logo.logo for the logo arguments (profile files
+        are written by the worker, see logo.render_logo)
+
+        Args:
+        ========
+          timeout : float
+              seconds to wait (queued and rendering) before raising asyncio.TimeoutError,
+              defaults to the pool timeout
+          block : bool
+              if the queue is full, wait for space (True) or raise asyncio.QueueFull (False)
+
+        Returns:
+        ========
+          data : bytes
+              contents of the image file, None if the arguments are not valid
+        """
+        # check here so bad arguments never reach the queue
+        if logo.check_args(ratio, shape, marker, ftype) is None:
+            return
+
+        job = {'colors': colors, 'ratio': ratio, 'shape': shape, 'dpi': dpi, 'marker': marker,
+               'ftype': ftype, 'depth': depth, 'popcorn_mode': popcorn_mode, 'sky_mode': sky_mode,
+               'trim': trim, 'deterministic': deterministic, 'profile': profile}
+        return await self._submit(job, timeout, block)
+
+    async def _submit(self, job, timeout, block):
+        future = asyncio.get_running_loop().create_future()
+        timeout = self.timeout if timeout is None else timeout
+
+        async def queue_and_wait():
+            if block:
+                await self.queue.put((job, future))
+            else:
+                self.queue.put_nowait((job, future))
+            return await future
+
+        try:
+            return await asyncio.wait_for(queue_and_wait(), timeout)
+        finally:
+            # lets the dispatcher know to skip/kill this render if we're cancelled or timed out
+            future.cancel()
+
+    async def render_rgba(self, colors, ratio='5:4', shape='default', dpi=1200, marker='o',
+                          depth='auto', popcorn_mode='scatter', sky_mode='stripes', trim=False,
+                          timeout=None, block=True):
+        """
+        Renders the logo in a worker process into shared memory, see render for the arguments
+
+        Only the name of the shared memory block goes to the worker, and nothing but a status
+        comes back, however big the image is.
+
+        Returns:
+        ========
+          canvas : SharedCanvas
+              the rendered image, close it when done to free the memory. None if the arguments
+              are not valid
+        """
+        args = logo.check_args(ratio, shape, marker)
+        if args is None:
+            return
+
+        shape_px = logo.canvas_size(args[0], dpi, trim) + (4,)
+        shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape_px)))
+        canvas = SharedCanvas(shm, shape_px)
+        job = {'shm_name': shm.name, 'shm_shape': shape_px, 'colors': colors, 'ratio': ratio,
+               'shape': shape, 'dpi': dpi, 'marker': marker, 'depth': depth,
+               'popcorn_mode': popcorn_mode, 'sky_mode': sky_mode, 'trim': trim}
+        try:
+            await self._submit(job, timeout, block)
+        except BaseException:
+            canvas.close()
+            raise
+        return canvas
+
+    async def close(self):
+        """
+        Stops the dispatchers and worker processes, cancelling anything still queued
+        """
+        for task in self.dispatchers:
+            task.cancel()
+        await asyncio.gather(*self.dispatchers, return_exceptions=True)
+        while not self.queue.empty():
+            job, future = self.queue.get_nowait()
+            future.cancel()
+        for process, conn in self.workers:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            process.join(5)
+            if process.is_alive():
+                process.kill()
+            conn.close()
+        self.threads.shutdown(wait=False)
+        self.workers = []
+        self.dispatchers = []
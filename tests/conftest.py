@@ -0,0 +1,20 @@
+import os
+import sys
+
+import matplotlib
+
+# the scripts live at the top of the repo and load the fonts by relative path
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+os.chdir(root)
+matplotlib.use('Agg')
+
+import pytest
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    # scripts write to ./images, run them from a scratch directory with the fonts linked in
+    (tmp_path / 'Oswald').symlink_to(os.path.join(root, 'Oswald'))
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,69 @@
+import animate_logo
+import colorways
+import logo
+
+import numpy as np
+from PIL import Image, ImageSequence
+
+
+def frames(width=8, height=6, count=3):
+    rng = np.random.default_rng(0)
+    out = []
+    for i in range(count):
+        frame = rng.integers(0, 256, (height, width, 4), dtype=np.uint8)
+        frame[:, :, 3] = 255
+        frame[0, 0, 3] = 0
+        out.append(frame)
+    return out
+
+
+def test_apng_writer_frames_round_trip(tmp_path):
+    fname = str(tmp_path / 'anim.png')
+    writer = animate_logo.APNGWriter(fname, 8, 6, 3, fps=10, loops=2)
+    for frame in frames():
+        writer.write(frame)
+    writer.close()
+
+    with Image.open(fname) as im:
+        assert im.n_frames == 3
+        assert im.info['loop'] == 2
+        for frame, decoded in zip(frames(), ImageSequence.Iterator(im)):
+            assert decoded.info['duration'] == 100
+            assert np.array_equal(np.asarray(decoded.convert('RGBA')), frame)
+
+
+def test_gif_writer_frames_and_transparency(tmp_path):
+    fname = str(tmp_path / 'anim.gif')
+    writer = animate_logo.GIFWriter(fname, 8, 6, fps=5)
+    for frame in frames():
+        writer.write(frame)
+    writer.close()
+
+    with Image.open(fname) as im:
+        assert im.n_frames == 3
+        assert im.info['loop'] == 0
+        for frame, decoded in zip(frames(), ImageSequence.Iterator(im)):
+            assert decoded.info['duration'] == 200
+            decoded = np.asarray(decoded.convert('RGBA'))
+            assert decoded[0, 0, 3] == 0
+            assert (decoded[:, :, 3].ravel()[1:] == 255).all()
+
+
+def test_popcorn_animation_one_frame_per_depth(workdir):
+    animate_logo.animate_logo('popcorn.png', colorways.default, dpi=10)
+    with Image.open(workdir / 'images' / 'popcorn.png') as im:
+        depths = logo.popcorn_points('5:4', 0.0, 'o', 10)[2]
+        assert im.n_frames == len(np.unique(depths))
+        assert im.size == logo.canvas_size('5:4', 10)[::-1]
+        # dots only accumulate, so the last frame is the whole logo
+        im.seek(im.n_frames - 1)
+        assert np.asarray(im.convert('RGBA'))[:, :, 3].any()
+
+
+def test_sky_animation_needs_stripes(workdir, capsys):
+    assert animate_logo.animate_logo('sky.gif', colorways.default, ftype='gif', mode='sky') is None
+    assert 'ERROR' in capsys.readouterr().out
+
+    animate_logo.animate_logo('sky.gif', colorways.pride, dpi=10, ftype='gif', mode='sky')
+    with Image.open(workdir / 'images' / 'sky.gif') as im:
+        assert im.n_frames == len(colorways.pride['sky'])
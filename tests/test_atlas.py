@@ -0,0 +1,60 @@
+import atlas
+import colorways
+import logo
+
+import numpy as np
+from PIL import Image
+import json
+import re
+
+
+def overlaps(a, b):
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+
+
+def test_pack_without_overlap():
+    rng = np.random.default_rng(0)
+    sizes = [tuple(int(v) for v in rng.integers(10, 120, 2)) for _ in range(60)]
+    placements, atlas_sizes = atlas.pack(sizes, max_size=256, padding=2)
+    assert len(atlas_sizes) > 1
+
+    rects = [[] for _ in atlas_sizes]
+    for (w, h), (a, x, y) in zip(sizes, placements):
+        assert 0 <= x and x + w <= atlas_sizes[a][0] <= 256
+        assert 0 <= y and y + h <= atlas_sizes[a][1] <= 256
+        # padding included, so sprites never touch
+        rects[a].append((x, y, w + 2, h + 2))
+    for placed in rects:
+        for i, r in enumerate(placed):
+            assert not any(overlaps(r, s) for s in placed[i+1:])
+
+
+def test_pack_too_big(capsys):
+    assert atlas.pack([(10, 10), (300, 10)], max_size=256) is None
+    assert 'ERROR' in capsys.readouterr().out
+
+
+def test_export_atlas_offsets(workdir):
+    colors = {'default': colorways.default, 'pride': colorways.pride}
+    variants = [('5:4', 'default'), ('1:1', 'circle'), ('3:1', 'rectangle')]
+    index = atlas.export_atlas('logos', colors, variants, dpi=10)
+    assert len(index['sprites']) == 6
+
+    with open(workdir / 'images/atlas/logos.json') as f:
+        assert json.load(f) == index
+    images = {a['file']: np.asarray(Image.open(workdir / 'images/atlas' / a['file']))
+              for a in index['atlases']}
+    with open(workdir / 'images/atlas/logos.css') as f:
+        css = f.read()
+
+    for name, s in index['sprites'].items():
+        # the sprite is where the index says, and is the same as rendering it on its own
+        sprite = images[s['file']][s['y']:s['y']+s['height'], s['x']:s['x']+s['width']]
+        expected = logo.render_rgba(colors[s['colorway']], s['ratio'], s['shape'], 10, trim=True)
+        assert np.array_equal(sprite, expected)
+
+        rule = re.search(r'\.logos-%s \{ background-image: url\((.*?)\); '
+                         r'background-position: -(\d+)px -(\d+)px; width: (\d+)px; '
+                         r'height: (\d+)px; \}' % name, css)
+        assert rule.group(1) == s['file']
+        assert [int(v) for v in rule.groups()[1:]] == [s['x'], s['y'], s['width'], s['height']]
@@ -0,0 +1,91 @@
+import batch
+import colorways
+import logo
+
+import concurrent.futures
+import threading
+import time
+import pytest
+
+
+def test_fit_model_recovers_line():
+    pixels = [10**5, 10**6, 4 * 10**6, 10**7]
+    peaks = [2**20 + 5.5 * p for p in pixels]
+    model = batch.fit_model(pixels, peaks, 75 * 2**20)
+    assert model['worker_rss'] == 75 * 2**20
+    assert model['base'] == pytest.approx(2**20, rel=1e-3)
+    assert model['per_pixel'] == pytest.approx(5.5)
+    predicted = batch.predict_peak(model, 10**6)
+    assert predicted == pytest.approx(batch.model_margin * peaks[1], rel=1e-6)
+
+
+def test_fit_model_clamps_to_zero():
+    model = batch.fit_model([10**5, 10**6], [2 * 10**6, 10**6], 0)
+    assert model['base'] >= 0 and model['per_pixel'] == 0
+
+
+def test_job_pixels_and_default_model(workdir):
+    height, width = logo.canvas_size('3:1', 100)
+    assert batch.job_pixels({'ratio': '3:1', 'shape': 'rectangle', 'dpi': 100}) == height * width
+    assert batch.job_pixels({'ratio': '3:1', 'shape': 'oval'}) is None
+    assert batch.load_model() == batch.default_model
+
+
+@pytest.fixture
+def fake_workers(monkeypatch):
+    # threads standing in for worker processes, each job just holds its predicted memory a bit
+    model = {'worker_rss': 0, 'base': 0, 'per_pixel': 1.0}
+    lock = threading.Lock()
+    state = {'used': 0, 'peak': 0, 'running': [], 'together': []}
+
+    def run_job(job):
+        predicted = batch.predict_peak(model, batch.job_pixels(job))
+        with lock:
+            state['used'] += predicted
+            state['peak'] = max(state['peak'], state['used'])
+            state['running'].append(job['dpi'])
+            state['together'].append(list(state['running']))
+        time.sleep(0.05)
+        with lock:
+            state['used'] -= predicted
+            state['running'].remove(job['dpi'])
+        return predicted, 0.05
+
+    monkeypatch.setattr(batch, 'run_job', run_job)
+    monkeypatch.setattr(batch, 'worker_pool', concurrent.futures.ThreadPoolExecutor)
+    return model, state
+
+
+def test_budget_scheduling(fake_workers):
+    model, state = fake_workers
+    jobs = ([{'colors': colorways.default, 'dpi': 100}] * 2
+            + [{'colors': colorways.default, 'dpi': 10}] * 6
+            + [{'colors': colorways.default, 'shape': 'not a shape', 'dpi': 10}])
+    big = batch.predict_peak(model, batch.job_pixels(jobs[0]))
+    budget = int(1.2 * big)
+
+    results = batch.run_batch(jobs, budget, processes=4, model=model)
+    assert results[-1] is None
+    assert all(r['measured'] == r['predicted'] for r in results[:-1])
+    assert state['peak'] <= budget
+    # the two big jobs never run together, small ones fill in around them
+    assert not any(running.count(100) > 1 for running in state['together'])
+    assert max(len(running) for running in state['together']) > 1
+
+
+def test_over_budget_job_runs_alone(fake_workers, capsys):
+    model, state = fake_workers
+    jobs = ([{'colors': colorways.default, 'dpi': 100}]
+            + [{'colors': colorways.default, 'dpi': 10}] * 3)
+    results = batch.run_batch(jobs, 1000, processes=4, model=model)
+    assert all('error' not in r for r in results)
+    assert 'WARNING: job 0' in capsys.readouterr().out
+    assert all(len(running) == 1 for running in state['together'])
+
+
+def test_run_batch_measures_workers():
+    jobs = [{'colors': colorways.default, 'dpi': 10}, {'colors': colorways.pride, 'dpi': 20}]
+    results = batch.run_batch(jobs, 2**30, processes=1)
+    for result in results:
+        assert result['seconds'] > 0
+        assert result['measured'] is None or result['measured'] >= 0
@@ -0,0 +1,41 @@
+import brand_book
+import colorways
+
+import matplotlib.pyplot as plt
+import re
+
+
+def test_swatches_distinct_in_order():
+    colors = {'popcorn': '#aaaaaa', 'sky': ['#000000', '#AAAAAA', '#ffffff'], 'edge': '#FFFFFF'}
+    assert brand_book.swatches(colors) == ['#AAAAAA', '#000000', '#FFFFFF']
+
+
+def test_catalog_page_keeps_logo_size():
+    fig = brand_book.catalog_page('pride', colorways.pride, '5:4', 'oval', label_height=0.75)
+    width, height = fig.get_size_inches()
+    assert height == 6 + 0.75
+    assert width == 7.5
+    texts = [t.get_text() for t in fig.texts]
+    assert 'pride' in texts and '5:4  oval' in texts
+    assert len(fig.patches) == len(brand_book.swatches(colorways.pride))
+    plt.close(fig)
+
+
+def test_brand_book_pages_and_fonts(workdir):
+    colors = {'default': colorways.default, 'pride': colorways.pride}
+    variants = [('5:4', 'default'), ('3:1', 'rectangle')]
+    assert brand_book.brand_book('book.pdf', colors, variants) == 4
+
+    with open(workdir / 'images/book.pdf', 'rb') as f:
+        data = f.read()
+    assert len(re.findall(rb'/Type /Page\b', data)) == 4
+    # the font is embedded once for the whole book, as a subset
+    assert re.search(rb'/BaseFont /\w+\+Oswald', data)
+    assert len(re.findall(rb'/Type /Font\b', data)) == 1
+
+
+def test_invalid_variant(workdir, capsys):
+    assert brand_book.brand_book('book.pdf', {'default': colorways.default},
+                                 [('3:1', 'oval')]) is None
+    assert 'ERROR' in capsys.readouterr().out
+    assert not (workdir / 'images/book.pdf').exists()
@@ -0,0 +1,62 @@
+import colorway_sweep
+import colorways
+import logo
+
+import numpy as np
+import matplotlib.colors as mcolors
+import pytest
+
+
+def test_contrast_ratio_extremes():
+    black, white = colorway_sweep.luminance(np.array([[0.0, 0.0, 0.0], [1.0, 1.0, 1.0]]))
+    assert colorway_sweep.contrast_ratio(black, white) == pytest.approx(21.0)
+    assert colorway_sweep.contrast_ratio(white, black) == pytest.approx(21.0)
+    assert colorway_sweep.contrast_ratio(white, white) == pytest.approx(1.0)
+
+
+def test_scores_match_one_at_a_time():
+    candidates = list(colorways.colorways.values())
+    result = colorway_sweep.score_colorways(candidates)
+
+    def lum(color):
+        return colorway_sweep.luminance(np.array(mcolors.to_rgb(color)))
+
+    for colors, contrast in zip(candidates, result['contrast']):
+        for (fg, bg, _), c in zip(colorway_sweep.contrast_pairs, contrast):
+            fgs = colors[fg] if fg == 'sky' and not isinstance(colors[fg], str) else [colors[fg]]
+            bgs = colors[bg] if bg == 'sky' and not isinstance(colors[bg], str) else [colors[bg]]
+            # the least contrasting sky stripe counts
+            expected = min(colorway_sweep.contrast_ratio(lum(f), lum(b)) for f in fgs for b in bgs)
+            assert c == pytest.approx(expected)
+
+
+def test_rank_fewest_failing_first():
+    base = colorways.default
+    candidates = colorway_sweep.vary(base, header_text=[base['header_tag'], base['header_text']],
+                                     popcorn=[base['popcorn'], base['sky']])
+    assert len(candidates) == 4
+    order, result = colorway_sweep.rank_colorways(candidates)
+    # the unchanged colorway is best, the one with both pairs broken is worst
+    assert order[0] == candidates.index(dict(base))
+    assert result['failing'][order[-1]] == result['failing'].max()
+    assert (np.diff(result['failing'][order]) >= 0).all()
+    assert result['score'].min() >= 0 and result['score'].max() <= 1
+
+
+def test_striped_sky_uses_least_contrasting_stripe():
+    colors = dict(colorways.default, sky=['#FFFFFF', colorways.default['mountains_edge']])
+    result = colorway_sweep.score_colorways([colors], [('mountains_edge', 'sky', 3.0)])
+    assert result['contrast'][0, 0] == pytest.approx(1.0)
+    assert result['failing'][0] == 1
+
+
+@pytest.mark.parametrize('colors', [colorways.default, colorways.pride])
+def test_preview_matches_render(colors):
+    image, = colorway_sweep.preview([colors], dpi=20)
+    expected = logo.render_rgba(colors, '5:4', 'default', 20)
+    assert image.shape == expected.shape
+    assert np.array_equal(image[:, :, 3], expected[:, :, 3])
+    # Agg rounds each layer it blends, so where several antialiased edges meet it's a few off
+    diff = np.abs(image.astype(int) - expected).max(axis=2)
+    assert diff.max() <= 8
+    assert (diff > 2).mean() < 0.01
@@ -0,0 +1,18 @@
+import logo
+import colorways
+
+from matplotlib.backends.backend_ps import RendererPS
+
+
+def test_ps_clip_hook_exists():
+    # deterministic eps output patches this private hook, if a matplotlib upgrade removes or
+    # changes it, deterministic_output and ps_clip_hook_versions need updating
+    assert hasattr(RendererPS, '_get_clip_cmd')
+    assert logo.stable_ps_clips()
+
+
+def test_deterministic_eps_is_byte_identical():
+    data = [logo.render_logo(colorways.pride, '5:4', 'oval', 50, ftype='eps', deterministic=True)
+            for _ in range(2)]
+    assert data[0] == data[1]
+    assert RendererPS._get_clip_cmd.__name__ == '_get_clip_cmd' # patch is undone
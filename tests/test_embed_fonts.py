@@ -0,0 +1,53 @@
+import logo
+import colorways
+
+from fontTools.ttLib import TTFont
+import matplotlib.pyplot as plt
+import base64
+import io
+import re
+
+
+def embedded(svg):
+    return re.findall(r"@font-face\{font-family:'(.*?)';src:url\(data:font/\w+;base64,(.*?)\)",
+                      svg)
+
+
+def test_svg_text_uses_embedded_subset():
+    svg = logo.render_logo(colorways.default, '5:4', 'default', 50, ftype='svg',
+                           embed_fonts=True).decode()
+    (family, data), = embedded(svg)
+    assert family.startswith('Oswald ')
+    texts = re.findall(r'<text style="[^"]*font-family: \'(.*?)\'[^"]*"[^>]*>(.*?)</text>', svg)
+    assert texts and all(f == family for f, text in texts)
+
+    # only the characters of the logo text are in the subset, and no variation data
+    font = TTFont(io.BytesIO(base64.b64decode(data)))
+    assert 'fvar' not in font
+    chars = set(''.join(logo.texts.values())) - {' '}
+    assert chars <= {chr(c) for c in font.getBestCmap()}
+    assert len(font.getBestCmap()) <= len(chars) + 1
+
+
+def test_subsets_are_cached():
+    first = logo.font_subset(logo.font_file, 'CU Denver')
+    assert logo.font_subset(logo.font_file, 'revneD UC') is first
+    assert logo.font_subset(logo.font_file, 'CU Denver!') is not first
+
+
+def test_glyphs_as_paths_by_default():
+    svg = logo.render_logo(colorways.default, '5:4', 'default', 50, ftype='svg').decode()
+    assert '<text' not in svg and '@font-face' not in svg
+
+
+def test_font_properties_restored():
+    fig, ax = plt.subplots()
+    text = ax.text(0.5, 0.5, 'Est. 1987', fontproperties=logo.prop)
+    with logo.embedded_fonts(fig) as css:
+        assert b'@font-face' in css
+        assert text.get_fontproperties().get_family()[0].startswith('Oswald ')
+        assert plt.rcParams['svg.fonttype'] == 'none'
+    assert text.get_fontproperties().get_file() == logo.font_file
+    assert text.get_fontproperties().get_family() == logo.prop.get_family()
+    assert plt.rcParams['svg.fonttype'] == 'path'
+    plt.close(fig)
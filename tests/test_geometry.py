@@ -0,0 +1,28 @@
+import logo
+
+import pytest
+
+
+@pytest.fixture
+def bundle(tmp_path, monkeypatch):
+    fname = str(tmp_path / 'geometry.npz')
+    monkeypatch.setattr(logo, 'geometry_bundle', None)
+    logo.build_geometry(fname, [('5:4', 'default')])
+    yield fname
+    logo.geometry_bundle = None
+
+
+def test_bundle_matches_computed_layout(bundle):
+    paths, shift_up, layout = logo.bundled_geometry('default', '5:4', bundle)
+    computed = logo.text_layout('default', '5:4', shift_up,
+                                logo.mpatches.PathPatch(logo.border_paths('default', '5:4')['footer']))
+    assert layout == pytest.approx(computed)
+
+
+def test_bundle_ignored_when_layout_code_changes(bundle, monkeypatch):
+    text_layout = logo.text_layout
+    def changed_text_layout(shape, ratio, shift_up, footer_region):
+        return dict(text_layout(shape, ratio, shift_up, footer_region), header_fsize=10)
+    monkeypatch.setattr(logo, 'text_layout', changed_text_layout)
+    logo.geometry_bundle = None
+    assert logo.bundled_geometry('default', '5:4', bundle) is None
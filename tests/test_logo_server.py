@@ -0,0 +1,68 @@
+import logo_server
+import render_pool
+
+import http.client
+import threading
+import time
+import pytest
+
+
+@pytest.fixture(scope='module')
+def server():
+    server = logo_server.make_server(0, processes=1, max_pixels=10**6, max_aspect=4)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    server.service.close()
+
+
+def get(server, path, headers={}):
+    conn = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=120)
+    conn.request('GET', path, headers=headers)
+    response = conn.getresponse()
+    data = response.read()
+    conn.close()
+    return response, data
+
+
+def test_renders_logo(server):
+    response, data = get(server, '/logo?ratio=3:2&dpi=20')
+    assert response.status == 200
+    assert data[:8] == b'\x89PNG\r\n\x1a\n'
+    response, _ = get(server, '/logo?ratio=3:2&dpi=20', {'If-None-Match': response.getheader('ETag')})
+    assert response.status == 304
+
+
+@pytest.mark.parametrize('ratio', ['5:1', '1:5', '1000:1', '1:1000'])
+def test_rejects_extreme_ratios(server, ratio):
+    response, _ = get(server, '/logo?shape=rectangle&dpi=1&ratio=' + ratio)
+    assert response.status == 400
+
+
+def test_rejects_too_many_pixels(server):
+    # 5:4 at 200 dpi is 1200x1500 pixels
+    response, _ = get(server, '/logo?ratio=5:4&dpi=200')
+    assert response.status == 413
+    # vector files don't have a canvas
+    response, _ = get(server, '/logo?ratio=5:4&dpi=200&ftype=svg')
+    assert response.status == 200
+
+
+def test_failed_renders_release_their_slot(server, monkeypatch):
+    service = server.service
+
+    async def fails(*args, **kwargs):
+        raise render_pool.RenderError('no worker')
+    monkeypatch.setattr(service.pool, 'render', fails)
+
+    key = ('default', '5:4', 'default', 10, 'o', 'png', False)
+    for _ in range(200):
+        with pytest.raises(render_pool.RenderError):
+            service.get(key)
+    time.sleep(0.1) # callbacks that ran on the event loop thread
+    assert service.pending == {}
+    assert service.slots.acquire(blocking=False)
+    service.slots.release()
+    assert key not in service.cache
@@ -0,0 +1,37 @@
+import logo
+
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection, PolyCollection
+import pytest
+
+
+def test_vertex_table_matches_groups():
+    assert len(logo.mountain_vertices) == sum(logo.mountain_lengths) == len(logo.mountain_yscale)
+    # every vertex is on the ground or a popcorn function point p/q, 1/q
+    x, y = logo.mountain_vertices.T
+    up = y > 0
+    assert np.allclose(x[up] / y[up], np.round(x[up] / y[up]))
+    # only the left mountain gets shrunk
+    left = np.concatenate([[group[3]] * len(shape) for group in logo.mountain_groups
+                           for shape in group[4]])
+    assert (logo.mountain_yscale[left] == logo.shrink).all()
+    assert (logo.mountain_yscale[~left] == 1.0).all()
+
+
+@pytest.mark.parametrize('ratio,shift_up', [('5:4', 0.0), ('1:1', 0.04), ('3:1', 0.0)])
+def test_one_collection_per_group(ratio, shift_up):
+    fig, ax = plt.subplots()
+    collections = logo.draw_mountains(ax, ratio, shift_up, '#000000', '#FFFFFF', ax.patch)
+    assert len(collections) == len(logo.mountain_groups)
+    scale_factor = 0.75 if logo.is_banner(ratio) else 1.0
+    for collection, (kind, zorder, color, left, shapes) in zip(collections, logo.mountain_groups):
+        assert isinstance(collection, LineCollection if kind == 'line' else PolyCollection)
+        assert collection.get_zorder() == zorder
+        assert len(collection.get_paths()) == len(shapes)
+        for path, shape in zip(collection.get_paths(), shapes):
+            shape = np.array(shape)
+            expected = np.column_stack([logo.scalex(shape[:, 0], scale_factor),
+                                        shape[:, 1] * (logo.shrink if left else 1.0) + shift_up])
+            assert np.allclose(path.vertices[:len(shape)], expected)
+    plt.close(fig)
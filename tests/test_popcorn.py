@@ -0,0 +1,46 @@
+import logo
+
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize('ratio', logo.standard_ratios)
+@pytest.mark.parametrize('marker', ['o', '*'])
+def test_default_depth_not_over_baseline(ratio, marker):
+    # the default (1200 dpi) and vector output of the standard ratio don't get deeper than the
+    # original logo
+    for dpi in [1200, None]:
+        if dpi == 1200 and logo.canvas_size(ratio, dpi)[1] > logo.canvas_size('5:4', dpi)[1]:
+            continue
+        assert logo.auto_depth(ratio, marker, dpi) <= logo.baseline_depth
+        x, y, q, s = logo.popcorn_points(ratio, 0.0, marker, dpi)
+        assert q.max() <= logo.baseline_depth
+        assert len(x) <= len(logo.popcorn(logo.baseline_depth)[0]) - 1
+
+
+@pytest.mark.parametrize('marker', ['o', '*'])
+def test_big_outputs_go_deeper(marker):
+    depths = [logo.auto_depth('5:4', marker, dpi) for dpi in [1200, 2400, 4800, 9600]]
+    assert depths == sorted(depths)
+    assert depths[1] > logo.baseline_depth
+    assert logo.auto_depth('3:1', marker, 1200) > logo.baseline_depth
+
+    # but never deeper than the rows that still poke out of the ground, which depends on the
+    # marker size only (the output is the same size in inches at any dpi)
+    px_x, px_y = logo.pixel_scale('5:4', 9600)
+    radius = np.sqrt(logo.marker_size(marker, 9600)) / 72 * 9600 / 2 / px_y
+    ground = 0.01 # see auto_depth
+    assert depths[-1] <= 1 / (ground - radius)
+
+
+def test_dots_scale_with_output_size():
+    counts = [len(logo.popcorn_points('5:4', 0.0, 'o', dpi)[0]) for dpi in [20, 50, 300, 1200]]
+    assert counts == sorted(counts)
+    assert counts[0] < counts[-1]
+
+
+def test_marker_at_least_min_pixels():
+    for dpi in [5, 20, 50, 1200]:
+        s = logo.marker_size('o', dpi)
+        assert s**0.5 / 72 * dpi >= logo.min_marker_px - 1e-9
+    assert logo.marker_size('o', 1200) == logo.marker_size('o', None) == 50
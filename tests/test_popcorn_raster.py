@@ -0,0 +1,46 @@
+import logo
+import colorways
+
+import numpy as np
+import pytest
+
+
+def test_chunks_match_popcorn():
+    x, y = logo.popcorn(40)
+    chunks = list(logo.popcorn_chunks(40, chunk_size=50))
+    assert len(chunks) > 1
+    assert np.allclose(np.concatenate([c[0] for c in chunks]), x)
+    assert np.allclose(np.concatenate([c[1] for c in chunks]), y)
+
+
+@pytest.mark.parametrize('marker', ['o', '*'])
+def test_marker_kernel_coverage(marker):
+    s = logo.marker_size(marker, 300)
+    kernel = logo.marker_kernel(marker, s, 300)
+    assert kernel.shape[0] == kernel.shape[1] and kernel.shape[0] % 2 == 1
+    assert kernel.min() >= 0 and kernel.max() == 1
+    assert np.allclose(kernel, kernel[:, ::-1]) # markers are symmetric left to right
+    if marker == 'o':
+        radius = np.sqrt(s) * 300 / 72 / 2
+        assert kernel.sum() == pytest.approx(np.pi * radius**2, rel=0.01)
+
+
+def test_convolve_tiled_matches_direct():
+    rng = np.random.default_rng(0)
+    grid = (rng.random((37, 53)) > 0.9).astype(np.float32)
+    kernel = rng.random((5, 7)).astype(np.float32)
+
+    direct = np.zeros_like(grid)
+    padded = np.pad(grid, ((2, 2), (3, 3)))
+    for i in range(5):
+        for j in range(7):
+            direct += kernel[4 - i, 6 - j] * padded[i:i+37, j:j+53]
+    assert np.allclose(logo.convolve_tiled(grid, kernel, tile=16), direct, atol=1e-4)
+
+
+def test_raster_matches_scatter():
+    scatter = logo.render_rgba(colorways.default, '5:4', 'default', 100).astype(float)
+    raster = logo.render_rgba(colorways.default, '5:4', 'default', 100,
+                              popcorn_mode='raster').astype(float)
+    diff = np.abs(scatter - raster).max(axis=2)
+    assert (diff > 64).mean() < 0.02 # only anti-aliasing at the edges of the dots differs
@@ -0,0 +1,23 @@
+import logo
+import colorways
+
+import matplotlib.pyplot as plt
+
+
+def test_collapsed_stacks_start_at_the_stage_body():
+    profiler = logo.StageProfiler()
+    logo.draw_logo(colorways.default, '5:4', 'default', 20, profiler=profiler)
+    plt.close('all')
+    with profiler.stage('popcorn'):
+        logo.popcorn(40)
+
+    assert {'draw_mountains', 'draw_popcorn', 'add_text', 'popcorn'} <= set(profiler.profiles)
+    for stage in profiler.profiles:
+        stacks = profiler.collapsed(stage, 0)
+        assert stacks
+        for stack in stacks:
+            frames = stack.split(';')
+            assert frames[0] == stage
+            assert not frames[1].startswith('contextlib.py')
+            assert frames[1] != 'logo.py:__exit__'
+    assert {stack.split(';')[1] for stack in profiler.collapsed('popcorn', 0)} == {'logo.py:popcorn'}
@@ -0,0 +1,42 @@
+import regression
+
+import json
+
+
+def write_index(tmp_path, index):
+    fname = str(tmp_path / 'index.json')
+    with open(fname, 'w') as f:
+        json.dump(index, f)
+    return fname
+
+
+def test_seeded_index_matches_unchanged_logos(tmp_path):
+    index = regression.load_index()
+    fname = write_index(tmp_path, index)
+    results = regression.check(fname=fname)
+    for name, entry in index['variants'].items():
+        assert entry['seeded']
+        assert results[name] == 'ok'
+    for name in index['skipped']:
+        assert results[name] == 'skipped'
+
+
+def test_seeded_entry_changed(tmp_path):
+    index = regression.load_index()
+    entry = index['variants']['dept_logo']
+    entry['phash'] = '%016x' % (int(entry['phash'], 16) ^ 0xffff)
+    results = regression.check(fname=write_index(tmp_path, index))
+    assert results['dept_logo'] == 'changed'
+    assert results['dept_logo_pride'] == 'ok'
+
+
+def test_rendered_entries_compare_digests(tmp_path):
+    index = {'dpi': 20, 'skipped': [], 'variants': {}}
+    entry = regression.fingerprint('dept_logo', 20)
+    index['variants']['dept_logo'] = entry
+    index['variants']['dept_logo_pride'] = dict(regression.fingerprint('dept_logo_pride', 20),
+                                                digest='0' * 16)
+    results = regression.check(fname=write_index(tmp_path, index))
+    assert results['dept_logo'] == 'ok'
+    assert results['dept_logo_pride'] == 'moved'
+    assert results['dept_logo_lunar-new-year'] == 'new'
@@ -0,0 +1,76 @@
+import render_pool
+import colorways
+import logo
+
+import numpy as np
+from PIL import Image
+from multiprocessing import shared_memory
+import asyncio
+import io
+import os
+import signal
+import pytest
+
+
+def test_worker_killed_mid_render():
+    async def main():
+        async with render_pool.RenderPool(processes=1) as pool:
+            process = pool.workers[0][0]
+            big = asyncio.create_task(pool.render(colorways.default, dpi=1200))
+            await asyncio.sleep(1.0) # let the render start
+            os.kill(process.pid, signal.SIGKILL)
+            with pytest.raises(render_pool.RenderError, match='-9'):
+                await asyncio.wait_for(big, 60)
+
+            # the worker is replaced and the pool keeps working
+            png = await pool.render(colorways.default, dpi=10, timeout=60)
+            assert png[:8] == b'\x89PNG\r\n\x1a\n'
+            assert pool.workers[0][0] is not process
+
+    asyncio.run(main())
+
+
+def test_worker_killed_while_idle():
+    async def main():
+        async with render_pool.RenderPool(processes=1) as pool:
+            process = pool.workers[0][0]
+            process.kill()
+            process.join()
+            with pytest.raises(render_pool.RenderError):
+                await pool.render(colorways.default, dpi=10, timeout=60)
+            png = await pool.render(colorways.default, dpi=10, timeout=60)
+            assert png[:8] == b'\x89PNG\r\n\x1a\n'
+
+    asyncio.run(main())
+
+
+def test_render_shared_in_place():
+    shape = logo.canvas_size('5:4', 20) + (4,)
+    shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)))
+    try:
+        assert render_pool.render_shared(shm.name, shape, colors=colorways.default, dpi=20)
+        image = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf).copy()
+        assert np.array_equal(image, logo.render_rgba(colorways.default, '5:4', 'default', 20))
+        assert render_pool.render_shared(shm.name, shape, colors=colorways.default,
+                                         shape='bad') is None
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def test_render_rgba_into_shared_memory():
+    async def main():
+        async with render_pool.RenderPool(processes=1) as pool:
+            canvas = await pool.render_rgba(colorways.pride, '3:1', 'rectangle', dpi=20,
+                                            timeout=60)
+            with canvas:
+                expected = logo.render_rgba(colorways.pride, '3:1', 'rectangle', 20)
+                assert np.array_equal(canvas.array, expected)
+                decoded = np.asarray(Image.open(io.BytesIO(canvas.encode())))
+                assert np.array_equal(decoded, expected)
+                name = canvas.shm.name
+            assert canvas.shm is None and canvas.array is None
+            with pytest.raises(FileNotFoundError):
+                shared_memory.SharedMemory(name=name) # freed on close
+
+    asyncio.run(main())
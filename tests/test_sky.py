@@ -0,0 +1,63 @@
+import logo
+import colorways
+
+import numpy as np
+import matplotlib.colors as mcolors
+import matplotlib.pyplot as plt
+from matplotlib.collections import PolyCollection
+from matplotlib.image import AxesImage
+import pytest
+
+
+@pytest.mark.parametrize('n', [1, 2, 6, 9])
+def test_sky_edges_top_down(n):
+    edges = logo.sky_edges(n, 0.04)
+    assert len(edges) == n + 1
+    assert edges[0] == 1.0
+    assert (np.diff(edges) < 0).all()
+    assert edges[-1] >= 0.0
+
+
+def test_sky_image_gradient_and_cache():
+    sky = colorways.pride['sky']
+    rgba = logo.sky_image(sky, 0.0)
+    assert rgba.shape == (logo.sky_gradient_rows, 1, 4) and rgba.dtype == np.uint8
+    assert (rgba[:, 0, 3] == 255).all()
+    # first and last colors are solid above/below the middle of their stripes
+    assert tuple(rgba[0, 0, :3]) == tuple(np.round(np.array(mcolors.to_rgb(sky[0])) * 255))
+    assert tuple(rgba[-1, 0, :3]) == tuple(np.round(np.array(mcolors.to_rgb(sky[-1])) * 255))
+    assert logo.sky_image(sky, 0.0) is rgba
+
+
+@pytest.mark.parametrize('mode', ['stripes', 'gradient'])
+def test_draw_sky_modes(mode):
+    fig, ax = plt.subplots()
+    region = ax.patch
+    sky = logo.draw_sky(ax, 0.0, colorways.pride['sky'], region, mode)
+    if mode == 'stripes':
+        assert isinstance(sky, PolyCollection)
+        assert len(sky.get_paths()) == len(colorways.pride['sky'])
+        assert np.allclose(sky.get_facecolor(), mcolors.to_rgba_array(colorways.pride['sky']))
+    else:
+        assert isinstance(sky, AxesImage)
+        assert sky.get_array().shape[0] == logo.sky_gradient_rows
+    plt.close(fig)
+
+    # a single color is always one stripe
+    fig, ax = plt.subplots()
+    assert isinstance(logo.draw_sky(ax, 0.0, '#FFFFFF', ax.patch, mode), PolyCollection)
+    plt.close(fig)
+
+
+def test_gradient_only_changes_the_sky():
+    colors = dict(colorways.pride, sky='#FFFFFF')
+    stripes = logo.render_rgba(colors, '5:4', 'default', 20, sky_mode='stripes')
+    # a gradient needs two colors, one color is always a stripe
+    assert np.array_equal(stripes, logo.render_rgba(colors, '5:4', 'default', 20,
+                                                    sky_mode='gradient'))
+
+    stripes = logo.render_rgba(colorways.pride, '5:4', 'default', 20, sky_mode='stripes')
+    gradient = logo.render_rgba(colorways.pride, '5:4', 'default', 20, sky_mode='gradient')
+    changed = np.abs(stripes.astype(int) - gradient).max(axis=2) > 0
+    assert changed.any()
+    assert np.array_equal(stripes[:, :, 3], gradient[:, :, 3]) # the sky is opaque either way
@@ -0,0 +1,43 @@
+import logo
+
+import matplotlib.patches as mpatches
+import pytest
+
+
+def layout(ratio, shape):
+    ratio, shape = logo.check_args(ratio, shape, 'o')
+    footer_region = mpatches.PathPatch(logo.border_paths(shape, ratio)['footer'])
+    return logo.text_layout(shape, ratio, logo.get_shift_up(ratio, shape), footer_region)
+
+
+@pytest.mark.parametrize('ratio', ['3:2', '5:4', '1:1', '4:3', '7:5', '16:9', '2:1', '9:16',
+                                   '2.39:1'])
+@pytest.mark.parametrize('shape', ['default', 'rectangle', 'oval'])
+def test_footer_sizes_decrease(ratio, shape):
+    sizes = layout(ratio, shape)
+    assert sizes['footer_fsize1'] > sizes['footer_fsize2'] > sizes['footer_fsize3']
+
+
+@pytest.mark.parametrize('ratio', ['4:1', '5:1'])
+def test_banner_footer_sizes_decrease(ratio):
+    sizes = layout(ratio, 'rectangle')
+    assert sizes['footer_fsize1'] > sizes['footer_fsize2'] > sizes['footer_fsize3']
+
+
+@pytest.mark.parametrize('ratio, tuned', [('1.5:1', '3:2'), ('1.25:1', '5:4'), ('3.0:1', '3:1'),
+                                          ('10:8', '5:4'), ('2.5:2.5', '1:1')])
+def test_decimal_ratios_are_hand_tuned(ratio, tuned):
+    assert logo.normalize_ratio(ratio) == tuned
+    shape = 'rectangle'
+    assert layout(ratio, shape) == layout(tuned, shape)
+
+
+def test_fitted_lines_closer_for_smaller_footers():
+    big = layout('16:9', 'rectangle')
+    small = layout('9:16', 'rectangle')
+    assert small['footer_fsize1'] < big['footer_fsize1']
+    for key in ['footer_gap1', 'footer_gap3', 'tag_height']:
+        assert small[key] < big[key]
+    # hand tuned 3:2 positions are unchanged
+    tuned = layout('3:2', 'default')
+    assert (tuned['footer_y'], tuned['footer_gap1'], tuned['footer_gap3']) == (0.29, 0.078, 0.075)
@@ -0,0 +1,32 @@
+import logo
+import colorways
+
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+import pytest
+
+
+@pytest.mark.parametrize('ratio', logo.standard_ratios + ['16:9', '9:16'])
+@pytest.mark.parametrize('trim', [False, True])
+def test_canvas_size_matches_agg(ratio, trim):
+    for dpi in list(range(10, 320, 3)) + [55, 72, 113, 299, 600, 1200, 2400]:
+        fig = plt.figure(dpi=dpi)
+        ax = fig.gca()
+        logo.set_limits(fig, ax, ratio, trim, dpi)
+        renderer = FigureCanvasAgg(fig).get_renderer()
+        plt.close(fig)
+        assert (renderer.height, renderer.width) == logo.canvas_size(ratio, dpi, trim), dpi
+
+
+def test_trimmed_render_has_canvas_size():
+    rgba = logo.render_rgba(colorways.default, '3:2', 'default', dpi=55, trim=True)
+    assert rgba.shape[:2] == logo.canvas_size('3:2', 55, trim=True)
+
+
+def test_trim_only_crops():
+    # the trimmed image is the untrimmed one with the margins cut off
+    full = logo.render_rgba(colorways.default, '5:4', 'oval', dpi=40)
+    trimmed = logo.render_rgba(colorways.default, '5:4', 'oval', dpi=40, trim=True)
+    margin_x, margin_y = [round(m * 40) for m in logo.trim_margins('5:4', 40)]
+    h, w = trimmed.shape[:2]
+    assert (full[margin_y:margin_y + h, margin_x:margin_x + w] == trimmed).all()
@@ -0,0 +1,36 @@
+import widget_cache
+import colorways
+
+import hashlib
+import json
+import os
+
+
+def test_widget_states_dedupe():
+    states, logos = widget_cache.widget_states({'pride': colorways.pride})
+    assert len(states) == (len(widget_cache.widget_ratios) * len(widget_cache.widget_shapes)
+                           * len(widget_cache.widget_markers))
+    assert len(logos) == len(set(logos)) < len(states)
+    assert states['pride|3:1|oval|o'] is None
+    # a 5:4 square is a 1:1 square
+    assert states['pride|5:4|square|o'] == states['pride|1:1|square|o']
+    assert set(s for s in states.values() if s is not None) == set(logos)
+
+
+def test_files_named_by_content(workdir):
+    colors = {'pride': colorways.pride}
+    index = widget_cache.export_widget_cache('cache', colors, dpi=10, processes=1)
+    path = workdir / 'images/cache'
+    with open(path / 'index.json') as f:
+        assert json.load(f) == index
+
+    files = set(index['states'].values()) - {None}
+    assert files == set(os.listdir(path)) - {'index.json'}
+    for fname in files:
+        with open(path / fname, 'rb') as f:
+            assert hashlib.sha256(f.read()).hexdigest()[:16] + '.png' == fname
+    assert index['states']['pride|5:4|square|o'] == index['states']['pride|1:1|square|o']
+    assert index['states']['pride|3:1|oval|*'] is None
+
+    # renders are deterministic, so exporting again keeps every name
+    assert widget_cache.export_widget_cache('cache', colors, dpi=10, processes=1) == index
@@ -0,0 +1,167 @@
+import logo
+import colorways
+import render_pool
+
+import concurrent.futures
+import multiprocessing
+import hashlib
+import argparse
+import json
+import os
+
+# ------------------------
+# widget options, every combination gets an image
+# ------------------------
+widget_ratios = logo.standard_ratios
+widget_shapes = ['default', 'rectangle', 'oval', 'rounded_rectangle', 'square', 'circle',
+                 'rounded_square']
+widget_markers = ['o', '*']
+# ------------------------
+
+
+def state_key(colorway, ratio, shape, marker):
+    """
+    Utility function for the lookup table key of a widget state, e.g. 'pride|5:4|oval|o'
+    """
+    return '|'.join([colorway, ratio, shape, marker])
+
+
+def widget_states(colors=None, ratios=None, shapes=None, markers=None):
+    """
+    Enumerates every widget state and the logo it shows
+
+    Different states can show the same logo (a 5:4 square is a 1:1 square, see logo.check_args),
+    so each logo is only listed once. Banner ratios with shapes other than rectangle show nothing.
+
+    Args:
+    ========
+      colors : dict of dict, optional
+          colorways, by name, defaults to colorways.colorways
+      ratios, shapes, markers : list of str, optional
+          widget options, default to widget_ratios, widget_shapes and widget_markers
+
+    Returns:
+    ========
+      states : dict
+          state key (see state_key): (colorway, ratio, shape, marker) of its logo, None if
+          there isn't one
+      logos : list of tuple
+          distinct (colorway, ratio, shape, marker) logos, in the order they first appear
+    """
+    colors = colorways.colorways if colors is None else colors
+    ratios = widget_ratios if ratios is None else ratios
+    shapes = widget_shapes if shapes is None else shapes
+    markers = widget_markers if markers is None else markers
+
+    states = {}
+    logos = {}
+    for colorway in colors:
+        for ratio in ratios:
+            for shape in shapes:
+                for marker in markers:
+                    key = state_key(colorway, ratio, shape, marker)
+                    if logo.is_banner(ratio) and shape != 'rectangle':
+                        states[key] = None
+                        continue
+                    args = logo.check_args(ratio, shape, marker)
+                    states[key] = None if args is None else (colorway,) + args + (marker,)
+                    if states[key] is not None:
+                        logos[states[key]] = True
+    return states, list(logos)
+
+
+def export_widget_cache(directory='widget_cache', colors=None, dpi=50, processes=None, trim=True):
+    """
+    Renders every widget state once, for published (static) pages that can't run logo()
+
+    Logos are rendered in parallel by pre-warmed worker processes (see render_pool.warm_up) and
+    saved as images/<directory>/<hash>.png, named by their contents, so identical logos are only
+    stored once and files that haven't changed keep their names (and cached copies). The lookup
+    table images/<directory>/index.json maps each state (see state_key) to its file, so a widget
+    change is just an image swap (see widget_image).
+
+    Args:
+    ========
+      directory : str, default='widget_cache'
+          directory for the images and lookup table, in the images directory
+      colors : dict of dict, optional
+          colorways, by name, defaults to colorways.colorways
+      dpi : int, default=50
+          dots-per-inch of the images, logos are 6 inches tall
+      processes : int, optional
+          number of render worker processes, defaults to the number of CPUs
+      trim : bool, default=True
+          crop the images to the outside border, see logo.logo
+
+    Returns:
+    ========
+      index : dict
+          contents of the lookup table
+    """
+    colors = colorways.colorways if colors is None else colors
+    states, logos = widget_states(colors)
+
+    # check if the output directory exists
+    path = 'images/' + directory
+    if not os.path.exists(path):
+        os.makedirs(path)
+
+    files = {}
+    with concurrent.futures.ProcessPoolExecutor(
+            processes, mp_context=multiprocessing.get_context('spawn'),
+            initializer=render_pool.warm_up) as pool:
+        futures = {pool.submit(logo.render_logo, colors[colorway], ratio, shape, dpi, marker,
+                               trim=trim, deterministic=True): (colorway, ratio, shape, marker)
+                   for colorway, ratio, shape, marker in logos}
+        for future in concurrent.futures.as_completed(futures):
+            data = future.result()
+            fname = hashlib.sha256(data).hexdigest()[:16] + '.png'
+            if not os.path.exists(path + '/' + fname):
+                with open(path + '/' + fname, 'wb') as f:
+                    f.write(data)
+            files[futures[future]] = fname
+
+    index = {'dpi': dpi,
+             'widgets': {'colorway': list(colors), 'ratio': widget_ratios,
+                         'shape': widget_shapes, 'marker': widget_markers},
+             'states': {key: None if state is None else files[state]
+                        for key, state in states.items()}}
+    with open(path + '/index.json', 'w') as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+
+    return index
+
+
+def widget_image(colorway='default', ratio='5:4', shape='default', marker='o',
+                 directory='widget_cache'):
+    """
+    Shows a logo from the widget cache (see export_widget_cache), e.g. in a notebook with
+
+        interact(widget_image, colorway=list(colorways.colorways), ratio=widget_ratios,
+                 shape=widget_shapes, marker=widget_markers)
+
+    Returns:
+    ========
+      image : IPython.display.Image
+          the cached logo, None if the state doesn't have one
+    """
+    from IPython.display import Image
+
+    path = 'images/' + directory
+    with open(path + '/index.json') as f:
+        fname = json.load(f)['states'].get(state_key(colorway, ratio, shape, marker))
+    if fname is None:
+        print('ERROR: no logo for %s %s %s %s' % (colorway, ratio, shape, marker))
+        return
+    return Image(filename=path + '/' + fname)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='render every widget state for published pages')
+    parser.add_argument('--dpi', type=int, default=50)
+    parser.add_argument('--processes', type=int, default=None)
+    args = parser.parse_args()
+
+    index = export_widget_cache(dpi=args.dpi, processes=args.processes)
+    print('%d states, %d images in images/widget_cache'
+          % (len(index['states']), len(set(index['states'].values()) - {None})))